@@ -2,10 +2,13 @@
 import os
 import urllib
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import requests
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 from flask import Flask, jsonify
 # from crypt import methods
 
@@ -21,28 +24,133 @@ from async_tasks import task_manager
 app = Flask(__name__)
 # r'/*' 是通配符，让本服务器所有的 URL 都允许跨域请求
 CORS(app)
-from llm.llm import QwenClient, DeepSeekClient, LlamaClient
-from parase.c_parse import collect_dependencies
-from parase.pom_parse import process_projects
-from parase.go_parse import collect_go_dependencies
-from parase.javascript_parse import collect_javascript_dependencies
-from parase.python_parse import collect_python_dependencies
-from parase.php_parse import collect_php_dependencies
-from parase.ruby_parse import collect_ruby_dependencies
-from parase.rust_parse import collect_rust_dependencies
-from parase.erlang_parse import collect_erlang_dependencies
+from parase.c_parse import collect_dependencies, list_c_dependencies, system_prompt as c_prompt
+from parase.pom_parse import process_projects, list_maven_dependencies, llm_communicate, system_prompt as maven_prompt
+from parase.go_parse import collect_go_dependencies, list_go_dependencies, system_prompt as go_prompt
+from parase.javascript_parse import collect_javascript_dependencies, list_javascript_dependencies, system_prompt as javascript_prompt
+from parase.python_parse import collect_python_dependencies, list_python_dependencies, system_prompt as python_prompt
+from parase.php_parse import collect_php_dependencies, list_php_dependencies, system_prompt as php_prompt
+from parase.ruby_parse import collect_ruby_dependencies, list_ruby_dependencies, system_prompt as ruby_prompt
+from parase.rust_parse import collect_rust_dependencies, list_rust_dependencies, system_prompt as rust_prompt
+from parase.erlang_parse import collect_erlang_dependencies, list_erlang_dependencies, system_prompt as erlang_prompt
 from parase.unified_parser import UnifiedProjectParser
+from parase.description_cache import get_cache_stats
+from parase.batch_budget import get_batch_controller
+from parase.manifest_cache import get_manifest_cache_stats
+from parase.parallel_parse import get_parse_pool_stats
+from parase.dependency_record import Dependency, to_dicts
+from llm.response_cache import get_response_cache, get_response_cache_stats
+from llm.metrics import get_llm_metrics, llm_subsystem
+from llm.scheduler import get_scheduler_stats
 from web_crawler import github
 from web_crawler.avd import avd
 from web_crawler.nvd import nvd
-from VulLibGen.getLabels import getLabels
 
 
-model_clients = {
-    "qwen": QwenClient(model_name="qwen-max"),
-    "deepseek": DeepSeekClient(model_name="deepseek-r1"),
-
+# 模型客户端在首次使用时才创建（读取 API Key、建立连接池），
+# 只处理爬虫等路由的 worker 不需要加载 openai/httpx
+MODEL_CLIENT_SPECS = {
+    "qwen": ("QwenClient", "qwen-max"),
+    "deepseek": ("DeepSeekClient", "deepseek-r1"),
+    # 伪模型: 主提供方慢于近期延迟分位数时向备用提供方发出对冲请求，先返回者胜出
+    "fastest": ("HedgedClient", "fastest"),
 }
+_model_clients = {}
+_model_clients_lock = threading.Lock()
+
+
+def get_model_client(model):
+    """按名称获取（必要时创建）模型客户端，未知模型抛出 KeyError"""
+    client = _model_clients.get(model)
+    if client is not None:
+        return client
+    class_name, model_name = MODEL_CLIENT_SPECS[model]
+    with _model_clients_lock:
+        client = _model_clients.get(model)
+        if client is None:
+            from llm import llm
+            client = _model_clients[model] = getattr(llm, class_name)(model_name=model_name)
+    return client
+
+
+def llm_cache_bypassed():
+    """请求头 X-LLM-Cache: bypass 时跳过响应缓存读取，强制重新生成（新结果仍会写入缓存）"""
+    bypass = request.headers.get("X-LLM-Cache", "").lower() in ("bypass", "refresh", "no-cache")
+    cache = get_response_cache()
+    if bypass and cache is not None:
+        cache.record_bypass()
+    return bypass
+
+
+def think_with_cache(model, prompts, read_cache=True):
+    """
+    带响应缓存的 Think 调用
+
+    Returns:
+        (结果, 缓存状态 HIT/MISS/BYPASS/OFF)
+    """
+    client = get_model_client(model)
+    cache = get_response_cache()
+    if cache is None:
+        return client.Think(prompts), "OFF"
+
+    if read_cache:
+        cached = cache.get(client.model_name, prompts)
+        if cached is not None:
+            return cached, "HIT"
+
+    result = client.Think(prompts)
+    cache.put(client.model_name, prompts, result)
+    return result, "MISS" if read_cache else "BYPASS"
+
+
+def stream_llm_response(model, prompts, subsystem, read_cache=True):
+    """
+    以 Server-Sent Events 逐块转发模型输出
+
+    事件格式:
+        data: {"delta": "..."}                     每个增量分块
+        event: done   data: {"cache": ..., "length": n}
+        event: error  data: {"message": "..."}
+    客户端断开时 Flask 关闭生成器，think_stream 随之取消上游请求，worker 线程立即释放。
+    """
+    client = get_model_client(model)
+    cache = get_response_cache()
+
+    def sse(data, event=None):
+        prefix = f"event: {event}\n" if event else ""
+        return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def generate():
+        if cache is not None and read_cache:
+            cached = cache.get(client.model_name, prompts)
+            if cached is not None:
+                yield sse({"delta": cached})
+                yield sse({"cache": "HIT", "length": len(cached)}, event="done")
+                return
+
+        parts = []
+        deltas = client.think_stream(prompts, subsystem=subsystem)
+        try:
+            for delta in deltas:
+                parts.append(delta)
+                yield sse({"delta": delta})
+        except Exception as e:
+            yield sse({"message": str(e)}, event="error")
+            return
+        finally:
+            deltas.close()
+
+        result = "".join(parts)
+        if cache is not None:
+            cache.put(client.model_name, prompts, result)
+            status = "MISS" if read_cache else "BYPASS"
+        else:
+            status = "OFF"
+        yield sse({"cache": status, "length": len(result)}, event="done")
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 app = Flask(__name__)
 CORS(app)
@@ -186,13 +294,18 @@ def get_llm_query():
         return jsonify({"error": "Missing required parameter 'model'"}), 400
 
     try:
-        client = model_clients[model]
-        result = client.Think([{"role": "user", "content": query}])
+        if request.args.get("stream", "false").lower() == "true":
+            # 流式模式: 首个 token 生成后立即开始输出
+            return stream_llm_response(model, [{"role": "user", "content": query}], "query",
+                                       read_cache=not llm_cache_bypassed())
+        with llm_subsystem("query"):
+            result, cache_status = think_with_cache(model, [{"role": "user", "content": query}],
+                                                    read_cache=not llm_cache_bypassed())
         return jsonify({
             "message": "SUCCESS",
             "obj": result,
             "code":200
-        })
+        }), 200, {"X-LLM-Cache": cache_status}
     except Exception as e:
         return jsonify({
             "code": 400,
@@ -215,26 +328,56 @@ def get_repair_suggestion():
             "message": "至少需要提供漏洞名称、描述或相关代码之一"
         }), 400
 
+    # 构造优化的查询内容
+    prompt_parts = []
+    if vulnerability_name:
+        prompt_parts.append(f"漏洞: {vulnerability_name}")
+    if vulnerability_desc:
+        prompt_parts.append(f"描述: {vulnerability_desc}")
+    if related_code:
+        code_preview = related_code[:500] + ("..." if len(related_code) > 500 else "")
+        prompt_parts.append(f"代码: {code_preview}")
+
+    prompt_parts.append("请提供简洁的修复建议（3-5点）：")
+    prompts = [{"role": "user", "content": "\n".join(prompt_parts)}]
+
+    if model not in MODEL_CLIENT_SPECS:
+        return jsonify({
+            "code": 400,
+            "message": f"不支持的模型：{model}，可用模型：{list(MODEL_CLIENT_SPECS.keys())}"
+        }), 400
+
+    if request.form.get("stream", "false").lower() == "true":
+        # 流式模式: 直接以 SSE 返回建议内容，不需要轮询任务
+        return stream_llm_response(model, prompts, "repair", read_cache=not llm_cache_bypassed())
+
+    cache = get_response_cache()
+    if cache is not None and not llm_cache_bypassed():
+        # 相同提示词已有结果：直接返回，并登记一个已完成的任务以兼容轮询流程
+        cached = cache.get(MODEL_CLIENT_SPECS[model][1], prompts)
+        if cached is not None:
+            result = {
+                "code": 200,
+                "message": "success",
+                "obj": {
+                    "fix_advise": cached
+                }
+            }
+            task_id = task_manager.create_completed_task(result)
+            return jsonify(dict(
+                result,
+                task_id=task_id,
+                cached=True,
+                status_url=f"/llm/repair/suggestion/status/{task_id}",
+                result_url=f"/llm/repair/suggestion/result/{task_id}"
+            )), 200
+
     # 定义后台任务函数
     def generate_repair_advice():
-        # 构造优化的查询内容
-        prompt_parts = []
-        if vulnerability_name:
-            prompt_parts.append(f"漏洞: {vulnerability_name}")
-        if vulnerability_desc:
-            prompt_parts.append(f"描述: {vulnerability_desc}")
-        if related_code:
-            code_preview = related_code[:500] + ("..." if len(related_code) > 500 else "")
-            prompt_parts.append(f"代码: {code_preview}")
-
-        prompt_parts.append("请提供简洁的修复建议（3-5点）：")
-        full_query = "\n".join(prompt_parts)
-
         try:
-            # 获取对应的模型客户端
-            client = model_clients[model]
-            # 调用模型生成建议
-            result = client.Think([{"role": "user", "content": full_query}])
+            # 调用模型生成建议（缓存读取已在上面完成，这里只写入）
+            with llm_subsystem("repair"):
+                result, _ = think_with_cache(model, prompts, read_cache=False)
             return {
                 "code": 200,
                 "message": "success",
@@ -242,8 +385,6 @@ def get_repair_suggestion():
                     "fix_advise": result
                 }
             }
-        except KeyError:
-            raise Exception(f"不支持的模型：{model}，可用模型：{list(model_clients.keys())}")
         except Exception as e:
             raise Exception(f"生成建议时出错：{str(e)}")
 
@@ -313,11 +454,64 @@ def get_repair_suggestion_result(task_id):
     return jsonify(result), 200
 
 
+# 各语言的依赖收集函数（不调用LLM）和描述生成提示词，用于 job 模式
+PARSE_SOURCES = {
+    'java': (list_maven_dependencies, maven_prompt),
+    'go': (list_go_dependencies, go_prompt),
+    'javascript': (list_javascript_dependencies, javascript_prompt),
+    'python': (list_python_dependencies, python_prompt),
+    'php': (list_php_dependencies, php_prompt),
+    'ruby': (list_ruby_dependencies, ruby_prompt),
+    'rust': (list_rust_dependencies, rust_prompt),
+    'erlang': (list_erlang_dependencies, erlang_prompt),
+    'c': (list_c_dependencies, c_prompt),
+}
+
+
+def start_parse_job(language, project_folder):
+    """
+    两阶段解析: 立即返回依赖列表和任务ID，描述在后台任务中逐批生成
+
+    客户端可以轮询 /parse/job/status/<task_id>?offset=N 获取新生成的描述，
+    或通过 /parse/job/stream/<task_id> 以 Server-Sent Events 接收。
+    """
+    list_func, prompt = PARSE_SOURCES[language]
+    dependencies = list_func(project_folder)
+
+    def enrich_descriptions(emit):
+        result = llm_communicate(dependencies, prompt, ecosystem=language, on_result=emit)
+        return {
+            "code": 200,
+            "message": "SUCCESS",
+            "obj": json.loads(result)
+        }
+
+    task_id = task_manager.create_progress_task(enrich_descriptions)
+
+    return jsonify({
+        "code": 202,
+        "message": "Dependencies parsed, descriptions are being generated",
+        "task_id": task_id,
+        "language": language,
+        "total": len(dependencies),
+        "dependencies": dependencies,
+        "status_url": f"/parse/job/status/{task_id}",
+        "result_url": f"/parse/job/result/{task_id}",
+        "stream_url": f"/parse/job/stream/{task_id}"
+    }), 202
+
+
+def run_parse_route(language, parser_func):
+    """单语言解析路由: mode=job 时走两阶段解析，否则同步返回完整结果"""
+    project_folder = urllib.parse.unquote(request.args.get("project_folder"))
+    if request.args.get("mode", "sync").lower() == "job":
+        return start_parse_job(language, project_folder)
+    return parser_func(project_folder)
+
+
 @app.route('/parse/pom_parse', methods=['GET'])
 def pom_parse():
-    # project_folder = request.args.get("project_folder")
-    project_folder = urllib.parse.unquote(request.args.get("project_folder"))
-    return process_projects(project_folder)
+    return run_parse_route('java', process_projects)
 
 # @app.route('/parse/c_parse',methods=['GET'])
 # def c_parse():
@@ -326,38 +520,123 @@ def pom_parse():
 
 @app.route('/parse/go_parse',methods=['GET'])
 def go_parse():
-    project_folder = urllib.parse.unquote(request.args.get("project_folder"))
-    return collect_go_dependencies(project_folder)
+    return run_parse_route('go', collect_go_dependencies)
 
 @app.route('/parse/javascript_parse',methods=['GET'])
 def javascript_parse():
-    project_folder = urllib.parse.unquote(request.args.get("project_folder"))
-    return collect_javascript_dependencies(project_folder)
+    return run_parse_route('javascript', collect_javascript_dependencies)
 
 @app.route('/parse/python_parse',methods=['GET'])
 def python_parse():
-    project_folder = urllib.parse.unquote(request.args.get("project_folder"))
-    return collect_python_dependencies(project_folder)
+    return run_parse_route('python', collect_python_dependencies)
 
 @app.route('/parse/php_parse',methods=['GET'])
 def php_parse():
-    project_folder = urllib.parse.unquote(request.args.get("project_folder"))
-    return collect_php_dependencies(project_folder)
+    return run_parse_route('php', collect_php_dependencies)
 
 @app.route('/parse/ruby_parse',methods=['GET'])
 def ruby_parse():
-    project_folder = urllib.parse.unquote(request.args.get("project_folder"))
-    return collect_ruby_dependencies(project_folder)
+    return run_parse_route('ruby', collect_ruby_dependencies)
 
 @app.route('/parse/rust_parse',methods=['GET'])
 def rust_parse():
-    project_folder = urllib.parse.unquote(request.args.get("project_folder"))
-    return collect_rust_dependencies(project_folder)
+    return run_parse_route('rust', collect_rust_dependencies)
 
 @app.route('/parse/erlang_parse',methods=['GET'])
 def erlang_parse():
-    project_folder = urllib.parse.unquote(request.args.get("project_folder"))
-    return collect_erlang_dependencies(project_folder)
+    return run_parse_route('erlang', collect_erlang_dependencies)
+
+
+@app.route('/parse/job/status/<task_id>', methods=['GET'])
+@cross_origin()
+def get_parse_job_status(task_id):
+    """获取解析任务状态，以及 offset 之后新生成的描述"""
+    task_status = task_manager.get_task_status(task_id)
+
+    if task_status['status'] == 'not_found':
+        return jsonify(task_status), 404
+
+    # 负数 offset 会从列表末尾切片，按 0 处理
+    offset = max(0, request.args.get("offset", 0, type=int))
+    records = task_manager.get_partial(task_id, offset)
+
+    return jsonify({
+        "code": 200,
+        "task_id": task_id,
+        "status": task_status['status'],
+        "created_at": task_status['created_at'],
+        "completed_at": task_status['completed_at'],
+        "error": task_status['error'],
+        "records": records,
+        "next_offset": offset + len(records)
+    }), 200
+
+
+@app.route('/parse/job/result/<task_id>', methods=['GET'])
+@cross_origin()
+def get_parse_job_result(task_id):
+    """获取解析任务的完整结果（按依赖顺序）"""
+    task_status = task_manager.get_task_status(task_id)
+
+    if task_status['status'] == 'not_found':
+        return jsonify({
+            "code": 404,
+            "message": f"Task {task_id} not found"
+        }), 404
+
+    if task_status['status'] == 'failed':
+        return jsonify({
+            "code": 500,
+            "message": "Parse job failed",
+            "task_id": task_id,
+            "error": task_status['error']
+        }), 500
+
+    if task_status['status'] != 'completed':
+        return jsonify({
+            "code": 202,
+            "message": f"Task still {task_status['status']}, please check status endpoint",
+            "task_id": task_id,
+            "status": task_status['status'],
+            "status_url": f"/parse/job/status/{task_id}"
+        }), 202
+
+    # 复制一份再补充字段，不修改任务管理器中保存的结果
+    result = dict(task_status['result'])
+    result['task_id'] = task_id
+    result['completed_at'] = task_status['completed_at']
+    return jsonify(result), 200
+
+
+@app.route('/parse/job/stream/<task_id>', methods=['GET'])
+@cross_origin()
+def stream_parse_job(task_id):
+    """以 Server-Sent Events 推送新生成的依赖描述，任务结束时发送 done 事件"""
+    if task_manager.get_task_status(task_id)['status'] == 'not_found':
+        return jsonify({
+            "code": 404,
+            "message": f"Task {task_id} not found"
+        }), 404
+
+    # 负数 offset 会从列表末尾切片，按 0 处理
+    offset = max(0, request.args.get("offset", 0, type=int))
+
+    def generate():
+        cursor = offset
+        while True:
+            records, status = task_manager.wait_for_partial(task_id, cursor, timeout=15)
+            for record in records:
+                yield f"data: {json.dumps(record, ensure_ascii=False)}\n\n"
+            cursor += len(records)
+            if status in ('completed', 'failed') and not task_manager.get_partial(task_id, cursor):
+                yield f"event: done\ndata: {json.dumps({'status': status, 'count': cursor})}\n\n"
+                return
+            if not records:
+                # 心跳，客户端断开时写入失败，生成器随之结束
+                yield ": keep-alive\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/parse/get_primary_language', methods=['GET'])
 @cross_origin()
@@ -569,6 +848,190 @@ def detect_languages():
         }), 500
 
 
+def parse_language_dependencies(language, parser_func, project_folder, package_manager, project_id=None, index=None):
+    """
+    解析单个语言的依赖（供 unified_parse 在线程池中调用）
+
+    Returns:
+        (依赖列表, 该语言的解析状态 {status, count, elapsed[, error]})
+    """
+    start = time.time()
+    try:
+        print(f"[统一解析] 正在解析 {language}...")
+
+        # 调用解析函数（共享项目索引，不再各自遍历目录；返回 Dependency 记录，不经过 JSON 字符串往返）
+        result = parser_func(project_folder, index=index, as_records=True)
+
+        # 解析结果可能是记录列表、JSON字符串、jsonify返回值或字典/列表
+        if isinstance(result, str):
+            # 如果是JSON字符串，先解析
+            try:
+                deps_data = json.loads(result)
+            except json.JSONDecodeError:
+                deps_data = result
+        elif hasattr(result, 'get_json'):
+            # 如果是Flask Response对象
+            deps_data = result.get_json()
+        else:
+            # 否则直接使用
+            deps_data = result
+
+        # 提取依赖列表
+        if isinstance(deps_data, dict):
+            deps_list = deps_data.get('obj', deps_data.get('data', []))
+        elif isinstance(deps_data, list):
+            deps_list = deps_data
+        else:
+            deps_list = []
+
+        # 为每个依赖添加语言和包管理器标签
+        for dep in deps_list:
+            if isinstance(dep, Dependency):
+                dep.tag(language, package_manager, project_id)
+            elif isinstance(dep, dict):
+                dep['language'] = language
+                dep['package_manager'] = package_manager
+                if project_id:
+                    dep['project_id'] = project_id
+
+        elapsed = round(time.time() - start, 3)
+        print(f"[统一解析] ✓ {language}: 找到 {len(deps_list)} 个依赖 ({elapsed}s)")
+        return deps_list, {
+            'status': 'success',
+            'count': len(deps_list),
+            'elapsed': elapsed
+        }
+
+    except Exception as e:
+        elapsed = round(time.time() - start, 3)
+        print(f"[统一解析] ✗ {language}: 解析失败 - {str(e)}")
+        return [], {
+            'status': 'failed',
+            'count': 0,
+            'elapsed': elapsed,
+            'error': str(e)
+        }
+
+
+def _unified_parse_project(project_folder, project_id=None, project_path=None, extra_summary=None,
+                           use_manifest_cache=True):
+    """
+    对一个本地目录执行统一解析，返回 (响应, 状态码)
+
+    /parse/unified_parse 直接解析项目目录；/parse/archive_parse 解析压缩包中提取出的清单目录，
+    此时 project_path 是压缩包名称，extra_summary 附加压缩包统计信息；临时目录的路径每次都不同，
+    不使用清单解析结果缓存（use_manifest_cache=False）。
+    """
+    started = time.time()
+    print(f"[统一解析] 开始解析项目: {project_folder}")
+    print(f"[统一解析] 项目ID: {project_id}")
+
+    # 步骤1: 一次遍历建立项目文件索引，语言检测和所有解析器共享
+    from parase.project_detector import ProjectDetector
+    from parase.project_index import ProjectIndex
+    index = ProjectIndex(project_folder, use_manifest_cache=use_manifest_cache)
+    print(f"[统一解析] 项目索引: {index.get_stats()}")
+    detector = ProjectDetector(project_folder, index=index)
+    detected_languages = detector.detect()
+
+    if not detected_languages:
+        summary = {
+            "project_path": project_path or project_folder,
+            "project_id": project_id,
+            "detected_languages": [],
+            "primary_language": None,
+            "total_dependencies": 0,
+            "parse_results": {}
+        }
+        if extra_summary:
+            summary.update(extra_summary)
+        return jsonify({
+            "code": 200,
+            "message": "No programming languages detected",
+            "summary": summary,
+            "dependencies": []
+        }), 200
+
+    print(f"[统一解析] 检测到语言: {list(detected_languages.keys())}")
+
+    # 步骤2: 根据检测到的语言调用相应的解析函数
+    all_dependencies = []
+    parse_results = {}
+
+    # 语言到解析函数的映射
+    language_parsers = {
+        'java': process_projects,
+        'go': collect_go_dependencies,
+        'javascript': collect_javascript_dependencies,
+        'python': collect_python_dependencies,
+        'php': collect_php_dependencies,
+        'ruby': collect_ruby_dependencies,
+        'rust': collect_rust_dependencies,
+        'erlang': collect_erlang_dependencies,
+        'c': collect_dependencies
+    }
+
+    # 各语言的解析和 LLM 描述生成互相独立，放到有界线程池中并发执行，
+    # 多语言项目的耗时取决于最慢的语言而不是所有语言之和
+    languages = detector.get_languages_by_priority()
+    runnable = [language for language in languages if language in language_parsers]
+    max_workers = max(1, min(len(runnable), int(os.getenv("UNIFIED_PARSE_WORKERS", 4))))
+    outcomes = {}
+    if runnable:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="unified-parse") as executor:
+            futures = {
+                language: executor.submit(
+                    parse_language_dependencies, language, language_parsers[language], project_folder,
+                    detector.get_package_manager(language), project_id, index
+                )
+                for language in runnable
+            }
+            outcomes = {language: future.result() for language, future in futures.items()}
+
+    # 按语言优先级合并，结果顺序与串行解析一致
+    for language in languages:
+        if language not in outcomes:
+            print(f"[统一解析] 跳过: {language} (无可用的解析器)")
+            parse_results[language] = {
+                'status': 'skipped',
+                'count': 0,
+                'error': 'No parser available for this language'
+            }
+            continue
+        deps_list, parse_results[language] = outcomes[language]
+        all_dependencies.extend(deps_list)
+
+    print(f"[统一解析] 完成: 共找到 {len(all_dependencies)} 个依赖")
+    # 只在生成 HTTP 响应时转换成字典
+    all_dependencies = to_dicts(all_dependencies)
+
+    # 步骤3: 构造返回结果
+    summary = {
+        "project_path": project_path or project_folder,
+        "project_id": project_id,
+        "detected_languages": list(detected_languages.keys()),
+        "primary_language": detector.get_primary_language(),
+        "total_dependencies": len(all_dependencies),
+        "parse_results": parse_results,
+        "elapsed": round(time.time() - started, 3),
+        "timestamp": datetime.now().isoformat()
+    }
+    if extra_summary:
+        summary.update(extra_summary)
+
+    return jsonify({
+        "code": 200,
+        "message": "SUCCESS",
+        "summary": summary,
+        "dependencies": all_dependencies,
+        "obj": {
+            "summary": summary,
+            "dependencies": all_dependencies,
+            "total_dependencies": len(all_dependencies)
+        }
+    }), 200
+
+
 @app.route('/parse/unified_parse', methods=['GET'])
 @cross_origin()
 def unified_parse():
@@ -590,9 +1053,10 @@ def unified_parse():
                 "primary_language": "java",
                 "total_dependencies": 206,
                 "parse_results": {
-                    "java": {"status": "success", "count": 25},
-                    "go": {"status": "success", "count": 181}
-                }
+                    "java": {"status": "success", "count": 25, "elapsed": 12.4},
+                    "go": {"status": "success", "count": 181, "elapsed": 30.1}
+                },
+                "elapsed": 30.2
             },
             "dependencies": [
                 {
@@ -627,151 +1091,108 @@ def unified_parse():
                 "dependencies": []
             }), 400
 
-        print(f"[统一解析] 开始解析项目: {project_folder}")
-        print(f"[统一解析] 项目ID: {project_id}")
+        return _unified_parse_project(project_folder, project_id)
 
-        # 步骤1: 创建ProjectDetector进行语言检测
-        from parase.project_detector import ProjectDetector
-        detector = ProjectDetector(project_folder)
-        detected_languages = detector.detect()
+    except Exception as e:
+        print(f"[统一解析] 错误: {str(e)}")
+        import traceback
+        traceback.print_exc()
 
-        if not detected_languages:
-            return jsonify({
-                "code": 200,
-                "message": "No programming languages detected",
-                "summary": {
-                    "project_path": project_folder,
-                    "project_id": project_id,
-                    "detected_languages": [],
-                    "primary_language": None,
-                    "total_dependencies": 0,
-                    "parse_results": {}
-                },
-                "dependencies": []
-            }), 200
+        return jsonify({
+            "code": 500,
+            "message": f"Error during unified parsing: {str(e)}",
+            "summary": None,
+            "dependencies": [],
+            "error": str(e)
+        }), 500
 
-        print(f"[统一解析] 检测到语言: {list(detected_languages.keys())}")
-
-        # 步骤2: 根据检测到的语言调用相应的解析函数
-        all_dependencies = []
-        parse_results = {}
-
-        # 语言到解析函数的映射
-        language_parsers = {
-            'java': process_projects,
-            'go': collect_go_dependencies,
-            'javascript': collect_javascript_dependencies,
-            'python': collect_python_dependencies,
-            'php': collect_php_dependencies,
-            'ruby': collect_ruby_dependencies,
-            'rust': collect_rust_dependencies,
-            'erlang': collect_erlang_dependencies,
-            'c': collect_dependencies
-        }
+@app.route('/parse/archive_parse', methods=['POST'])
+@cross_origin()
+def archive_parse():
+    """
+    直接解析压缩包（zip / jar / tar / tar.gz / tar.bz2 / tar.xz），不解压整个仓库
 
-        # 按优先级遍历检测到的语言
-        for language in detector.get_languages_by_priority():
-            if language not in language_parsers:
-                print(f"[统一解析] 跳过: {language} (无可用的解析器)")
-                parse_results[language] = {
-                    'status': 'skipped',
-                    'count': 0,
-                    'error': 'No parser available for this language'
-                }
-                continue
+    只解压压缩包中的清单文件到临时目录，然后按 /parse/unified_parse 的流程解析，返回结构相同。
 
-            try:
-                print(f"[统一解析] 正在解析 {language}...")
-                parser_func = language_parsers[language]
-
-                # 调用解析函数
-                result = parser_func(project_folder)
-
-                # 解析结果可能是JSON字符串、jsonify返回值或字典/列表
-                deps_list = []
-
-                if isinstance(result, str):
-                    # 如果是JSON字符串，先解析
-                    try:
-                        deps_data = json.loads(result)
-                    except json.JSONDecodeError:
-                        deps_data = result
-                elif hasattr(result, 'get_json'):
-                    # 如果是Flask Response对象
-                    deps_data = result.get_json()
-                else:
-                    # 否则直接使用
-                    deps_data = result
-
-                # 提取依赖列表
-                if isinstance(deps_data, dict):
-                    deps_list = deps_data.get('obj', deps_data.get('data', []))
-                elif isinstance(deps_data, list):
-                    deps_list = deps_data
-                else:
-                    deps_list = []
-
-                # 为每个依赖添加语言和包管理器标签
-                package_manager = detector.get_package_manager(language)
-                for dep in deps_list:
-                    if isinstance(dep, dict):
-                        dep['language'] = language
-                        dep['package_manager'] = package_manager
-                        if project_id:
-                            dep['project_id'] = project_id
-
-                all_dependencies.extend(deps_list)
-                parse_results[language] = {
-                    'status': 'success',
-                    'count': len(deps_list)
-                }
-                print(f"[统一解析] ✓ {language}: 找到 {len(deps_list)} 个依赖")
-
-            except Exception as e:
-                print(f"[统一解析] ✗ {language}: 解析失败 - {str(e)}")
-                parse_results[language] = {
-                    'status': 'failed',
-                    'count': 0,
-                    'error': str(e)
-                }
+    Parameters（任选一种提供压缩包）:
+        archive_path: 服务器上已有的压缩包路径（表单或查询参数）
+        file: multipart 上传的压缩包
+        请求体: 直接以请求体上传压缩包（Content-Type: application/octet-stream），
+                tar 格式边接收边解析；zip 需要读取中央目录，会先写入临时文件
+        project_id: 项目在数据库中的ID (可选)
+    """
+    import tempfile
+    from parase.archive_fs import ArchiveError, ArchiveProject
 
-        print(f"[统一解析] 完成: 共找到 {len(all_dependencies)} 个依赖")
+    spooled = None
+    try:
+        project_id = request.values.get("project_id", type=int)
+        archive_path = request.values.get("archive_path")
+        upload = request.files.get("file")
+
+        if archive_path:
+            archive_path = urllib.parse.unquote(archive_path)
+            if not os.path.isfile(archive_path):
+                return jsonify({
+                    "code": 400,
+                    "message": f"Archive does not exist: {archive_path}",
+                    "summary": None,
+                    "dependencies": []
+                }), 400
+            source, name = archive_path, archive_path
+        elif upload is not None:
+            source, name = upload.stream, upload.filename or "upload"
+        elif request.content_length or request.headers.get("Transfer-Encoding") == "chunked":
+            name = request.args.get("filename", "upload")
+            if name.lower().endswith((".zip", ".jar")) or request.mimetype in ("application/zip", "application/java-archive"):
+                spooled = tempfile.TemporaryFile()
+                stream = request.stream
+                while True:
+                    chunk = stream.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    spooled.write(chunk)
+                spooled.seek(0)
+                source = spooled
+            else:
+                source = request.stream
+        else:
+            return jsonify({
+                "code": 400,
+                "message": "Missing archive: provide 'archive_path', a 'file' upload or the archive as request body",
+                "summary": None,
+                "dependencies": []
+            }), 400
 
-        # 步骤3: 构造返回结果
-        summary = {
-            "project_path": project_folder,
-            "project_id": project_id,
-            "detected_languages": list(detected_languages.keys()),
-            "primary_language": detector.get_primary_language(),
-            "total_dependencies": len(all_dependencies),
-            "parse_results": parse_results,
-            "timestamp": datetime.now().isoformat()
-        }
+        with ArchiveProject(source, name=name) as project:
+            stats = project.get_stats()
+            print(f"[压缩包解析] {name}: {stats}")
+            return _unified_parse_project(project.root, project_id, project_path=name,
+                                          extra_summary={"archive": stats}, use_manifest_cache=False)
 
+    except ArchiveError as e:
+        print(f"[压缩包解析] 无法读取压缩包: {str(e)}")
         return jsonify({
-            "code": 200,
-            "message": "SUCCESS",
-            "summary": summary,
-            "dependencies": all_dependencies,
-            "obj": {
-                "summary": summary,
-                "dependencies": all_dependencies,
-                "total_dependencies": len(all_dependencies)
-            }
-        }), 200
-
+            "code": 400,
+            "message": f"Invalid archive: {str(e)}",
+            "summary": None,
+            "dependencies": []
+        }), 400
     except Exception as e:
-        print(f"[统一解析] 错误: {str(e)}")
+        print(f"[压缩包解析] 错误: {str(e)}")
         import traceback
         traceback.print_exc()
 
         return jsonify({
             "code": 500,
-            "message": f"Error during unified parsing: {str(e)}",
+            "message": f"Error during archive parsing: {str(e)}",
             "summary": None,
             "dependencies": [],
             "error": str(e)
         }), 500
+    finally:
+        if spooled is not None:
+            spooled.close()
 
 @app.route('/vulnerabilities/detect', methods=['POST'])
 def detect_vulnerabilities():
@@ -782,6 +1203,8 @@ def detect_vulnerabilities():
         params = {}
 
     # print(params)
+    # pandas / scikit-learn / Levenshtein 检索栈只在这个接口用到，首次调用时再加载
+    from VulLibGen.getLabels import getLabels
     data = getLabels(params=params)
     try:
         print("data=")
@@ -790,6 +1213,25 @@ def detect_vulnerabilities():
         print("data with unicode encoding issues")
     return jsonify(data)
 
+@app.route('/metrics', methods=['GET'])
+@cross_origin()
+def get_metrics():
+    """服务运行指标（当前 worker 进程）"""
+    return jsonify({
+        "code": 200,
+        "message": "SUCCESS",
+        "obj": {
+            "description_cache": get_cache_stats(),
+            "llm_batching": get_batch_controller().get_stats(),
+            "manifest_cache": get_manifest_cache_stats(),
+            "parse_pool": get_parse_pool_stats(),
+            "llm_response_cache": get_response_cache_stats(),
+            "llm_calls": get_llm_metrics().get_stats(),
+            "llm_scheduler": get_scheduler_stats(),
+            "llm_hedging": _model_clients["fastest"].get_stats() if "fastest" in _model_clients else {"enabled": False}
+        }
+    }), 200
+
 @app.route('/vulnerabilities/test', methods=['POST', 'GET'])
 def test():
     return jsonify({
@@ -4,7 +4,7 @@
 import threading
 import uuid
 from datetime import datetime
-from typing import Dict, Callable, Any
+from typing import Dict, Callable, Any, List, Tuple
 
 class AsyncTaskManager:
     """管理异步任务的类"""
@@ -12,6 +12,8 @@ class AsyncTaskManager:
     def __init__(self):
         self.tasks: Dict[str, Dict[str, Any]] = {}
         self.lock = threading.Lock()
+        # 任务产生部分结果或结束时通知等待者（用于流式输出）
+        self.updated = threading.Condition(self.lock)
 
     def create_task(self, func: Callable, *args, **kwargs) -> str:
         """
@@ -25,6 +27,43 @@ class AsyncTaskManager:
         Returns:
             task_id: 任务 ID
         """
+        return self._start_task(func, args, kwargs, with_emit=False)
+
+    def create_progress_task(self, func: Callable, *args, **kwargs) -> str:
+        """
+        创建一个可以逐步产出部分结果的异步任务
+
+        func 的第一个参数是 emit(items)，每次调用都会把 items 追加到任务的
+        partial 列表中，客户端可以通过 get_partial / wait_for_partial 在任务
+        完成前读取已经产出的结果。
+
+        Returns:
+            task_id: 任务 ID
+        """
+        return self._start_task(func, args, kwargs, with_emit=True)
+
+    def create_completed_task(self, result: Any) -> str:
+        """
+        登记一个已经完成的任务（例如结果直接来自缓存），
+        客户端仍可以用返回的 task_id 走状态/结果查询流程
+
+        Returns:
+            task_id: 任务 ID
+        """
+        task_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with self.lock:
+            self.tasks[task_id] = {
+                'status': 'completed',
+                'result': result,
+                'error': None,
+                'created_at': now,
+                'completed_at': now,
+                'partial': [],
+            }
+        return task_id
+
+    def _start_task(self, func: Callable, args, kwargs, with_emit: bool) -> str:
         task_id = str(uuid.uuid4())
 
         with self.lock:
@@ -33,26 +72,37 @@ class AsyncTaskManager:
                 'result': None,
                 'error': None,
                 'created_at': datetime.now().isoformat(),
-                'completed_at': None
+                'completed_at': None,
+                'partial': [],
             }
 
+        def emit(items: List[Any]):
+            with self.updated:
+                self.tasks[task_id]['partial'].extend(items)
+                self.updated.notify_all()
+
         # 在后台线程中执行任务
         def run_task():
             try:
                 with self.lock:
                     self.tasks[task_id]['status'] = 'running'
 
-                result = func(*args, **kwargs)
+                if with_emit:
+                    result = func(emit, *args, **kwargs)
+                else:
+                    result = func(*args, **kwargs)
 
-                with self.lock:
+                with self.updated:
                     self.tasks[task_id]['status'] = 'completed'
                     self.tasks[task_id]['result'] = result
                     self.tasks[task_id]['completed_at'] = datetime.now().isoformat()
+                    self.updated.notify_all()
             except Exception as e:
-                with self.lock:
+                with self.updated:
                     self.tasks[task_id]['status'] = 'failed'
                     self.tasks[task_id]['error'] = str(e)
                     self.tasks[task_id]['completed_at'] = datetime.now().isoformat()
+                    self.updated.notify_all()
 
         thread = threading.Thread(target=run_task, daemon=True)
         thread.start()
@@ -75,7 +125,42 @@ class AsyncTaskManager:
                     'status': 'not_found',
                     'error': f'Task {task_id} not found'
                 }
-            return self.tasks[task_id].copy()
+            task = self.tasks[task_id].copy()
+            task['partial_count'] = len(task.pop('partial'))
+            return task
+
+    def get_partial(self, task_id: str, offset: int = 0) -> List[Any]:
+        """
+        获取任务从 offset 开始的部分结果
+
+        Args:
+            task_id: 任务 ID
+            offset: 已读取的条目数
+
+        Returns:
+            新产出的结果列表
+        """
+        with self.lock:
+            if task_id not in self.tasks:
+                raise ValueError(f'Task {task_id} not found')
+            return list(self.tasks[task_id]['partial'][offset:])
+
+    def wait_for_partial(self, task_id: str, offset: int = 0, timeout: float = 15.0) -> Tuple[List[Any], str]:
+        """
+        阻塞等待新的部分结果或任务结束
+
+        Returns:
+            (新产出的结果列表, 任务状态)
+        """
+        with self.updated:
+            if task_id not in self.tasks:
+                raise ValueError(f'Task {task_id} not found')
+            task = self.tasks[task_id]
+            self.updated.wait_for(
+                lambda: len(task['partial']) > offset or task['status'] in ('completed', 'failed'),
+                timeout=timeout
+            )
+            return list(task['partial'][offset:]), task['status']
 
     def get_result(self, task_id: str) -> Any:
         """
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+依赖结果内存对比：JSON 字符串往返的字典 vs Dependency 记录
+
+模拟 unified_parse 收集 N 个依赖（默认 50000）的过程：
+  dicts    llm_communicate 返回 json.dumps 字符串，unified_parse json.loads 后给每个字典补字段
+  records  llm_communicate 返回 Dependency 记录，unified_parse 调用 tag()
+分别统计构建过程的峰值内存、构建完成后常驻的内存和耗时，以及最终转换成响应字典的耗时：
+
+    python bench_dependency_records.py
+    python bench_dependency_records.py --count 200000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parase.dependency_record import make_dependency, to_dicts
+
+
+def llm_items(count):
+    """llm_communicate 内部合并后的结果（两种方式相同，不计入对比）"""
+    return [{"name": f"org.example.group{i % 300}:artifact-{i}:1.{i % 10}.{i % 7}",
+             "description": f"Provides feature {i} for enterprise applications. " * 3}
+            for i in range(count)]
+
+
+def build_dicts(items):
+    payload = json.dumps(items, indent=2)
+    deps = json.loads(payload)
+    for dep in deps:
+        dep['language'] = 'java'
+        dep['package_manager'] = 'maven'
+        dep['project_id'] = 42
+    return deps
+
+
+def build_records(items):
+    deps = [make_dependency(item.get('name', ''), item.get('description', '')) for item in items]
+    for dep in deps:
+        dep.tag('java', 'maven', 42)
+    return deps
+
+
+def measure(build, items):
+    """返回 (耗时秒, 峰值字节, 常驻字节, 结果)"""
+    gc.collect()
+    start = time.perf_counter()
+    build(items)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    result = build(items)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, retained, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="依赖结果内存对比")
+    parser.add_argument("--count", type=int, default=50000, help="依赖数量（默认 50000）")
+    args = parser.parse_args()
+
+    items = llm_items(args.count)
+    print(f"{args.count} 个依赖")
+    print(f"  {'方式':<10}{'构建耗时(s)':>14}{'峰值内存(MB)':>16}{'常驻内存(MB)':>16}")
+    results = {}
+    for name, build in (("dicts", build_dicts), ("records", build_records)):
+        elapsed, peak, retained, results[name] = measure(build, items)
+        print(f"  {name:<10}{elapsed:>14.3f}{peak / 1024 / 1024:>16.1f}{retained / 1024 / 1024:>16.1f}")
+
+    start = time.perf_counter()
+    response = to_dicts(results["records"])
+    print(f"\n响应边界转换 to_dicts: {time.perf_counter() - start:.3f}s，"
+          f"与字典方式结果一致: {'yes' if response == results['dicts'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+JSON lock 文件解析性能对比
+
+生成合成的 package-lock.json（v3）、composer.lock 和 Pipfile.lock，
+对比整体 json.load 与流式读取（parase/json_stream.py）的耗时、峰值内存和依赖数：
+
+    python bench_json_lock.py
+    python bench_json_lock.py --entries 300000 --runs 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parase.javascript_parse import parse_package_lock_json
+from parase.php_parse import parse_composer_lock
+from parase.python_parse import parse_pipfile_lock
+
+
+def package_entry(i):
+    return {
+        "version": f"1.{i % 10}.{i % 7}",
+        "resolved": f"https://registry.npmjs.org/pkg-{i}/-/pkg-{i}-1.0.0.tgz",
+        "integrity": f"sha512-{i:064x}",
+        "dev": i % 5 == 0,
+        "dependencies": {f"pkg-{i + k}": "^1.0.0" for k in range(1, 4)},
+        "engines": {"node": ">=14"},
+    }
+
+
+def write_package_lock(path, entries):
+    packages = {"": {"name": "app", "version": "1.0.0", "dependencies": {"pkg-0": "^1.0.0"}}}
+    for i in range(entries):
+        prefix = f"node_modules/pkg-{i // 10}/" if i % 10 == 9 else ""
+        packages[f"{prefix}node_modules/pkg-{i}"] = package_entry(i)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"name": "app", "version": "1.0.0", "lockfileVersion": 3, "requires": True,
+                   "packages": packages}, f, indent=2)
+
+
+def write_composer_lock(path, entries):
+    def package(i):
+        return {"name": f"vendor{i % 50}/pkg-{i}", "version": f"v1.{i % 10}.{i % 7}",
+                "source": {"type": "git", "url": f"https://github.com/vendor/pkg-{i}.git", "reference": f"{i:040x}"},
+                "require": {"php": ">=8.1", f"vendor/pkg-{i + 1}": "^1.0"},
+                "autoload": {"psr-4": {f"Vendor\\Pkg{i}\\": "src/"}},
+                "description": "Synthetic package used for benchmarking " * 3}
+    half = entries // 2
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"_readme": ["This file locks the dependencies of your project"],
+                   "content-hash": "0" * 32,
+                   "packages": [package(i) for i in range(half)],
+                   "packages-dev": [package(i) for i in range(half, entries)],
+                   "aliases": [], "minimum-stability": "stable"}, f, indent=4)
+
+
+def write_pipfile_lock(path, entries):
+    def section(start, end):
+        return {f"pkg-{i}": {"hashes": [f"sha256:{i:064x}", f"sha256:{i + 1:064x}"],
+                             "markers": "python_version >= '3.8'",
+                             "version": f"==1.{i % 10}.{i % 7}"} for i in range(start, end)}
+    half = entries // 2
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"_meta": {"hash": {"sha256": "0" * 64}, "pipfile-spec": 6,
+                             "requires": {"python_version": "3.11"}, "sources": []},
+                   "default": section(0, half), "develop": section(half, entries)}, f, indent=4)
+
+
+def measure(parse, path, runs):
+    """返回 (最短耗时秒, 峰值内存字节, 依赖数)"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = parse(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    result = parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON lock 文件解析性能对比")
+    parser.add_argument("--entries", type=int, default=200000, help="每个合成 lock 文件的条目数（默认 200000）")
+    parser.add_argument("--runs", type=int, default=3, help="计时重复次数，取最小值（默认 3）")
+    args = parser.parse_args()
+
+    import parase.json_stream as json_stream
+
+    cases = (
+        ("package-lock.json", write_package_lock, parse_package_lock_json),
+        ("composer.lock", write_composer_lock, parse_composer_lock),
+        ("Pipfile.lock", write_pipfile_lock, parse_pipfile_lock),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, writer, parse in cases:
+            path = os.path.join(tmp, label)
+            writer(path, args.entries)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"\n{label}: {args.entries} 个条目, {size_mb:.1f} MB")
+            print(f"  {'读取方式':<10}{'耗时(s)':>10}{'吞吐(MB/s)':>14}{'峰值内存(MB)':>16}{'依赖数':>10}")
+            # 调整快速路径阈值，分别强制整体加载和流式读取
+            for name, threshold in (("json.load", float('inf')), ("streaming", 0)):
+                json_stream.STREAM_MIN_BYTES = threshold
+                elapsed, peak, count = measure(parse, path, args.runs)
+                print(f"  {name:<10}{elapsed:>10.3f}{size_mb / elapsed:>14.1f}{peak / 1024 / 1024:>16.1f}{count:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+pnpm-lock.yaml 解析性能对比
+
+生成与真实 lockfile 结构一致的合成文件（v5.4、v6.0、v9.0），对比：
+  yaml.safe_load   旧实现使用的纯 Python 加载器
+  CSafeLoader      libyaml C 加载器（行解析失败时的后备路径）
+  line extractor   当前按行提取实现
+并检查行提取与 YAML 加载得到的依赖集合一致：
+
+    python bench_pnpm_lock.py
+    python bench_pnpm_lock.py --entries 50000 --runs 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parase.javascript_parse import _parse_pnpm_lock_data, parse_pnpm_lock_yaml
+
+
+def package_name(i):
+    return f"@scope{i % 37}/pkg-{i}" if i % 4 == 0 else f"pkg-{i}"
+
+
+def quoted(key):
+    return f"'{key}'" if key.startswith('@') else key
+
+
+def entry_body(i, indent):
+    pad = ' ' * indent
+    lines = [f"{pad}resolution: {{integrity: sha512-{i:086x}==}}"]
+    if i % 3 == 0:
+        lines.append(f"{pad}engines: {{node: '>=14.0.0'}}")
+    if i % 2 == 0:
+        lines.append(f"{pad}dependencies:")
+        for k in range(1, 4):
+            lines.append(f"{pad}  {quoted(package_name(i + k))}: 1.{(i + k) % 10}.0")
+    if i % 7 == 0:
+        lines.append(f"{pad}peerDependencies:")
+        lines.append(f"{pad}  react: '>=16'")
+    lines.append(f"{pad}dev: {'true' if i % 5 == 0 else 'false'}")
+    return "\n".join(lines)
+
+
+def write_v5(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("lockfileVersion: 5.4\n\nspecifiers:\n  pkg-1: ^1.0.0\n\ndependencies:\n  pkg-1: 1.1.0\n\npackages:\n\n")
+        for i in range(entries):
+            peer = "_react@18.2.0" if i % 7 == 0 else ""
+            f.write(f"  /{package_name(i)}/1.{i % 10}.{i % 9}{peer}:\n{entry_body(i, 4)}\n\n")
+
+
+def write_v6(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("lockfileVersion: '6.0'\n\nsettings:\n  autoInstallPeers: true\n  excludeLinksFromLockfile: false\n\n"
+                "dependencies:\n  pkg-1:\n    specifier: ^1.0.0\n    version: 1.1.0\n\npackages:\n\n")
+        for i in range(entries):
+            peer = "(react@18.2.0)" if i % 7 == 0 else ""
+            f.write(f"  /{package_name(i)}@1.{i % 10}.{i % 9}{peer}:\n{entry_body(i, 4)}\n\n")
+
+
+def write_v9(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("lockfileVersion: '9.0'\n\nsettings:\n  autoInstallPeers: true\n  excludeLinksFromLockfile: false\n\n"
+                "importers:\n\n  .:\n    dependencies:\n      pkg-1:\n        specifier: ^1.0.0\n        version: 1.1.0\n\n"
+                "packages:\n\n")
+        for i in range(entries):
+            f.write(f"  {quoted(f'{package_name(i)}@1.{i % 10}.{i % 9}')}:\n"
+                    f"    resolution: {{integrity: sha512-{i:086x}==}}\n\n")
+        f.write("snapshots:\n\n")
+        for i in range(entries):
+            peer = "(react@18.2.0)" if i % 7 == 0 else ""
+            key = quoted(f"{package_name(i)}@1.{i % 10}.{i % 9}{peer}")
+            if i % 2:
+                f.write(f"  {key}: {{}}\n\n")
+            else:
+                f.write(f"  {key}:\n    dependencies:\n")
+                for k in range(1, 4):
+                    f.write(f"      {quoted(package_name(i + k))}: 1.{(i + k) % 10}.0\n")
+                f.write("\n")
+
+
+def load_with(loader):
+    def parse(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return _parse_pnpm_lock_data(yaml.load(f, Loader=loader))
+    return parse
+
+
+def timed(parse, path, runs):
+    best, result = None, None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = parse(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, set(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pnpm-lock.yaml 解析性能对比")
+    parser.add_argument("--entries", type=int, default=20000, help="每个合成 lockfile 的包数量（默认 20000）")
+    parser.add_argument("--runs", type=int, default=3, help="计时重复次数，取最小值（默认 3）")
+    parser.add_argument("--skip-pure", action="store_true", help="跳过很慢的纯 Python yaml.safe_load")
+    args = parser.parse_args()
+
+    implementations = [("line extractor", parse_pnpm_lock_yaml)]
+    if hasattr(yaml, 'CSafeLoader'):
+        implementations.append(("CSafeLoader", load_with(yaml.CSafeLoader)))
+    if not args.skip_pure:
+        implementations.append(("yaml.safe_load", load_with(yaml.SafeLoader)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, writer in (("v5.4", write_v5), ("v6.0", write_v6), ("v9.0", write_v9)):
+            path = os.path.join(tmp, f"pnpm-lock-{label}.yaml")
+            writer(path, args.entries)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"\nlockfileVersion {label}: {args.entries} 个包, {size_mb:.1f} MB")
+            print(f"  {'实现':<16}{'耗时(s)':>10}{'吞吐(MB/s)':>14}{'依赖数':>10}{'与行提取一致':>14}")
+            expected = None
+            for name, parse in implementations:
+                runs = 1 if name == "yaml.safe_load" else args.runs
+                elapsed, result = timed(parse, path, runs)
+                expected = result if expected is None else expected
+                print(f"  {name:<16}{elapsed:>10.3f}{size_mb / elapsed:>14.1f}{len(result):>10}"
+                      f"{'yes' if result == expected else 'NO':>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+yarn.lock 解析性能对比
+
+生成 classic v1 和 Berry 两种格式的合成 lockfile（默认各 100k 个条目），
+对比旧版 readlines() 实现与当前流式实现的耗时、峰值内存和解析出的依赖数：
+
+    python bench_yarn_lock.py
+    python bench_yarn_lock.py --entries 200000 --runs 5
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parase.javascript_parse import parse_yarn_lock
+
+
+def legacy_parse_yarn_lock(yarn_lock_path):
+    """优化前的实现（readlines + 每行多次 strip + 每个版本行 re.search），仅用于对比"""
+    dependencies = {}
+    with open(yarn_lock_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    current_package = None
+    for i, line in enumerate(lines):
+        if line.strip().startswith('"') and line.strip().endswith(':'):
+            for pkg_decl in line.strip().rstrip(':').split(','):
+                pkg_decl = pkg_decl.strip().strip('"')
+                if pkg_decl.startswith('@'):
+                    parts = pkg_decl.split('@')
+                    if len(parts) >= 3:
+                        current_package = '@' + parts[1]
+                else:
+                    at_pos = pkg_decl.find('@')
+                    if at_pos > 0:
+                        current_package = pkg_decl[:at_pos]
+        elif current_package and line.strip().startswith('version '):
+            version_match = re.search(r'version\s+"([^"]+)"', line)
+            if version_match:
+                dependencies[current_package] = version_match.group(1)
+                current_package = None
+    return [f"{pkg} {ver}" for pkg, ver in dependencies.items()]
+
+
+def package_name(i):
+    # 约三分之一为 scoped 包
+    return f"@scope{i % 97}/pkg-{i}" if i % 3 == 0 else f"pkg-{i}"
+
+
+def write_classic(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# THIS IS AN AUTOGENERATED FILE. DO NOT EDIT THIS FILE DIRECTLY.\n# yarn lockfile v1\n\n\n")
+        for i in range(entries):
+            name = package_name(i)
+            # 一半条目使用不带引号的声明行，四分之一为多描述符声明行
+            if i % 4 == 0:
+                header = f'"{name}@^1.{i % 10}.0", "{name}@~1.{i % 10}.1":'
+            elif name.startswith('@'):
+                header = f'"{name}@^1.{i % 10}.0":'
+            else:
+                header = f'{name}@^1.{i % 10}.0:'
+            f.write(f'{header}\n'
+                    f'  version "1.{i % 10}.{i % 7}"\n'
+                    f'  resolved "https://registry.yarnpkg.com/{name}/-/{name.split("/")[-1]}-1.0.0.tgz#{i:040x}"\n'
+                    f'  integrity sha512-{i:064x}\n'
+                    f'  dependencies:\n'
+                    f'    {package_name(i + 1)} "^1.0.0"\n\n')
+
+
+def write_berry(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# This file is generated by running \"yarn install\" inside your project.\n\n"
+                "__metadata:\n  version: 6\n  cacheKey: 8\n\n")
+        f.write('"root-workspace-0b6124@workspace:.":\n  version: 0.0.0-use.local\n'
+                '  resolution: "root-workspace-0b6124@workspace:."\n  languageName: unknown\n'
+                '  linkType: soft\n\n')
+        for i in range(entries):
+            name = package_name(i)
+            version = f"1.{i % 10}.{i % 7}"
+            header = f'"{name}@npm:^1.{i % 10}.0, {name}@npm:~1.{i % 10}.1":' if i % 4 == 0 \
+                else f'"{name}@npm:^1.{i % 10}.0":'
+            f.write(f'{header}\n'
+                    f'  version: {version}\n'
+                    f'  resolution: "{name}@npm:{version}"\n'
+                    f'  dependencies:\n'
+                    f'    {package_name(i + 1)}: ^1.0.0\n'
+                    f'  checksum: {i:064x}\n'
+                    f'  languageName: node\n'
+                    f'  linkType: hard\n\n')
+
+
+def measure(parse, path, runs):
+    """返回 (最短耗时秒, 峰值内存字节, 依赖数)"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = parse(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    result = parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="yarn.lock 解析性能对比")
+    parser.add_argument("--entries", type=int, default=100000, help="每个合成 lockfile 的条目数（默认 100000）")
+    parser.add_argument("--runs", type=int, default=3, help="计时重复次数，取最小值（默认 3）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, writer in (("classic", write_classic), ("berry", write_berry)):
+            path = os.path.join(tmp, f"{label}.lock")
+            writer(path, args.entries)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"\n{label}: {args.entries} 个条目, {size_mb:.1f} MB")
+            print(f"  {'实现':<10}{'耗时(s)':>10}{'吞吐(MB/s)':>14}{'峰值内存(MB)':>16}{'依赖数':>10}")
+            for name, parse in (("legacy", legacy_parse_yarn_lock), ("streaming", parse_yarn_lock)):
+                elapsed, peak, count = measure(parse, path, args.runs)
+                print(f"  {name:<10}{elapsed:>10.3f}{size_mb / elapsed:>14.1f}{peak / 1024 / 1024:>16.1f}{count:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,228 @@
 import os
 import time
+import random
+import asyncio
+import atexit
+import queue
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
 
-import dashscope
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError
 from dotenv import load_dotenv
 
+from llm.metrics import get_llm_metrics, current_subsystem
+from llm.scheduler import get_scheduler
+
 
 # 设置全局代理
 # os.environ["http_proxy"] = "http://127.0.0.1:7890"
 # os.environ["https_proxy"] = "http://127.0.0.1:7890"
 load_dotenv()
 
-class BaseClient:
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class _EventLoopThread:
+    """
+    进程内共享的后台事件循环线程
+
+    所有同步 Think 调用都把协程提交到这个循环上执行，多个调用线程共享
+    少量 HTTP 连接，而不是每个线程各自阻塞占用一个连接。
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    ready = threading.Event()
+
+                    def run():
+                        asyncio.set_event_loop(loop)
+                        loop.call_soon(ready.set)
+                        loop.run_forever()
+
+                    self._thread = threading.Thread(target=run, name="llm-event-loop", daemon=True)
+                    self._thread.start()
+                    ready.wait()
+                    self._loop = loop
+        return self._loop
+
+    def submit(self, coro):
+        """把协程提交到后台循环，返回 concurrent.futures.Future"""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("不能在 LLM 事件循环线程内调用同步接口，请使用 think_async")
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro):
+        """在后台循环上执行协程并阻塞等待结果（同步门面）"""
+        return self.submit(coro).result()
+
+    def close(self):
+        if self._loop is None or not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(_close_pools(self._loop), self._loop).result(timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_event_loop = _EventLoopThread()
+
+# 连接池按 (事件循环, base_url) 共享；AsyncOpenAI 实例按 (事件循环, base_url, api_key) 共享
+_http_pools = {}
+_openai_clients = {}
+_pool_lock = threading.Lock()
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """创建带显式连接池上限和超时的 httpx 异步客户端"""
+    limits = httpx.Limits(
+        max_connections=_env_int("LLM_POOL_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("LLM_POOL_MAX_KEEPALIVE", 10),
+        keepalive_expiry=_env_float("LLM_POOL_KEEPALIVE_EXPIRY", 30.0),
+    )
+    timeout = httpx.Timeout(
+        _env_float("LLM_REQUEST_TIMEOUT", 120.0),
+        connect=_env_float("LLM_CONNECT_TIMEOUT", 10.0),
+    )
+    # trust_env=False: 不读取系统代理，避免兼容性问题
+    return httpx.AsyncClient(limits=limits, timeout=timeout, trust_env=False)
+
+
+def _get_openai_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """获取当前事件循环上共享连接池的 AsyncOpenAI 客户端"""
+    loop = asyncio.get_running_loop()
+    key = (id(loop), base_url, api_key)
+    with _pool_lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            pool_key = (id(loop), base_url)
+            http_client = _http_pools.get(pool_key)
+            if http_client is None:
+                http_client = _http_pools[pool_key] = _build_http_client()
+            # 重试由 BaseClient 统一处理，关闭 SDK 自带的重试
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url,
+                                 http_client=http_client, max_retries=0)
+            _openai_clients[key] = client
+        return client
+
+
+async def _close_pools(loop):
+    with _pool_lock:
+        pools = [(key, client) for key, client in _http_pools.items() if key[0] == id(loop)]
+        for key, _ in pools:
+            del _http_pools[key]
+        for key in [key for key in _openai_clients if key[0] == id(loop)]:
+            del _openai_clients[key]
+    for _, client in pools:
+        await client.aclose()
+
+
+atexit.register(_event_loop.close)
+
+
+def _retry_after_seconds(error: Exception):
+    """从异常携带的响应中读取 Retry-After（秒数或 HTTP 日期）"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    """
+    只重试超时、连接错误、408/429 和 5xx；其他 4xx 以及参数错误、程序错误重试也不会成功，直接抛出
+
+    APITimeoutError 是 APIConnectionError 的子类
+    """
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 429) or error.status_code >= 500
+    return isinstance(error, (APIConnectionError, httpx.TimeoutException, httpx.TransportError,
+                              asyncio.TimeoutError))
+
+
+class SyncFacadeMixin:
+    """同步门面：把 think_async / think_stream_async 放到共享事件循环上执行"""
+
+    def Think(self, prompts: list, subsystem: str = None, max_tokens: int = None) -> str:
+        """在共享事件循环上执行 think_async（子系统标签在调用线程中确定）"""
+        return _event_loop.run(self.think_async(prompts, subsystem or current_subsystem(), max_tokens))
+
+    def think_stream(self, prompts: list, subsystem: str = None):
+        """
+        逐块产出增量文本
+
+        生成在共享事件循环上进行，分块通过队列交给调用线程。调用方提前关闭
+        生成器（例如 SSE 客户端断开）时取消后台请求并关闭上游连接。
+        """
+        chunks = queue.Queue()
+        stream = self.think_stream_async(prompts, subsystem or current_subsystem())
+
+        async def pump():
+            try:
+                async for delta in stream:
+                    chunks.put(("chunk", delta))
+                chunks.put(("done", None))
+            except BaseException as e:
+                chunks.put(("error", e))
+                raise
+
+        future = _event_loop.submit(pump())
+        try:
+            while True:
+                kind, value = chunks.get()
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise value
+                yield value
+        finally:
+            future.cancel()
+
+
+class BaseClient(SyncFacadeMixin):
     """所有 AI Client 的基类，包含失败重试机制"""
 
     def __init__(self, model_name: str, api_key_env: str, base_url: str = None):
@@ -22,81 +233,287 @@ class BaseClient:
             raise ValueError(f"API Key 未找到，请设置环境变量 {api_key_env}")
 
         self.base_url = base_url
+        # 速率预算按提供方（API 域名）共享
+        self.provider = urlparse(base_url).netloc if base_url else model_name
+        self.max_attempts = max(1, _env_int("LLM_MAX_ATTEMPTS", 3))
+        self.backoff_base = _env_float("LLM_BACKOFF_BASE", 1.0)
+        self.backoff_max = _env_float("LLM_BACKOFF_MAX", 30.0)
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """指数退避 + 完全抖动；服务端给出 Retry-After 时以其为准"""
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _retry_async(self, subsystem, func, *args, **kwargs):
+        """
+        执行带有重试机制的异步 API 调用
 
-    def _retry(self, func, *args, **kwargs):
-        """执行带有重试机制的 API 调用"""
-        wait_times = [2, 4, 8]  # 减少重试次数和等待时间
-        for attempt, wait_time in enumerate(wait_times, start=1):
+        每次尝试前经过调度器：按 subsystem 的优先级类别占用并发槽位，
+        并消耗一个该提供方的速率令牌
+        """
+        scheduler = get_scheduler()
+        for attempt in range(1, self.max_attempts + 1):
             try:
-                return func(*args, **kwargs)  # 调用成功，直接返回结果
+                async with scheduler.slot(self.provider, subsystem):
+                    return await func(*args, **kwargs)  # 调用成功，直接返回结果
             except Exception as e:
-                if attempt == len(wait_times):
-                    # 最后一次失败，直接抛出异常
-                    raise e
-                print(f"第 {attempt} 次尝试失败，错误: {str(e)[:100]}，等待 {wait_time} 秒后重试...")
-                time.sleep(wait_time)
+                if attempt == self.max_attempts or not _is_retryable(e):
+                    # 最后一次失败或不可重试的错误，直接抛出异常
+                    raise
+                wait_time = self._backoff_delay(attempt, e)
+                if isinstance(e, APIStatusError) and e.status_code == 429:
+                    # 被限流时让所有调用方（包括其他 worker 进程）一起暂停，而不是各自撞上 429
+                    scheduler.penalize(self.provider, wait_time)
+                print(f"第 {attempt} 次尝试失败，错误: {str(e)[:100]}，等待 {wait_time:.1f} 秒后重试...")
+                await asyncio.sleep(wait_time)
 
-        print("thinking failure...")
-        return "thinking failure..."
+    async def think_async(self, prompts: list, subsystem: str = None, max_tokens: int = None) -> str:
+        """
+        Args:
+            prompts: 消息列表
+            subsystem: 调用方子系统标签（query / repair / parser ...），
+                       默认取 llm_subsystem() 上下文中的值
+            max_tokens: 输出 token 上限（可选），不传时使用服务端默认值
+        """
+        subsystem = subsystem or current_subsystem()
+        call = {'attempts': 0, 'usage': None}
+        start = time.perf_counter()
+        error = None
+        try:
+            return await self._retry_async(subsystem, self._call_api_async, prompts, call, max_tokens)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            usage = call['usage']
+            get_llm_metrics().record(
+                self.model_name, subsystem, time.perf_counter() - start, call['attempts'],
+                prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                completion_tokens=getattr(usage, 'completion_tokens', None),
+                error=error
+            )
 
+    async def think_stream_async(self, prompts: list, subsystem: str = None):
+        """
+        流式生成，逐块产出增量文本
 
-class DeepSeekClient(BaseClient):
-    def __init__(self, model_name: str):
-        super().__init__(model_name, "DEEPSEEK_API_KEY", "https://api.deepseek.com")
-        # Create httpx client without proxy to avoid compatibility issues
-        import httpx
-        http_client = httpx.Client()
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client)
+        只有在收到第一个分块之前（建立连接、返回状态码阶段）的失败会重试，
+        已经开始输出后出错直接抛出，避免客户端收到重复内容。
+        """
+        subsystem = subsystem or current_subsystem()
+        call = {'attempts': 0, 'usage': None}
+        start = time.perf_counter()
+        error = None
+        stream = None
+        try:
+            # 流式请求只在建立连接阶段占用调度槽位
+            stream = await self._retry_async(subsystem, self._open_stream_async, prompts, call)
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    call['usage'] = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if stream is not None:
+                await stream.close()
+            usage = call['usage']
+            get_llm_metrics().record(
+                self.model_name, subsystem, time.perf_counter() - start, call['attempts'],
+                prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                completion_tokens=getattr(usage, 'completion_tokens', None),
+                error=error
+            )
 
-    def Think(self, prompts: list) -> str:
-        return self._retry(self._call_api, prompts)
+    async def _open_stream_async(self, prompts, call):
+        call['attempts'] += 1
+        client = _get_openai_client(self.base_url, self.api_key)
+        return await client.chat.completions.create(
+            model=self.model_name,
+            messages=prompts,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
 
-    def _call_api(self, prompts):
-        """实际发送请求的方法"""
-        completion = self.client.chat.completions.create(
+    async def _call_api_async(self, prompts, call, max_tokens=None):
+        """实际发送请求的方法（OpenAI 兼容接口）"""
+        call['attempts'] += 1
+        client = _get_openai_client(self.base_url, self.api_key)
+        options = {'max_tokens': max_tokens} if max_tokens else {}
+        completion = await client.chat.completions.create(
             model=self.model_name,
-            messages=prompts
+            messages=prompts,
+            **options
         )
+        call['usage'] = getattr(completion, 'usage', None)
         return completion.choices[0].message.content
 
 
+class DeepSeekClient(BaseClient):
+    def __init__(self, model_name: str):
+        super().__init__(model_name, "DEEPSEEK_API_KEY", "https://api.deepseek.com")
+
+
 class QwenClient(BaseClient):
     def __init__(self, model_name: str = "qwen-plus"):
         super().__init__(model_name, "ALI_API_KEY", "https://dashscope.aliyuncs.com/compatible-mode/v1")
-        # Create httpx client without proxy to avoid compatibility issues
-        import httpx
-        http_client = httpx.Client()
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client)
 
-    def Think(self, prompts: list) -> str:
-        return self._retry(self._call_api, prompts)
-
-    def _call_api(self, prompts):
-        completion = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=prompts
-        )
-        return completion.choices[0].message.content
 
 class LlamaClient(BaseClient):
+    # 百炼平台的 OpenAI 兼容接口同样支持 Llama 系列模型，与 Qwen 共享连接池
     def __init__(self, model_name: str = "llama3.3-70b-instruct"):
         super().__init__(model_name, "ALI_API_KEY", "https://dashscope.aliyuncs.com/compatible-mode/v1")
 
-    def Think(self, prompts: list) -> str:
-        return self._retry(self._call_api, prompts)
 
-    def _call_api(self, prompts):
-        response = dashscope.Generation.call(
-            api_key=self.api_key,
-            model=self.model_name,
-            messages=prompts,
-            result_format="message",
-        )
+def _task_error(task: asyncio.Future):
+    """已完成任务的异常；被取消的任务返回 CancelledError（task.exception() 此时会直接抛出）"""
+    if task.cancelled():
+        return asyncio.CancelledError()
+    return task.exception()
+
+
+class HedgedClient(SyncFacadeMixin):
+    """
+    "fastest" 伪模型：对冲请求 + 自动故障转移
+
+    先请求主提供方；若在近期延迟的某个分位数内没有返回，再向备用提供方发出
+    对冲请求，先返回的结果胜出，另一个请求被取消。对冲次数受预算限制
+    （每次调用累积 LLM_HEDGE_BUDGET 个令牌，最多累积 LLM_HEDGE_BURST 个，
+    每次对冲消耗一个），额外开销约为调用量的 LLM_HEDGE_BUDGET 倍。
+    主提供方直接报错时总是立即切换到备用提供方，不消耗预算。
+    """
+
+    def __init__(self, model_name: str = "fastest", primary: BaseClient = None, secondary: BaseClient = None):
+        self.model_name = model_name
+        self.primary = primary or QwenClient(os.getenv("LLM_HEDGE_PRIMARY_MODEL", "qwen-max"))
+        self.secondary = secondary or DeepSeekClient(os.getenv("LLM_HEDGE_SECONDARY_MODEL", "deepseek-chat"))
+        self.percentile = _env_float("LLM_HEDGE_PERCENTILE", 0.9)
+        self.default_delay = _env_float("LLM_HEDGE_DELAY", 8.0)
+        self.min_delay = _env_float("LLM_HEDGE_MIN_DELAY", 1.0)
+        self.budget = _env_float("LLM_HEDGE_BUDGET", 0.1)
+        self.burst = _env_float("LLM_HEDGE_BURST", 3.0)
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=_env_int("LLM_HEDGE_WINDOW", 200))
+        self._tokens = self.burst
+        self._stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'failovers': 0, 'budget_denied': 0}
+
+    def hedge_delay(self) -> float:
+        """主提供方近期成功延迟的分位数；样本不足时使用默认值"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < 10:
+            return self.default_delay
+        index = min(len(samples) - 1, int(self.percentile * len(samples)))
+        return max(self.min_delay, samples[index])
+
+    def _take_hedge_token(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._stats['hedged'] += 1
+                return True
+            self._stats['budget_denied'] += 1
+            return False
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    async def _failover(self, prompts: list, subsystem: str, error: BaseException, max_tokens: int = None) -> str:
+        """主提供方失败：直接切换到备用提供方（不消耗对冲预算）"""
+        print(f"[对冲] {self.primary.model_name} 失败，切换到 {self.secondary.model_name}: "
+              f"{(str(error) or type(error).__name__)[:100]}")
+        self._count('failovers')
+        return await self.secondary.think_async(prompts, subsystem, max_tokens)
+
+    async def think_async(self, prompts: list, subsystem: str = None, max_tokens: int = None) -> str:
+        subsystem = subsystem or current_subsystem()
+        with self._lock:
+            self._stats['calls'] += 1
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(self.primary.think_async(prompts, subsystem, max_tokens))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay())
+            if done:
+                error = _task_error(primary)
+                if error is None:
+                    self._record_primary_latency(time.perf_counter() - start)
+                    return primary.result()
+                return await self._failover(prompts, subsystem, error, max_tokens)
+
+            if not self._take_hedge_token():
+                # 没有对冲预算：继续等待主提供方，失败时仍然故障转移
+                await asyncio.wait({primary})
+                error = _task_error(primary)
+                if error is not None:
+                    return await self._failover(prompts, subsystem, error, max_tokens)
+                self._record_primary_latency(time.perf_counter() - start)
+                return primary.result()
+
+            secondary = asyncio.ensure_future(self.secondary.think_async(prompts, subsystem, max_tokens))
+            tasks.append(secondary)
+            pending = {primary, secondary}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if _task_error(task) is not None:
+                        continue
+                    # 备用胜出时主提供方的真实延迟未知，记录已等待的时间作为下界
+                    self._record_primary_latency(time.perf_counter() - start)
+                    if task is secondary:
+                        self._count('hedge_wins')
+                    return task.result()
+            # 两个请求都失败，抛出主提供方的错误（主请求被取消时抛出备用提供方的错误）
+            error = _task_error(primary)
+            if isinstance(error, asyncio.CancelledError):
+                return secondary.result()
+            raise error
+        finally:
+            # 落败的请求（或调用方被取消时的所有请求）立即取消
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def think_stream_async(self, prompts: list, subsystem: str = None):
+        """流式模式不做对冲（避免两路输出混在一起），主提供方在输出前失败时切换到备用提供方"""
+        subsystem = subsystem or current_subsystem()
+        started = False
+        try:
+            async for delta in self.primary.think_stream_async(prompts, subsystem):
+                started = True
+                yield delta
+        except Exception as e:
+            if started:
+                raise
+            print(f"[对冲] {self.primary.model_name} 流式请求失败，切换到 {self.secondary.model_name}: {str(e)[:100]}")
+            self._count('failovers')
+            async for delta in self.secondary.think_stream_async(prompts, subsystem):
+                yield delta
+
+    def _record_primary_latency(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
 
-        if response.status_code == 200:
-            return response.output.choices[0].message.content
-        else:
-            raise Exception(f"请求失败: {response.status_code}, 错误代码: {response.code}, 错误信息: {response.message}")
+    def get_stats(self):
+        """对冲统计（当前进程）"""
+        delay = self.hedge_delay()
+        with self._lock:
+            return dict(
+                self._stats,
+                primary=self.primary.model_name,
+                secondary=self.secondary.model_name,
+                hedge_delay=round(delay, 3),
+                latency_samples=len(self._latencies),
+                budget_tokens=round(self._tokens, 3)
+            )
 
 # 示例用法
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+"""
+LLM 调用指标 - 按 (模型, 调用子系统) 聚合耗时、重试、token 用量和错误
+
+功能：
+1. BaseClient.think_async 每次调用结束时记录一条指标
+2. 调用方通过 llm_subsystem("repair") 等上下文标记子系统（query / repair / parser ...）
+3. 进程内直方图聚合，供 /metrics 接口展示
+4. 可选写入按大小滚动的 JSONL 日志（设置 LLM_METRICS_LOG）
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Optional
+
+# 耗时直方图的桶上限（秒），最后一个桶收集所有更慢的调用
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, float("inf"))
+
+DEFAULT_SUBSYSTEM = "other"
+_subsystem = contextvars.ContextVar("llm_subsystem", default=DEFAULT_SUBSYSTEM)
+
+
+@contextmanager
+def llm_subsystem(name: str):
+    """标记当前线程/协程中发起的 LLM 调用属于哪个子系统"""
+    token = _subsystem.set(name)
+    try:
+        yield
+    finally:
+        _subsystem.reset(token)
+
+
+def current_subsystem() -> str:
+    return _subsystem.get()
+
+
+class LLMMetrics:
+    """进程内 LLM 调用指标聚合（线程安全）"""
+
+    def __init__(self, log_path: str = None):
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, Dict] = {}
+        self._logger = _build_jsonl_logger(log_path or os.getenv("LLM_METRICS_LOG"))
+
+    def _state(self, model: str, subsystem: str) -> Dict:
+        key = (model, subsystem)
+        state = self._series.get(key)
+        if state is None:
+            state = {
+                'calls': 0,
+                'errors': 0,
+                'error_classes': {},
+                'retries': 0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'latency_sum': 0.0,
+                'latency_max': 0.0,
+                'buckets': [0] * len(LATENCY_BUCKETS),
+            }
+            self._series[key] = state
+        return state
+
+    def record(self, model: str, subsystem: str, latency: float, attempts: int,
+               prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+               error: Optional[BaseException] = None):
+        """记录一次 Think 调用（包含其所有重试）"""
+        error_class = type(error).__name__ if error is not None else None
+        with self._lock:
+            state = self._state(model, subsystem)
+            state['calls'] += 1
+            state['retries'] += max(0, attempts - 1)
+            state['prompt_tokens'] += prompt_tokens or 0
+            state['completion_tokens'] += completion_tokens or 0
+            state['latency_sum'] += latency
+            state['latency_max'] = max(state['latency_max'], latency)
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    state['buckets'][index] += 1
+                    break
+            if error_class:
+                state['errors'] += 1
+                state['error_classes'][error_class] = state['error_classes'].get(error_class, 0) + 1
+
+        if self._logger:
+            self._logger.info(json.dumps({
+                'ts': round(time.time(), 3),
+                'model': model,
+                'subsystem': subsystem,
+                'latency': round(latency, 3),
+                'attempts': attempts,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'error': error_class,
+            }, ensure_ascii=False))
+
+    def get_stats(self) -> Dict:
+        """按 模型/子系统 输出聚合结果"""
+        with self._lock:
+            models = {}
+            for (model, subsystem), state in self._series.items():
+                calls = state['calls']
+                models.setdefault(model, {})[subsystem] = {
+                    'calls': calls,
+                    'errors': state['errors'],
+                    'error_classes': dict(state['error_classes']),
+                    'retries': state['retries'],
+                    'prompt_tokens': state['prompt_tokens'],
+                    'completion_tokens': state['completion_tokens'],
+                    'latency_avg': round(state['latency_sum'] / calls, 3) if calls else None,
+                    'latency_max': round(state['latency_max'], 3),
+                    'latency_p50': _bucket_percentile(state['buckets'], calls, 0.5),
+                    'latency_p95': _bucket_percentile(state['buckets'], calls, 0.95),
+                    'latency_histogram': {
+                        _bucket_label(bound): count for bound, count in zip(LATENCY_BUCKETS, state['buckets'])
+                    },
+                }
+            return {'models': models}
+
+
+def _bucket_label(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else f"le_{bound:g}s"
+
+
+def _bucket_percentile(buckets, total: int, quantile: float):
+    """用直方图估算分位数（返回所在桶的上限）"""
+    if not total:
+        return None
+    target = quantile * total
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        seen += count
+        if seen >= target:
+            return None if bound == float("inf") else bound
+    return None
+
+
+def _build_jsonl_logger(log_path: Optional[str]):
+    if not log_path:
+        return None
+    log_dir = os.path.dirname(log_path)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    logger = logging.getLogger("kulin.llm_metrics")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            log_path,
+            maxBytes=int(os.getenv("LLM_METRICS_LOG_MAX_BYTES", 10 * 1024 * 1024)),
+            backupCount=int(os.getenv("LLM_METRICS_LOG_BACKUPS", 5)),
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+_metrics: Optional[LLMMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """获取全局 LLM 指标实例"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = LLMMetrics()
+    return _metrics
@@ -0,0 +1,158 @@
+"""
+跨进程 LLM 速率限制器
+
+gunicorn 的多个 worker 共享同一个 API Key 的提供方限额。这里用本机 SQLite 文件
+保存每个提供方的令牌桶状态，所有 worker 进程从同一个桶里取令牌，
+合计请求速率不会超过 LLM_PROVIDER_RPS，避免触发 429 后再退避重试。
+
+接口与 llm.scheduler.LocalTokenBucket 相同：try_acquire(provider) 返回需要等待的秒数。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.getenv("KULIN_CACHE_DIR", os.path.join(PROJECT_ROOT, "cache"))
+DEFAULT_DB_PATH = os.path.join(DEFAULT_CACHE_DIR, "llm_rate_limit.db")
+
+# 数据库被其他进程锁住时，稍后重试而不是阻塞事件循环
+LOCKED_RETRY_SECONDS = 0.05
+# 只有初始化建表时允许等待锁（每个进程一次）
+INIT_BUSY_TIMEOUT = 1.0
+
+
+class SqliteTokenBucket:
+    """基于 SQLite 的令牌桶，状态在本机所有进程间共享"""
+
+    def __init__(self, db_path: str = None, rate: float = None, burst: float = None):
+        self.db_path = db_path or os.getenv("LLM_RATE_LIMIT_PATH", DEFAULT_DB_PATH)
+        self.rate = rate or float(os.getenv("LLM_PROVIDER_RPS", 5.0))
+        self.burst = burst or float(os.getenv("LLM_PROVIDER_BURST", 10.0))
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._local = threading.local()
+        # 因数据库被锁而尚未写入共享桶的 429 惩罚: provider -> 暂停截止时间
+        self._penalties = {}
+        self._penalties_lock = threading.Lock()
+
+        conn = self._connect(INIT_BUSY_TIMEOUT)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS token_buckets (
+                provider TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("PRAGMA busy_timeout = 0")
+
+    def _connect(self, timeout: float = 0) -> sqlite3.Connection:
+        """
+        每个线程使用独立连接；isolation_level=None 以便手动 BEGIN IMMEDIATE
+
+        运行时不等待锁（timeout=0）：调用方在事件循环上，锁忙时返回 LOCKED_RETRY_SECONDS 稍后重试
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=timeout, isolation_level=None)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._local.conn = conn
+        return conn
+
+    def try_acquire(self, provider: str) -> float:
+        """取一个令牌；成功返回 0，否则返回需要等待的秒数"""
+        return self._update(provider, cost=1.0)
+
+    def penalize(self, provider: str, seconds: float):
+        """
+        提供方返回 429 时清空令牌桶，使所有 worker 一起暂停约 seconds 秒
+
+        数据库被锁时惩罚先记在本进程，下一次成功取得锁的 _update 会把它写入共享桶；
+        本进程在此之前取不到令牌，不会绕过惩罚发出请求
+        """
+        until = time.time() + seconds
+        with self._penalties_lock:
+            self._penalties[provider] = max(until, self._penalties.get(provider, 0.0))
+        self._update(provider, cost=0.0)
+
+    def _update(self, provider: str, cost: float) -> float:
+        with self._penalties_lock:
+            penalty = self._penalties.get(provider)
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            return LOCKED_RETRY_SECONDS
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM token_buckets WHERE provider = ?", (provider,)
+            ).fetchone()
+            tokens, updated = row if row else (self.burst, now)
+            # 时钟回拨时不补充令牌
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+
+            if penalty is not None and penalty > now:
+                tokens = min(tokens, -(penalty - now) * self.rate)
+
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / self.rate
+
+            conn.execute(
+                "INSERT OR REPLACE INTO token_buckets (provider, tokens, updated_at) VALUES (?, ?, ?)",
+                (provider, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            return LOCKED_RETRY_SECONDS
+
+        if penalty is not None:
+            with self._penalties_lock:
+                # 期间又有更长的惩罚加入时保留，留给下一次写入
+                if self._penalties.get(provider) == penalty:
+                    del self._penalties[provider]
+        return wait
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    获取全局速率限制器
+
+    默认使用跨进程的 SQLite 令牌桶；LLM_RATE_LIMIT_SHARED=false 或 SQLite 不可用时
+    退回到进程内令牌桶。
+    """
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = _create_rate_limiter()
+    return _limiter
+
+
+def _create_rate_limiter():
+    from llm.scheduler import LocalTokenBucket
+
+    if os.getenv("LLM_RATE_LIMIT_SHARED", "true").lower() == "false":
+        return LocalTokenBucket()
+    try:
+        return SqliteTokenBucket()
+    except sqlite3.Error as e:
+        print(f"[速率限制] 共享令牌桶初始化失败，使用进程内令牌桶: {str(e)}")
+        return LocalTokenBucket()
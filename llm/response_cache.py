@@ -0,0 +1,178 @@
+"""
+LLM 响应缓存 - 相同模型 + 相同提示词直接返回上次的结果
+
+功能：
+1. 按 (模型, 规范化提示词哈希) 存储 Think 的返回值，SQLite 文件在多个 gunicorn worker 间共享
+2. 条目超过 TTL 视为过期；总条目数超过上限时按最近访问时间淘汰（LRU）
+3. 统计命中率，供 /metrics 接口展示
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.getenv("KULIN_CACHE_DIR", os.path.join(PROJECT_ROOT, "cache"))
+DEFAULT_DB_PATH = os.path.join(DEFAULT_CACHE_DIR, "llm_responses.db")
+
+
+def normalize_prompts(prompts: List[Dict]) -> str:
+    """规范化消息列表：去掉首尾空白、合并连续空白，使仅有格式差异的提示词落到同一个键"""
+    normalized = [
+        [message.get("role", ""), " ".join(str(message.get("content", "")).split())]
+        for message in prompts
+    ]
+    return json.dumps(normalized, ensure_ascii=False, separators=(",", ":"))
+
+
+def prompt_key(model: str, prompts: List[Dict]) -> str:
+    """缓存键: sha256(模型 + 规范化提示词)"""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_prompts(prompts).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """基于 SQLite 的 LLM 响应缓存（线程安全，可被多个 gunicorn worker 共享）"""
+
+    def __init__(self, db_path: str = None, ttl: float = None, max_entries: int = None):
+        """
+        Args:
+            db_path: SQLite 文件路径，默认 cache/llm_responses.db
+            ttl: 条目有效期（秒），默认读取 LLM_CACHE_TTL（24 小时）
+            max_entries: 最大条目数，默认读取 LLM_CACHE_MAX_ENTRIES
+        """
+        self.db_path = db_path or os.getenv("LLM_CACHE_PATH", DEFAULT_DB_PATH)
+        self.ttl = ttl if ttl is not None else float(os.getenv("LLM_CACHE_TTL", 86400))
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'bypassed': 0, 'evicted': 0}
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程使用独立连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_access ON llm_responses (last_access)")
+
+    def get(self, model: str, prompts: List[Dict]) -> Optional[str]:
+        """查询缓存，未命中或已过期返回 None"""
+        key = prompt_key(model, prompts)
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT response FROM llm_responses WHERE key = ? AND created_at > ?",
+            (key, now - self.ttl)
+        ).fetchone()
+
+        if row is None:
+            self._record('misses')
+            return None
+
+        with conn:
+            conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+        self._record('hits')
+        return row[0]
+
+    def put(self, model: str, prompts: List[Dict], response: str):
+        """写入响应，并淘汰过期条目和超出上限的最久未访问条目"""
+        if not response:
+            return
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (prompt_key(model, prompts), model, response, now, now)
+            )
+            evicted = conn.execute("DELETE FROM llm_responses WHERE created_at <= ?", (now - self.ttl,)).rowcount
+            evicted += conn.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                "SELECT key FROM llm_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        with self._stats_lock:
+            self._stats['writes'] += 1
+            self._stats['evicted'] += evicted
+
+    def record_bypass(self):
+        self._record('bypassed')
+
+    def _record(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get_stats(self) -> Dict:
+        """获取命中率统计（当前进程）"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total = stats['hits'] + stats['misses']
+        entries = self._connect().execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        return dict(
+            stats,
+            db_path=self.db_path,
+            ttl=self.ttl,
+            max_entries=self.max_entries,
+            entries=entries,
+            hit_rate=round(stats['hits'] / total, 4) if total else 0.0
+        )
+
+
+_cache_instance: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """获取全局响应缓存实例（懒加载），设置 LLM_CACHE_ENABLED=false 可关闭"""
+    global _cache_instance
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() == "false":
+        return None
+
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                try:
+                    _cache_instance = ResponseCache()
+                except sqlite3.Error as e:
+                    print(f"[响应缓存] 初始化失败，跳过缓存: {str(e)}")
+                    return None
+    return _cache_instance
+
+
+def get_response_cache_stats() -> Dict:
+    """获取缓存统计，缓存关闭时返回 enabled=False"""
+    cache = get_response_cache()
+    if cache is None:
+        return {'enabled': False}
+    return dict(cache.get_stats(), enabled=True)
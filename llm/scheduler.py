@@ -0,0 +1,216 @@
+"""
+LLM 请求调度器 - 交互请求优先于批量依赖描述请求
+
+功能：
+1. 每次 API 调用前按调用子系统划分优先级类别：
+   interactive（/llm/query、修复建议等）优先于 bulk（llm_communicate 批量描述）
+2. 每个类别有独立的并发上限，批量任务不会占满所有连接
+3. 每个提供方共享一个速率预算（令牌桶，默认跨 worker 进程共享，见 llm/rate_limiter.py），
+   令牌不足时按优先级排队，交互请求排在已排队的批量请求之前
+4. 统计各类别的排队和等待时间，供 /metrics 接口展示
+
+调度器运行在 LLM 共享事件循环上，所有状态只在该线程中修改。
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from llm.rate_limiter import get_rate_limiter
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# 数值越小优先级越高
+PRIORITIES = {INTERACTIVE: 0, BULK: 1}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def classify(subsystem: Optional[str]) -> str:
+    """子系统 -> 优先级类别（LLM_BULK_SUBSYSTEMS 中列出的为 bulk，其余为 interactive）"""
+    bulk = {name.strip() for name in os.getenv("LLM_BULK_SUBSYSTEMS", "parser").split(",") if name.strip()}
+    return BULK if subsystem in bulk else INTERACTIVE
+
+
+class LocalTokenBucket:
+    """进程内令牌桶，按提供方分别计数"""
+
+    def __init__(self, rate: float = None, burst: float = None):
+        self.rate = rate or _env_float("LLM_PROVIDER_RPS", 5.0)
+        self.burst = burst or _env_float("LLM_PROVIDER_BURST", 10.0)
+        self._buckets: Dict[str, tuple] = {}
+
+    def try_acquire(self, provider: str) -> float:
+        """取一个令牌；成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(provider, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            self._buckets[provider] = (tokens - 1, now)
+            return 0.0
+        self._buckets[provider] = (tokens, now)
+        return (1 - tokens) / self.rate
+
+    def penalize(self, provider: str, seconds: float):
+        """提供方返回 429 时清空令牌桶，约 seconds 秒后才恢复发放"""
+        self._buckets[provider] = (-seconds * self.rate, time.monotonic())
+
+
+class LLMScheduler:
+    """按优先级类别分配并发槽位和提供方速率令牌"""
+
+    def __init__(self, rate_limiter=None, limits: Dict[str, int] = None):
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.limits = limits or {
+            INTERACTIVE: _env_int("LLM_INTERACTIVE_CONCURRENCY", 8),
+            BULK: _env_int("LLM_BULK_CONCURRENCY", 2),
+        }
+        self._waiters = []
+        self._seq = itertools.count()
+        self._in_flight = {cls: 0 for cls in PRIORITIES}
+        self._timer = None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            cls: {'granted': 0, 'wait_total': 0.0, 'wait_max': 0.0, 'rate_limited': 0}
+            for cls in PRIORITIES
+        }
+
+    @asynccontextmanager
+    async def slot(self, provider: str, subsystem: str = None):
+        """占用一个并发槽位并消耗一个提供方令牌，退出时释放槽位"""
+        cls = classify(subsystem)
+        await self._acquire(provider, cls)
+        try:
+            yield
+        finally:
+            self._release(cls)
+
+    async def _acquire(self, provider: str, cls: str):
+        future = asyncio.get_running_loop().create_future()
+        waiter = {'future': future, 'provider': provider, 'class': cls, 'enqueued': time.perf_counter()}
+        heapq.heappush(self._waiters, (PRIORITIES[cls], next(self._seq), waiter))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 已经分配到槽位但调用方被取消：归还槽位
+            if future.done() and not future.cancelled():
+                self._release(cls)
+            raise
+
+    def _release(self, cls: str):
+        self._in_flight[cls] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """按优先级依次放行等待者；某个提供方令牌不足时，其后同一提供方的请求都继续等待"""
+        skipped = []
+        blocked_providers = set()
+        retry_in = None
+        while self._waiters:
+            item = heapq.heappop(self._waiters)
+            waiter = item[2]
+            if waiter['future'].done():
+                continue  # 等待中被取消
+            cls, provider = waiter['class'], waiter['provider']
+            if self._in_flight[cls] >= self.limits[cls] or provider in blocked_providers:
+                skipped.append(item)
+                continue
+            wait = self.rate_limiter.try_acquire(provider)
+            if wait > 0:
+                blocked_providers.add(provider)
+                retry_in = wait if retry_in is None else min(retry_in, wait)
+                skipped.append(item)
+                with self._stats_lock:
+                    self._stats[cls]['rate_limited'] += 1
+                continue
+
+            self._in_flight[cls] += 1
+            waiter['future'].set_result(None)
+            waited = time.perf_counter() - waiter['enqueued']
+            with self._stats_lock:
+                stats = self._stats[cls]
+                stats['granted'] += 1
+                stats['wait_total'] += waited
+                stats['wait_max'] = max(stats['wait_max'], waited)
+
+        for item in skipped:
+            heapq.heappush(self._waiters, item)
+        if retry_in is not None:
+            # 已有更晚到期的定时器时提前重新设定，等待不超过令牌桶要求的时间
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + retry_in
+            if self._timer is None or deadline < self._timer.when():
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = loop.call_at(deadline, self._on_timer)
+
+    def penalize(self, provider: str, seconds: float):
+        """提供方限流（429）时暂停向其发放令牌"""
+        self.rate_limiter.penalize(provider, seconds)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def get_stats(self) -> Dict:
+        """各优先级类别的并发、排队和等待统计"""
+        queued = {cls: 0 for cls in PRIORITIES}
+        for _, _, waiter in list(self._waiters):
+            if not waiter['future'].done():
+                queued[waiter['class']] += 1
+        with self._stats_lock:
+            return {
+                cls: {
+                    'limit': self.limits[cls],
+                    'in_flight': self._in_flight[cls],
+                    'queued': queued[cls],
+                    'granted': stats['granted'],
+                    'rate_limited': stats['rate_limited'],
+                    'wait_avg': round(stats['wait_total'] / stats['granted'], 3) if stats['granted'] else None,
+                    'wait_max': round(stats['wait_max'], 3),
+                }
+                for cls, stats in self._stats.items()
+            }
+
+
+# 每个事件循环一个调度器（正常情况下只有 LLM 共享事件循环）
+_schedulers: Dict[int, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """获取当前事件循环上的调度器（必须在协程中调用）"""
+    key = id(asyncio.get_running_loop())
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = LLMScheduler()
+        return scheduler
+
+
+def get_scheduler_stats() -> Dict:
+    """调度器统计（尚未发起过 LLM 调用时各类别为空）"""
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    # 同步门面只使用一个共享事件循环，这里展示它的调度器
+    return {'classes': schedulers[0].get_stats() if schedulers else {}}
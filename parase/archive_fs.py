@@ -0,0 +1,186 @@
+"""
+直接扫描上传的压缩包（zip / tar / tar.gz / tar.bz2 / tar.xz），不完整解压
+
+大型仓库解压要写入几个 GB，而解析只需要其中几十个清单文件。这里：
+1. zip 只读取中央目录列出条目；tar 顺序流式读取（也支持不可 seek 的上传流）
+2. 按与 ProjectIndex 相同的规则（跳过 node_modules 等目录、按文件名识别清单）挑出清单文件
+3. 只解压这些成员，按原来的相对路径写到一个临时目录中，语言检测和各解析器照常使用路径读取；
+   退出上下文时删除临时目录
+
+写入磁盘的只有清单文件本身（通常几百 KB）。
+"""
+
+import os
+import posixpath
+import shutil
+import stat
+import tarfile
+import tempfile
+import time
+import zipfile
+from typing import BinaryIO, Dict, Optional, Union
+
+from parase.project_index import MANIFEST_EXTENSIONS, MANIFEST_NAMES, SKIP_DIRS
+
+COPY_BUFFER = 1024 * 1024
+
+
+class ArchiveError(ValueError):
+    """压缩包无法识别或内容不安全"""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def is_manifest_member(name: str) -> bool:
+    """成员路径是否是需要的清单文件（规则与 ProjectIndex 相同）"""
+    parts = [part for part in name.replace('\\', '/').split('/') if part and part != '.']
+    if not parts or any(part in SKIP_DIRS for part in parts[:-1]):
+        return False
+    lower = parts[-1].lower()
+    return lower in MANIFEST_NAMES or posixpath.splitext(lower)[1] in MANIFEST_EXTENSIONS
+
+
+def _safe_relative_path(name: str) -> Optional[str]:
+    """拒绝绝对路径和 .. 路径，返回规范化的相对路径"""
+    name = name.replace('\\', '/')
+    if name.startswith('/') or (len(name) > 1 and name[1] == ':'):
+        return None
+    normalized = posixpath.normpath(name)
+    if normalized.startswith('..') or normalized in ('.', ''):
+        return None
+    return normalized
+
+
+class ArchiveProject:
+    """
+    压缩包中的项目清单文件，以临时目录的形式提供给检测器和解析器
+
+    用法：
+        with ArchiveProject('/data/upload/repo.zip') as project:
+            index = ProjectIndex(project.root)
+            ...
+    source 可以是压缩包路径，也可以是二进制文件对象（zip 需要可 seek；tar 可以是不可 seek 的流）。
+    """
+
+    def __init__(self, source: Union[str, BinaryIO], name: str = None):
+        self.source = source
+        self.name = name or (source if isinstance(source, str) else getattr(source, 'name', 'upload'))
+        self.root = None
+        self.max_member_bytes = _env_int("ARCHIVE_MAX_MANIFEST_BYTES", 256 * 1024 * 1024)
+        self.max_total_bytes = _env_int("ARCHIVE_MAX_TOTAL_BYTES", 1024 * 1024 * 1024)
+        self.members_total = 0
+        self.members_extracted = 0
+        self.bytes_extracted = 0
+        self.elapsed = 0.0
+
+    def __enter__(self) -> 'ArchiveProject':
+        self.root = tempfile.mkdtemp(prefix='kulin-archive-')
+        start = time.time()
+        try:
+            self._extract()
+        except BaseException:
+            self.close()
+            raise
+        self.elapsed = time.time() - start
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.root:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self.root = None
+
+    def _extract(self):
+        if self._is_zip():
+            self._extract_zip()
+        else:
+            self._extract_tar()
+
+    def _is_zip(self) -> bool:
+        if isinstance(self.source, str):
+            return zipfile.is_zipfile(self.source)
+        # 不可 seek 的流只能按 tar 流式读取
+        if not self.source.seekable():
+            return False
+        position = self.source.tell()
+        try:
+            return zipfile.is_zipfile(self.source)
+        finally:
+            self.source.seek(position)
+
+    def _extract_zip(self):
+        try:
+            archive = zipfile.ZipFile(self.source)
+        except (zipfile.BadZipFile, OSError) as e:
+            raise ArchiveError(f"无法读取 zip 压缩包: {str(e)}")
+        with archive:
+            for info in archive.infolist():
+                self.members_total += 1
+                # 符号链接在 zip 中以 unix 权限位标记
+                if info.is_dir() or stat.S_ISLNK(info.external_attr >> 16):
+                    continue
+                if is_manifest_member(info.filename):
+                    with archive.open(info) as stream:
+                        self._write_member(info.filename, info.file_size, stream)
+
+    def _extract_tar(self):
+        try:
+            if isinstance(self.source, str):
+                archive = tarfile.open(self.source, mode='r:*')
+            else:
+                archive = tarfile.open(fileobj=self.source, mode='r|*')
+        except tarfile.TarError as e:
+            raise ArchiveError(f"不支持的压缩包格式: {str(e)}")
+
+        with archive:
+            # 流式模式下必须按顺序逐个处理成员，跳过的成员只解压不写入
+            for member in archive:
+                self.members_total += 1
+                if member.isfile() and is_manifest_member(member.name):
+                    stream = archive.extractfile(member)
+                    if stream is not None:
+                        self._write_member(member.name, member.size, stream)
+
+    def _write_member(self, name: str, size: int, stream: BinaryIO):
+        relative = _safe_relative_path(name)
+        if relative is None:
+            print(f"[压缩包] 跳过不安全的路径: {name}")
+            return
+        if size > self.max_member_bytes:
+            print(f"[压缩包] 跳过过大的清单文件: {name} ({size} bytes)")
+            return
+        if self.bytes_extracted + size > self.max_total_bytes:
+            raise ArchiveError("压缩包中的清单文件总大小超过限制")
+
+        target = os.path.join(self.root, *relative.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # 头部声明的大小不可信，复制时再限制实际写入的字节数
+        limit = min(self.max_member_bytes, self.max_total_bytes - self.bytes_extracted)
+        written = 0
+        with open(target, 'wb') as out:
+            while True:
+                chunk = stream.read(COPY_BUFFER)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > limit:
+                    raise ArchiveError(f"清单文件解压后超过大小限制: {name}")
+                out.write(chunk)
+        self.members_extracted += 1
+        self.bytes_extracted += written
+
+    def get_stats(self) -> Dict:
+        return {
+            'archive': self.name,
+            'members_total': self.members_total,
+            'manifests_extracted': self.members_extracted,
+            'bytes_extracted': self.bytes_extracted,
+            'elapsed': round(self.elapsed, 3)
+        }
@@ -0,0 +1,207 @@
+"""
+LLM 依赖描述的 token 预算批处理
+
+功能：
+1. 本地估算 token 数（不依赖 tokenizer，中英文混合按字符类别估算）
+2. 按输入/输出 token 预算打包批次，而不是固定条数
+3. 按模型记录每批耗时和截断情况，自适应调整输出预算，
+   目标是每秒生成的描述数最大化
+"""
+
+import os
+import re
+import threading
+from typing import Deque, Dict, List, Optional
+
+# 英文/代码平均约 4 个字符一个 token；CJK 字符基本一字一 token
+_CJK_PATTERN = re.compile(r'[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
+# 单条描述的预期输出: 80-120 个英文单词 ≈ 160 token，加上 JSON 结构开销
+OUTPUT_TOKENS_PER_DESCRIPTION = 180
+# 每条依赖在输出 JSON 中的固定开销 ({"name": ..., "description": ...})
+OUTPUT_TOKENS_PER_ITEM_OVERHEAD = 12
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的 token 数"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    other = len(text) - cjk
+    return cjk + (other + 3) // 4
+
+
+def estimate_output_tokens(dependency: str) -> int:
+    """估算为一条依赖生成描述所需的输出 token 数"""
+    return OUTPUT_TOKENS_PER_DESCRIPTION + OUTPUT_TOKENS_PER_ITEM_OVERHEAD + estimate_tokens(dependency)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class BatchBudgetController:
+    """
+    按模型自适应的批次预算控制器
+
+    调整策略（类似 AIMD）：
+    - 响应被截断（JSON 不完整）: 输出预算乘以 0.6，快速收缩
+    - 正常完成且吞吐（描述数/秒）不低于历史最好水平: 输出预算加一个步长，继续探测
+    - 正常完成但吞吐明显下降（批次过大导致单次延迟超线性增长）: 回退一个步长
+    """
+
+    SHRINK_FACTOR = 0.6
+    EWMA_ALPHA = 0.3
+
+    def __init__(self, input_budget: int = None, output_budget: int = None,
+                 min_output_budget: int = None, max_output_budget: int = None,
+                 max_items: int = None):
+        self.input_budget = input_budget or _env_int("LLM_BATCH_INPUT_TOKENS", 6000)
+        self.initial_output_budget = output_budget or _env_int("LLM_BATCH_OUTPUT_TOKENS", 2400)
+        self.min_output_budget = min_output_budget or _env_int("LLM_BATCH_MIN_OUTPUT_TOKENS", 400)
+        self.max_output_budget = max_output_budget or _env_int("LLM_BATCH_MAX_OUTPUT_TOKENS", 7000)
+        self.max_items = max_items or _env_int("LLM_BATCH_MAX_ITEMS", 60)
+        self.step = max(100, self.initial_output_budget // 10)
+
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict] = {}
+
+    def _state(self, model: str) -> Dict:
+        state = self._models.get(model)
+        if state is None:
+            state = {
+                'output_budget': self.initial_output_budget,
+                'throughput': None,        # 描述数/秒 (EWMA)
+                'best_throughput': None,
+                'truncation_rate': 0.0,    # EWMA
+                'batches': 0,
+                'truncated_batches': 0,
+                'descriptions': 0,
+                'seconds': 0.0
+            }
+            self._models[model] = state
+        return state
+
+    def output_budget(self, model: str) -> int:
+        with self._lock:
+            return int(self._state(model)['output_budget'])
+
+    def take_batch(self, model: str, pending: Deque[str], system_prompt: str = "",
+                   max_items: int = None, output_budget: int = None) -> List[str]:
+        """
+        从待处理队列头部取出一个批次，直到输入或输出预算用尽
+
+        至少返回一条依赖，保证超长名称也能被处理。output_budget 不传时取该模型
+        当前的输出预算；调用方应把同一个值作为请求的 max_tokens 发送。
+        """
+        output_budget = output_budget or self.output_budget(model)
+        input_used = estimate_tokens(system_prompt) + estimate_tokens("Dependencies:\n")
+        output_used = 0
+        limit = min(max_items or self.max_items, self.max_items)
+
+        batch = []
+        while pending and len(batch) < limit:
+            dep = pending[0]
+            dep_in = estimate_tokens(dep) + 1
+            dep_out = estimate_output_tokens(dep)
+            if batch and (input_used + dep_in > self.input_budget or output_used + dep_out > output_budget):
+                break
+            batch.append(pending.popleft())
+            input_used += dep_in
+            output_used += dep_out
+        return batch
+
+    def batch_full(self, model: str, pending: Deque[str], system_prompt: str = "",
+                   max_items: int = None) -> bool:
+        """待处理队列是否已经足够组成一个完整批次（流水线模式下用于决定何时发送）"""
+        limit = min(max_items or self.max_items, self.max_items)
+        if len(pending) >= limit:
+            return True
+        output_budget = self.output_budget(model)
+        input_used = estimate_tokens(system_prompt)
+        output_used = 0
+        for dep in pending:
+            input_used += estimate_tokens(dep) + 1
+            output_used += estimate_output_tokens(dep)
+            if input_used > self.input_budget or output_used > output_budget:
+                return True
+        return False
+
+    def record(self, model: str, items: int, latency: float, truncated: bool):
+        """记录一次批次调用的结果并调整该模型的输出预算"""
+        with self._lock:
+            state = self._state(model)
+            state['batches'] += 1
+            state['truncation_rate'] += self.EWMA_ALPHA * ((1.0 if truncated else 0.0) - state['truncation_rate'])
+
+            if truncated:
+                state['truncated_batches'] += 1
+                state['output_budget'] = max(self.min_output_budget, state['output_budget'] * self.SHRINK_FACTOR)
+                return
+
+            if latency <= 0 or items <= 0:
+                return
+
+            state['descriptions'] += items
+            state['seconds'] += latency
+            throughput = items / latency
+            if state['throughput'] is None:
+                state['throughput'] = throughput
+            else:
+                state['throughput'] += self.EWMA_ALPHA * (throughput - state['throughput'])
+
+            best = state['best_throughput']
+            if best is None or throughput >= best * 0.9:
+                state['best_throughput'] = max(best or 0.0, throughput)
+                # 截断率偏高时不再继续放大批次
+                if state['truncation_rate'] < 0.2:
+                    state['output_budget'] = min(self.max_output_budget, state['output_budget'] + self.step)
+            else:
+                state['output_budget'] = max(self.min_output_budget, state['output_budget'] - self.step)
+
+    def get_stats(self) -> Dict:
+        """各模型当前预算和吞吐统计"""
+        with self._lock:
+            return {
+                'input_budget': self.input_budget,
+                'models': {
+                    model: {
+                        'output_budget': int(state['output_budget']),
+                        'throughput': round(state['throughput'], 3) if state['throughput'] else None,
+                        'truncation_rate': round(state['truncation_rate'], 3),
+                        'batches': state['batches'],
+                        'truncated_batches': state['truncated_batches'],
+                        'descriptions_per_second': (
+                            round(state['descriptions'] / state['seconds'], 3) if state['seconds'] else None
+                        )
+                    }
+                    for model, state in self._models.items()
+                }
+            }
+
+
+def looks_truncated(response: Optional[str]) -> bool:
+    """判断 LLM 响应是否像是被截断（JSON 数组没有正常闭合）"""
+    if not response:
+        return False
+    text = response.strip()
+    if text.endswith("```"):
+        text = text[:-3].rstrip()
+    return not text.endswith("]")
+
+
+_controller: Optional[BatchBudgetController] = None
+_controller_lock = threading.Lock()
+
+
+def get_batch_controller() -> BatchBudgetController:
+    """获取全局批次预算控制器（进程内共享，按模型区分状态）"""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = BatchBudgetController()
+    return _controller
@@ -1,6 +1,8 @@
 import os
 
 from parase.pom_parse import llm_communicate
+from parase.dependency_stream import iter_unique_dependencies
+from parase.project_index import manifest_paths
 
 system_prompt = """Generate technical descriptions in English for C programming dependencies following these rules:
 1. For each dependency in format 'library-name' or 'header-file' (e.g. openssl, zlib, stdio.h)
@@ -22,30 +24,37 @@ Example:
     "description": "A lossless data compression library implementing the DEFLATE algorithm. Commonly used for file compression/decompression and network data optimization..."
 }]"""
 
-def collect_dependencies(project_path):
+def iter_kulin_files(project_path, index=None):
+    """递归查找kulin.txt（生成器，从共享项目索引中按文件名取出，跳过 node_modules 等目录）"""
+    yield from manifest_paths(project_path, 'kulin.txt', index)
+
+def read_kulin_file(file_path):
+    """读取kulin.txt，每个非空行是一条依赖"""
     dependencies = []
+    try:
+        # 读取文件内容
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # 去除首尾空白并过滤空行
+                cleaned_line = line.strip()
+                if cleaned_line:
+                    dependencies.append(cleaned_line)
+    except Exception as e:
+        print(f"读取文件 {file_path} 时出错: {str(e)}")
+    return dependencies
+
+def iter_c_dependencies(project_path, index=None):
+    """边遍历边读取kulin.txt，按原始顺序逐个产出去重后的依赖"""
+    return iter_unique_dependencies(iter_kulin_files(project_path, index), read_kulin_file, "C/C++", project_path,
+                                    index=index)
+
+def list_c_dependencies(project_path, index=None):
+    """读取所有kulin.txt，返回去重后的依赖列表（不调用LLM，保持原始顺序）"""
+    return list(iter_c_dependencies(project_path, index))
 
-    # 递归遍历目录树
-    for root, dirs, files in os.walk(project_path):
-        # 检查当前目录是否包含kulin.txt
-        if 'kulin.txt' in files:
-            file_path = os.path.join(root, 'kulin.txt')
-            try:
-                # 读取文件内容
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        # 去除首尾空白并过滤空行
-                        cleaned_line = line.strip()
-                        if cleaned_line:
-                            dependencies.append(cleaned_line)
-            except Exception as e:
-                print(f"读取文件 {file_path} 时出错: {str(e)}")
-
-    # 使用集合去重并保持原始顺序
-    seen = set()
-    unique_dependencies = [x for x in dependencies if not (x in seen or seen.add(x))]
-
-    return llm_communicate(unique_dependencies,system_prompt,10)
+def collect_dependencies(project_path, index=None, as_records=False):
+    return llm_communicate(iter_c_dependencies(project_path, index), system_prompt, ecosystem="c",
+                           as_records=as_records)
 
 
 # 使用示例
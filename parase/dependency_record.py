@@ -0,0 +1,60 @@
+"""
+紧凑的依赖记录
+
+unified_parse 原来的流程是：llm_communicate 把结果列表 json.dumps 成字符串，
+unified_parse 再 json.loads 回来并给每个字典补上 language/package_manager/project_id，
+5 万个依赖时会产生两遍字典和一个很大的中间 JSON 字符串。这里用带 __slots__ 的记录
+在进程内传递，语言、包管理器等重复出现的字符串通过工厂函数驻留共享，
+只在 HTTP 响应时转换成原来的 JSON 结构。
+"""
+
+import sys
+from typing import Dict, Iterable, List, Optional
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class Dependency:
+    """一个依赖及其描述；to_dict() 的结构与原来的 JSON 字典相同"""
+
+    __slots__ = ('name', 'description', 'language', 'package_manager', 'project_id')
+
+    def __init__(self, name: str, description: str = '', language: Optional[str] = None,
+                 package_manager: Optional[str] = None, project_id: Optional[int] = None):
+        self.name = name
+        self.description = description
+        self.language = language
+        self.package_manager = package_manager
+        self.project_id = project_id
+
+    def tag(self, language: str, package_manager: Optional[str], project_id: Optional[int] = None):
+        """标记所属语言和包管理器（unified_parse 使用）"""
+        self.language = _intern(language)
+        self.package_manager = _intern(package_manager)
+        if project_id:
+            self.project_id = project_id
+
+    def to_dict(self) -> Dict:
+        data = {'name': self.name, 'description': self.description}
+        if self.language is not None:
+            data['language'] = self.language
+            data['package_manager'] = self.package_manager
+        if self.project_id is not None:
+            data['project_id'] = self.project_id
+        return data
+
+    def __repr__(self):
+        return f"Dependency({self.name!r})"
+
+
+def make_dependency(name: str, description: str = '', language: Optional[str] = None,
+                    package_manager: Optional[str] = None, project_id: Optional[int] = None) -> Dependency:
+    """创建依赖记录；依赖名、语言和包管理器字符串驻留，相同的值只保存一份"""
+    return Dependency(_intern(name), description or '', _intern(language), _intern(package_manager), project_id)
+
+
+def to_dicts(dependencies: Iterable) -> List[Dict]:
+    """转换成 JSON 响应使用的字典列表（已经是字典的条目原样保留）"""
+    return [dep.to_dict() if isinstance(dep, Dependency) else dep for dep in dependencies]
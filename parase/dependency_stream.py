@@ -0,0 +1,56 @@
+"""
+依赖流式收集工具
+
+各语言解析器边遍历目录边解析清单文件，通过生成器逐个产出去重后的依赖，
+llm_communicate 收到足够多的新依赖就开始发送批次，使文件系统遍历和 LLM 请求重叠进行。
+"""
+
+from typing import Callable, Iterable, Iterator, List, TypeVar
+
+from parase.manifest_cache import parse_with_cache
+from parase.parallel_parse import iter_parsed
+
+T = TypeVar('T')
+
+
+def iter_unique_dependencies(manifests: Iterable[T], parse_manifest: Callable[[T], List[str]],
+                             label: str, project_path: str, cached: bool = True,
+                             parallel: bool = True, index=None) -> Iterator[str]:
+    """
+    逐个解析清单文件，产出之前没有出现过的依赖
+
+    Args:
+        manifests: 清单文件迭代器（通常是边遍历边产出的生成器）
+        parse_manifest: 解析单个清单文件，返回依赖字符串列表（结果按文件内容缓存，见 manifest_cache）
+        label: 日志中显示的语言名称
+        project_path: 项目路径（仅用于日志）
+        cached: 是否按文件内容缓存解析结果；结果还依赖其他文件时（如 Maven 继承 parent）传 False
+        parallel: 清单文件较多时是否交给进程池解析（见 parallel_parse），
+                  parse_manifest 不是模块级函数（无法 pickle）时传 False
+        index: 共享的 ProjectIndex；git 仓库中未修改的清单文件按 blob id 命中缓存，
+               index.use_manifest_cache 为 False 时不使用缓存
+    """
+    seen = set()
+    manifest_count = 0
+    content_ids = None
+    if index is not None:
+        content_ids = index.content_ids
+        cached = cached and index.use_manifest_cache
+    if parallel:
+        # 文件内容没有变化时直接使用上次的解析结果；结果按输入顺序返回，去重结果与顺序解析一致
+        parsed = iter_parsed(manifests, parse_manifest, cached, content_ids)
+    else:
+        parsed = ((manifest, parse_with_cache(parse_manifest, manifest, content_ids) if cached
+                   else parse_manifest(manifest))
+                  for manifest in manifests)
+    for manifest, dependencies in parsed:
+        manifest_count += 1
+        for dependency in dependencies:
+            if dependency not in seen:
+                seen.add(dependency)
+                yield dependency
+
+    if not manifest_count:
+        print(f"No {label} dependency files found in {project_path}")
+    else:
+        print(f"Found {len(seen)} unique {label} dependencies in {manifest_count} files")
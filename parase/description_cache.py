@@ -0,0 +1,297 @@
+"""
+依赖描述缓存 - 位于 LLM 描述生成步骤之前的持久化存储
+
+功能：
+1. 使用 SQLite 按 (生态, 名称[, 版本]) 存储 LLM 生成的依赖描述
+2. llm_communicate 只把缓存未命中的依赖发送给 LLM
+3. 支持从内置的 label_desc_c.json 预热缓存
+4. 统计命中率，供 /metrics 接口展示
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.getenv("KULIN_CACHE_DIR", os.path.join(PROJECT_ROOT, "cache"))
+DEFAULT_DB_PATH = os.path.join(DEFAULT_CACHE_DIR, "dependency_descriptions.db")
+LABEL_DESC_C_PATH = os.path.join(PROJECT_ROOT, "VulLibGen", "white_list", "label_desc_c.json")
+
+# 缓存粒度: name = 同名依赖的任意版本共享描述; version = 仅精确版本命中
+GRANULARITY_NAME = "name"
+GRANULARITY_VERSION = "version"
+
+
+def split_dependency(dependency: str, ecosystem: str) -> Tuple[str, str]:
+    """
+    将解析器输出的依赖字符串拆分为 (名称, 版本)
+
+    - java:  'groupId:artifactId:version'
+    - c:     'openssl' (没有版本)
+    - 其他:  'name version'
+    """
+    dependency = dependency.strip()
+    if ecosystem == "java":
+        parts = dependency.split(":")
+        if len(parts) >= 3:
+            return ":".join(parts[:-1]), parts[-1]
+        return dependency, ""
+    if ecosystem == "c":
+        return dependency, ""
+    if " " in dependency:
+        name, version = dependency.rsplit(" ", 1)
+        return name.strip(), version.strip()
+    return dependency, ""
+
+
+def normalize_name(name: str, ecosystem: str) -> str:
+    """规范化依赖名称，使大小写/分隔符不同的写法落到同一个缓存键"""
+    if ecosystem == "python":
+        # PEP 503: 名称不区分大小写，且 -_. 等价
+        return re.sub(r"[-_.]+", "-", name).lower()
+    if ecosystem in ("javascript", "php", "c", "ruby", "rust", "erlang"):
+        return name.lower()
+    return name
+
+
+class DescriptionCache:
+    """基于 SQLite 的依赖描述缓存（线程安全，可被多个 gunicorn worker 共享）"""
+
+    def __init__(self, db_path: str = None, granularity: str = None):
+        """
+        Args:
+            db_path: SQLite 文件路径，默认 cache/dependency_descriptions.db
+            granularity: 'name' 或 'version'，默认读取环境变量 DESC_CACHE_GRANULARITY
+        """
+        self.db_path = db_path or os.getenv("DESC_CACHE_PATH", DEFAULT_DB_PATH)
+        self.granularity = (granularity or os.getenv("DESC_CACHE_GRANULARITY", GRANULARITY_NAME)).lower()
+        if self.granularity not in (GRANULARITY_NAME, GRANULARITY_VERSION):
+            self.granularity = GRANULARITY_NAME
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'by_ecosystem': {}}
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程使用独立连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dependency_descriptions (
+                    ecosystem TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    version TEXT NOT NULL DEFAULT '',
+                    description TEXT NOT NULL,
+                    source TEXT NOT NULL DEFAULT 'llm',
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (ecosystem, name, version)
+                )
+            """)
+
+    def _lookup_key(self, dependency: str, ecosystem: str) -> Tuple[str, str]:
+        name, version = split_dependency(dependency, ecosystem)
+        name = normalize_name(name, ecosystem)
+        if self.granularity == GRANULARITY_NAME:
+            version = ""
+        return name, version
+
+    def get_many(self, ecosystem: str, dependencies: Iterable[str]) -> Dict[str, str]:
+        """
+        批量查询缓存
+
+        Returns:
+            {依赖字符串: 描述}，只包含命中的依赖
+        """
+        found = {}
+        lookups = 0
+        conn = self._connect()
+        for dependency in dependencies:
+            lookups += 1
+            name, version = self._lookup_key(dependency, ecosystem)
+            row = conn.execute(
+                "SELECT description FROM dependency_descriptions "
+                "WHERE ecosystem = ? AND name = ? AND version = ?",
+                (ecosystem, name, version)
+            ).fetchone()
+            if row:
+                found[dependency] = row[0]
+
+        self._record(ecosystem, hits=len(found), misses=lookups - len(found))
+        return found
+
+    def put_many(self, ecosystem: str, items: Iterable[Tuple[str, str]], source: str = "llm") -> int:
+        """
+        批量写入描述。每条依赖同时写入名称级和版本级两行，
+        这样切换缓存粒度时不需要重新生成。
+
+        Args:
+            items: (依赖字符串, 描述) 迭代器
+        """
+        rows = []
+        now = time.time()
+        for dependency, description in items:
+            if not description:
+                continue
+            name, version = split_dependency(dependency, ecosystem)
+            name = normalize_name(name, ecosystem)
+            rows.append((ecosystem, name, "", description, source, now))
+            if version:
+                rows.append((ecosystem, name, version, description, source, now))
+
+        if not rows:
+            return 0
+
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO dependency_descriptions "
+                "(ecosystem, name, version, description, source, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        with self._stats_lock:
+            self._stats['writes'] += len(rows)
+        return len(rows)
+
+    def warm_up_from_label_desc(self, json_path: str = LABEL_DESC_C_PATH, ecosystem: str = "c") -> int:
+        """
+        使用 VulLibGen/white_list 中的 label_desc JSON 预热缓存
+
+        JSON 格式: [{"name": "...", "desc": "..."}, ...]
+        已存在的条目不会被覆盖。
+        """
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                labels = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[描述缓存] 预热失败 ({json_path}): {str(e)}")
+            return 0
+
+        now = time.time()
+        rows = [
+            (ecosystem, normalize_name(item['name'], ecosystem), "", item['desc'], "label_desc", now)
+            for item in labels
+            if isinstance(item, dict) and item.get('name') and item.get('desc')
+        ]
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO dependency_descriptions "
+                "(ecosystem, name, version, description, source, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        print(f"[描述缓存] 从 {os.path.basename(json_path)} 预热 {len(rows)} 条 {ecosystem} 描述")
+        return len(rows)
+
+    def has_source(self, source: str) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM dependency_descriptions WHERE source = ? LIMIT 1", (source,)
+        ).fetchone()
+        return row is not None
+
+    def _record(self, ecosystem: str, hits: int, misses: int):
+        with self._stats_lock:
+            self._stats['hits'] += hits
+            self._stats['misses'] += misses
+            eco = self._stats['by_ecosystem'].setdefault(ecosystem, {'hits': 0, 'misses': 0})
+            eco['hits'] += hits
+            eco['misses'] += misses
+
+    def get_stats(self) -> Dict:
+        """获取命中率统计（当前进程）"""
+        with self._stats_lock:
+            hits, misses = self._stats['hits'], self._stats['misses']
+            by_ecosystem = {
+                eco: dict(counts, hit_rate=_hit_rate(counts['hits'], counts['misses']))
+                for eco, counts in self._stats['by_ecosystem'].items()
+            }
+            writes = self._stats['writes']
+
+        entries = self._connect().execute("SELECT COUNT(*) FROM dependency_descriptions").fetchone()[0]
+        return {
+            'db_path': self.db_path,
+            'granularity': self.granularity,
+            'entries': entries,
+            'hits': hits,
+            'misses': misses,
+            'writes': writes,
+            'hit_rate': _hit_rate(hits, misses),
+            'by_ecosystem': by_ecosystem
+        }
+
+
+def _hit_rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+_cache_instance: Optional[DescriptionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_description_cache() -> Optional[DescriptionCache]:
+    """
+    获取全局描述缓存实例（懒加载）
+
+    设置 DESC_CACHE_ENABLED=false 可关闭缓存；首次创建时若 DESC_CACHE_WARM_UP
+    未关闭，则自动从 label_desc_c.json 预热 C 依赖描述。
+    """
+    global _cache_instance
+    if os.getenv("DESC_CACHE_ENABLED", "true").lower() == "false":
+        return None
+
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                try:
+                    cache = DescriptionCache()
+                    if (os.getenv("DESC_CACHE_WARM_UP", "true").lower() != "false"
+                            and not cache.has_source("label_desc")):
+                        cache.warm_up_from_label_desc()
+                    _cache_instance = cache
+                except sqlite3.Error as e:
+                    print(f"[描述缓存] 初始化失败，跳过缓存: {str(e)}")
+                    return None
+    return _cache_instance
+
+
+def get_cache_stats() -> Dict:
+    """获取缓存统计，缓存关闭时返回 enabled=False"""
+    cache = get_description_cache()
+    if cache is None:
+        return {'enabled': False}
+    return dict(cache.get_stats(), enabled=True)
+
+
+# 命令行: python -m parase.description_cache warm [label_desc.json] [ecosystem]
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ("warm", "stats"):
+        print("用法: python -m parase.description_cache warm [label_desc.json] [ecosystem]")
+        print("      python -m parase.description_cache stats")
+        sys.exit(1)
+
+    cache = DescriptionCache()
+    if sys.argv[1] == "warm":
+        path = sys.argv[2] if len(sys.argv) > 2 else LABEL_DESC_C_PATH
+        ecosystem = sys.argv[3] if len(sys.argv) > 3 else "c"
+        cache.warm_up_from_label_desc(path, ecosystem)
+    print(json.dumps(cache.get_stats(), indent=2, ensure_ascii=False))
@@ -1,8 +1,9 @@
 import os
 import re
-import json
 
 from parase.pom_parse import llm_communicate
+from parase.dependency_stream import iter_unique_dependencies
+from parase.project_index import walk_manifests
 
 system_prompt = """Generate technical descriptions in English for Erlang/OTP library dependencies following these rules:
 1. For each dependency in format 'library-name version' (e.g. cowboy 2.9.0)
@@ -73,38 +74,39 @@ def parse_rebar_config(rebar_config_path):
         print(f"处理rebar.config失败 ({rebar_config_path}): {str(e)}")
         return []
 
-def find_rebar_files(root_dir):
-    """递归查找所有rebar文件"""
-    rebar_files = []
-    for dirpath, _, filenames in os.walk(root_dir):
+def iter_rebar_files(root_dir, index=None):
+    """递归查找rebar文件（生成器，读取共享项目索引，跳过 node_modules 等目录）"""
+    for dirpath, filenames in walk_manifests(root_dir, index):
         # 优先使用rebar.lock（版本更精确）
         if 'rebar.lock' in filenames:
-            rebar_files.append(('lock', os.path.join(dirpath, 'rebar.lock')))
+            yield ('lock', os.path.join(dirpath, 'rebar.lock'))
         elif 'rebar.config' in filenames:
-            rebar_files.append(('config', os.path.join(dirpath, 'rebar.config')))
-
-    return rebar_files
-
-def collect_erlang_dependencies(project_path):
-    """收集Erlang项目的所有依赖"""
-    rebar_files = find_rebar_files(project_path)
+            yield ('config', os.path.join(dirpath, 'rebar.config'))
 
-    if not rebar_files:
-        print(f"No rebar.lock or rebar.config files found in {project_path}")
-        return json.dumps([])
+def find_rebar_files(root_dir, index=None):
+    """递归查找所有rebar文件"""
+    return list(iter_rebar_files(root_dir, index))
 
-    unique_dependencies = set()
+def parse_rebar_manifest(rebar_file):
+    """按文件类型解析 (file_type, file_path)"""
+    file_type, file_path = rebar_file
+    if file_type == 'lock':
+        return parse_rebar_lock(file_path)
+    return parse_rebar_config(file_path)
 
-    for file_type, file_path in rebar_files:
-        if file_type == 'lock':
-            dependencies = parse_rebar_lock(file_path)
-        else:
-            dependencies = parse_rebar_config(file_path)
+def iter_erlang_dependencies(project_path, index=None):
+    """边遍历边解析rebar文件，逐个产出去重后的依赖"""
+    return iter_unique_dependencies(iter_rebar_files(project_path, index), parse_rebar_manifest, "Erlang", project_path,
+                                    index=index)
 
-        unique_dependencies.update(dependencies)
+def list_erlang_dependencies(project_path, index=None):
+    """收集Erlang项目的所有依赖，返回去重后的依赖列表（不调用LLM）"""
+    return sorted(iter_erlang_dependencies(project_path, index))
 
-    print(f"Found {len(unique_dependencies)} unique Erlang dependencies")
-    return llm_communicate(unique_dependencies, system_prompt, 10)
+def collect_erlang_dependencies(project_path, index=None, as_records=False):
+    """收集Erlang项目的所有依赖"""
+    return llm_communicate(iter_erlang_dependencies(project_path, index), system_prompt, ecosystem="erlang",
+                           as_records=as_records)
 
 
 if __name__ == "__main__":
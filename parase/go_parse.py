@@ -2,6 +2,8 @@ import os
 import re
 
 from parase.pom_parse import llm_communicate
+from parase.dependency_stream import iter_unique_dependencies
+from parase.project_index import manifest_paths
 
 system_prompt = """Generate technical descriptions in English for Go module dependencies following these rules:
 1. For each dependency in format 'module-path version' (e.g. github.com/gin-gonic/gin v1.9.0)
@@ -69,30 +71,27 @@ def parse_go_mod_file(go_mod_path):
         print(f"处理go.mod文件失败 ({go_mod_path}): {str(e)}")
         return []
 
-def find_go_mod_files(root_dir):
+def iter_go_mod_files(root_dir, index=None):
+    """递归查找go.mod文件（生成器，从共享项目索引中按文件名取出，跳过 node_modules 等目录）"""
+    yield from manifest_paths(root_dir, 'go.mod', index)
+
+def find_go_mod_files(root_dir, index=None):
     """递归查找所有go.mod文件"""
-    go_mod_files = []
-    for dirpath, _, filenames in os.walk(root_dir):
-        for filename in filenames:
-            if filename == 'go.mod':
-                go_mod_files.append(os.path.join(dirpath, filename))
-    return go_mod_files
-
-def collect_go_dependencies(project_path):
-    """收集Go项目的所有依赖"""
-    go_mod_files = find_go_mod_files(project_path)
+    return list(iter_go_mod_files(root_dir, index))
 
-    if not go_mod_files:
-        print(f"No go.mod files found in {project_path}")
-        return json.dumps([])
+def iter_go_dependencies(project_path, index=None):
+    """边遍历边解析go.mod，逐个产出去重后的依赖"""
+    return iter_unique_dependencies(iter_go_mod_files(project_path, index), parse_go_mod_file, "Go", project_path,
+                                    index=index)
 
-    unique_dependencies = set()
-    for go_mod_path in go_mod_files:
-        dependencies = parse_go_mod_file(go_mod_path)
-        unique_dependencies.update(dependencies)
+def list_go_dependencies(project_path, index=None):
+    """收集Go项目的所有依赖，返回去重后的依赖列表（不调用LLM）"""
+    return sorted(iter_go_dependencies(project_path, index))
 
-    print(f"Found {len(unique_dependencies)} unique Go dependencies")
-    return llm_communicate(unique_dependencies, system_prompt, 10)
+def collect_go_dependencies(project_path, index=None, as_records=False):
+    """收集Go项目的所有依赖"""
+    return llm_communicate(iter_go_dependencies(project_path, index), system_prompt, ecosystem="go",
+                           as_records=as_records)
 
 
 # 使用示例
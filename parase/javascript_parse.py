@@ -4,6 +4,9 @@ import re
 import yaml
 
 from parase.pom_parse import llm_communicate
+from parase.dependency_stream import iter_unique_dependencies
+from parase.project_index import walk_manifests
+from parase.json_stream import iter_json_sections
 
 system_prompt = """Generate technical descriptions in English for JavaScript/Node.js dependencies following these rules:
 1. For each dependency in format 'package-name version' (e.g. express 4.18.2)
@@ -56,29 +59,34 @@ def parse_package_json(package_json_path):
         return []
 
 def parse_package_lock_json(package_lock_path):
-    """解析package-lock.json文件并提取依赖信息"""
+    """解析package-lock.json文件并提取依赖信息（大文件流式读取，只解码 packages/dependencies 中的条目）"""
     try:
-        with open(package_lock_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        dependencies = []
-
-        # package-lock.json v2/v3 格式
-        if 'packages' in data:
-            for pkg_path, pkg_info in data['packages'].items():
-                if pkg_path and pkg_path != '':  # 排除根包
-                    pkg_name = pkg_path.replace('node_modules/', '')
-                    version = pkg_info.get('version', '')
-                    if version:
-                        dependencies.append(f"{pkg_name} {version}")
-        # package-lock.json v1 格式
-        elif 'dependencies' in data:
-            for pkg, info in data['dependencies'].items():
-                version = info.get('version', '')
-                if version:
-                    dependencies.append(f"{pkg} {version}")
-
-        return dependencies
+        packages = []  # v2/v3 packages 字段
+        legacy = []    # v1 dependencies 字段
+
+        def wanted(section):
+            # v2 同时包含 packages 和旧版 dependencies，读到 packages 后跳过后者
+            return section == 'packages' or (section == 'dependencies' and not packages)
+
+        for section, pkg_path, pkg_info in iter_json_sections(package_lock_path, wanted):
+            if not isinstance(pkg_info, dict):
+                continue
+            if section == 'packages':
+                # 只取已安装的包；根包 "" 和工作区成员源码目录（如 packages/app）不是依赖
+                marker = pkg_path.rfind('node_modules/')
+                if marker < 0 or pkg_info.get('link'):
+                    continue
+                # 嵌套安装 node_modules/a/node_modules/b 的包名是 b
+                pkg_name = pkg_info.get('name') or pkg_path[marker + len('node_modules/'):]
+                target = packages
+            else:
+                pkg_name = pkg_path
+                target = legacy
+            version = pkg_info.get('version', '')
+            if version:
+                target.append(f"{pkg_name} {version}")
+
+        return packages or legacy
 
     except json.JSONDecodeError as e:
         print(f"JSON解析错误 ({package_lock_path}): {str(e)}")
@@ -87,125 +95,296 @@ def parse_package_lock_json(package_lock_path):
         print(f"处理package-lock.json文件失败 ({package_lock_path}): {str(e)}")
         return []
 
+# yarn.lock 条目中的版本行：classic 为 `  version "1.2.3"`，Berry 为 `  version: 1.2.3`
+# 按字节匹配，只有声明行和版本行需要解码
+_YARN_VERSION_LINE = re.compile(rb'\s+version:?\s+"?([^"\s]+)"?')
+_SPACE, _HASH, _LF, _CR = ord(' '), ord('#'), ord('\n'), ord('\r')
+# Berry 中不是从注册表安装的本地包（工作区、link、portal）
+_YARN_LOCAL_PROTOCOLS = ('workspace:', 'link:', 'portal:')
+
+def _yarn_spec_name(spec):
+    """
+    从条目声明中的一个描述符取包名，本地包返回 None
+
+    lodash@^4.17.21 / @babel/core@^7.0.0 / @babel/core@npm:^7.0.0 (Berry)
+    别名 my-lodash@npm:lodash@^4.17.21 取实际包名 lodash
+    """
+    spec = spec.strip().strip('"')
+    at = spec.find('@', 1)
+    if at < 0:
+        return None
+    name, descriptor = spec[:at], spec[at + 1:]
+    if descriptor.startswith(_YARN_LOCAL_PROTOCOLS):
+        return None
+    if descriptor.startswith('npm:'):
+        target = descriptor[4:]
+        target_at = target.find('@', 1)
+        if target_at > 0:
+            name = target[:target_at]
+    return name
+
 def parse_yarn_lock(yarn_lock_path):
-    """解析yarn.lock文件并提取依赖信息（优化版本）"""
+    """
+    解析yarn.lock文件并提取依赖信息（支持 Yarn classic v1 和 Berry v2+）
+
+    单遍流式状态机：按字节逐行读取，不把整个文件读入内存，每个包名保留最后出现的版本
+    """
     try:
         dependencies = {}  # 使用字典去重，key为包名
-
-        with open(yarn_lock_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        current_package = None
-        current_version = None
-
-        for i, line in enumerate(lines):
-            # 匹配包声明行 (以引号开头)
-            # 格式1: "package@version":
-            # 格式2: "@scope/package@version":
-            # 格式3: "package@version", "package@other-version":  (多个别名)
-            if line.strip().startswith('"') and line.strip().endswith(':'):
-                # 提取包名（去除版本约束）
-                # 使用逗号分割处理多个别名的情况
-                package_declarations = line.strip().rstrip(':').split(',')
-
-                for pkg_decl in package_declarations:
-                    pkg_decl = pkg_decl.strip().strip('"')
-
-                    # 分离包名和版本约束
-                    # 对于 scoped packages: @scope/package@^1.0.0
-                    # 对于普通 packages: package@^1.0.0
-                    if pkg_decl.startswith('@'):
-                        # Scoped package
-                        parts = pkg_decl.split('@')
-                        if len(parts) >= 3:  # @scope/package@version
-                            pkg_name = '@' + parts[1]  # @scope/package
-                            current_package = pkg_name
-                    else:
-                        # 普通package
-                        at_pos = pkg_decl.find('@')
-                        if at_pos > 0:
-                            pkg_name = pkg_decl[:at_pos]
-                            current_package = pkg_name
-
-            # 匹配version行 (在包声明后)
-            elif current_package and line.strip().startswith('version '):
-                version_match = re.search(r'version\s+"([^"]+)"', line)
-                if version_match:
-                    current_version = version_match.group(1)
-                    # 保存包和版本
-                    dependencies[current_package] = current_version
-                    current_package = None  # 重置
-                    current_version = None
+        current_package = None  # 当前条目的包名；为 None 时忽略缩进行
+
+        with open(yarn_lock_path, 'rb') as f:
+            for line in f:
+                first = line[0]
+                if first == _SPACE:
+                    # 条目内部的字段行，只关心当前条目的 version
+                    if current_package is not None:
+                        match = _YARN_VERSION_LINE.match(line)
+                        if match:
+                            dependencies[current_package] = match.group(1).decode('utf-8')
+                            current_package = None
+                    continue
+                if first == _HASH or first == _LF or first == _CR:
+                    continue
+
+                # 条目声明行（未缩进，以冒号结尾），可能包含多个逗号分隔的描述符：
+                # classic: "@babel/code-frame@^7.0.0", "@babel/code-frame@^7.10.4":
+                #          lodash@^4.17.21:
+                # Berry:   "@babel/code-frame@npm:^7.0.0, @babel/code-frame@npm:^7.10.4":
+                header = line.rstrip()
+                if not header.endswith(b':') or header.startswith(b'__metadata'):
+                    current_package = None
+                    continue
+                current_package = _yarn_spec_name(header[:-1].split(b',', 1)[0].decode('utf-8'))
 
         # 转换为列表格式
-        result = [f"{pkg} {ver}" for pkg, ver in dependencies.items()]
-        return result
+        return [f"{pkg} {ver}" for pkg, ver in dependencies.items()]
 
     except Exception as e:
         print(f"处理yarn.lock失败 ({yarn_lock_path}): {str(e)}")
-        import traceback
-        traceback.print_exc()
         return []
 
-def parse_pnpm_lock_yaml(pnpm_lock_path):
-    """解析pnpm-lock.yaml文件并提取依赖信息"""
+# pnpm-lock.yaml 中需要的顶层字段：v5-v8 的 packages，v9 的 packages + snapshots（带 peer 后缀）
+_PNPM_SECTIONS = ('packages', 'snapshots')
+
+def _pnpm_package_key(key, legacy):
+    """
+    从 packages/snapshots 的键中取 (包名, 版本)，无法确定时对应位置返回 None
+
+    v5:    /name/1.2.3、/@scope/name/1.2.3_peer@1.0.0
+    v6-v8: /name@1.2.3、/@scope/name@1.2.3(peer@1.0.0)
+    v9:    name@1.2.3、'@scope/name@1.2.3'
+    tarball/git 依赖的键不含可用版本，版本取自条目中的 version 字段
+    """
+    key = key.strip('\'"').lstrip('/')
+    if legacy:
+        # 版本段在包名之后（scoped 包名本身带一个 /），peer 后缀以 _ 开头
+        slash = key.find('/', key.find('/') + 1 if key.startswith('@') else 0)
+        if slash <= 0:
+            return None, None
+        name, version = key[:slash], key[slash + 1:].split('_', 1)[0]
+    else:
+        key = key.split('(', 1)[0]
+        at = key.find('@', 1)
+        if at < 0:
+            return None, None
+        name, version = key[:at], key[at + 1:]
+    if not version[:1].isdigit():
+        return name, None
+    return name, version
+
+def _pnpm_legacy_version(value):
+    """lockfileVersion 5.x 使用 /name/version 形式的键"""
     try:
-        dependencies = []
-        with open(pnpm_lock_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        return float(str(value).strip().strip('\'"')) < 6
+    except ValueError:
+        return False
+
+def _parse_pnpm_lock_lines(lines):
+    """
+    按行提取 pnpm-lock.yaml 中 packages/snapshots 的条目，不构建 YAML 对象
+
+    Returns:
+        依赖集合；遇到无法识别的格式（没有 lockfileVersion、条目缺少版本等）返回 None，
+        由调用方改用 YAML 加载器解析
+    """
+    dependencies = set()
+    legacy = None
+    in_section = False
+    entry_seen = False
+    pending = None  # 键中没有版本的条目，等待条目内的 name/version 字段
+
+    for line in lines:
+        first = line[0]
+        if first == '\n' or first == '\r' or first == '#':
+            continue
+        if first != ' ':
+            # 顶层字段
+            if pending is not None:
+                return None
+            header = line.rstrip()
+            if header.startswith('lockfileVersion:'):
+                legacy = _pnpm_legacy_version(header[len('lockfileVersion:'):])
+            in_section = header[:-1] in _PNPM_SECTIONS and header.endswith(':')
+            entry_seen = False
+            continue
+        if not in_section:
+            continue
+        if len(line) < 3 or line.isspace():
+            # 只有空白的行
+            continue
+
+        if line[2] != ' ':
+            # 两个空格缩进：条目键
+            if pending is not None:
+                return None
+            key = line.strip()
+            if not key:
+                continue
+            # v9 snapshots 中没有字段的条目写成 `react@18.2.0: {}`
+            if key.endswith(': {}'):
+                key = key[:-3]
+            if legacy is None or not key.endswith(':'):
+                return None
+            entry_seen = True
+            name, version = _pnpm_package_key(key[:-1], legacy)
+            if version:
+                dependencies.add(f"{name} {version}")
+            else:
+                pending = [name, None]
+        elif not entry_seen:
+            # 条目键不是两个空格缩进，无法按行识别
+            return None
+        elif pending is not None and line[4:5] != ' ':
+            # 四个空格缩进：条目字段
+            field = line.strip()
+            if field.startswith('name:'):
+                pending[0] = field[5:].strip().strip('\'"')
+            elif field.startswith('version:'):
+                pending[1] = field[8:].strip().strip('\'"')
+            if pending[0] and pending[1]:
+                dependencies.add(f"{pending[0]} {pending[1]}")
+                pending = None
+
+    if pending is not None or legacy is None:
+        return None
+    return dependencies
+
+def _parse_pnpm_lock_data(data):
+    """从 YAML 加载结果中提取依赖（行解析失败时的后备路径）"""
+    dependencies = set()
+    if not isinstance(data, dict):
+        return dependencies
+    legacy = _pnpm_legacy_version(data.get('lockfileVersion', ''))
+    for section in _PNPM_SECTIONS:
+        packages = data.get(section)
+        if not isinstance(packages, dict):
+            continue
+        for key, info in packages.items():
+            name, version = _pnpm_package_key(str(key), legacy)
+            if isinstance(info, dict):
+                name = info.get('name') or name
+                version = version or info.get('version')
+            if name and version:
+                dependencies.add(f"{name} {version}")
+    return dependencies
 
-        # pnpm-lock.yaml是YAML格式，packages字段包含所有包
+def parse_pnpm_lock_yaml(pnpm_lock_path):
+    """
+    解析pnpm-lock.yaml文件并提取依赖信息（支持 lockfileVersion 5.x - 9.0）
+
+    先按行提取 packages/snapshots 条目；格式无法识别时用 YAML 加载器（优先 C 实现）解析
+    """
+    try:
         try:
-            data = yaml.safe_load(content)
-
-            if 'packages' in data and isinstance(data['packages'], dict):
-                for pkg_path, pkg_info in data['packages'].items():
-                    # pkg_path的格式: 'node_modules/package@version'
-                    # 提取包名和版本
-                    if pkg_info and isinstance(pkg_info, dict):
-                        version = pkg_info.get('version', '')
-                        # 从路径中提取包名
-                        if 'node_modules/' in pkg_path:
-                            pkg_name = pkg_path.replace('node_modules/', '')
-                            # 分离包名和版本路径
-                            if '@' in pkg_name and not pkg_name.startswith('@'):
-                                # 非scoped包
-                                pkg_name = pkg_name.split('@')[0]
-                            elif pkg_name.startswith('@'):
-                                # scoped包
-                                parts = pkg_name.rsplit('@', 1)
-                                if len(parts) == 2:
-                                    pkg_name = parts[0] + '/' + parts[1].split('@')[0] if '@' in parts[1] else parts[1]
-
-                            if version:
-                                dependencies.append(f"{pkg_name} {version}")
-        except yaml.YAMLError:
-            # 如果YAML解析失败，使用正则
-            dependencies = _parse_pnpm_lock_regex(content)
-
-        return list(set(dependencies))
+            with open(pnpm_lock_path, 'r', encoding='utf-8') as f:
+                dependencies = _parse_pnpm_lock_lines(f)
+        except Exception as e:
+            print(f"  pnpm-lock.yaml按行解析出错: {str(e)}")
+            dependencies = None
+
+        if dependencies is None:
+            print(f"  pnpm-lock.yaml格式无法按行解析，使用YAML加载器: {pnpm_lock_path}")
+            loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+            with open(pnpm_lock_path, 'r', encoding='utf-8') as f:
+                dependencies = _parse_pnpm_lock_data(yaml.load(f, Loader=loader))
+
+        return list(dependencies)
 
     except Exception as e:
         print(f"处理pnpm-lock.yaml失败 ({pnpm_lock_path}): {str(e)}")
         return []
 
-def _parse_pnpm_lock_regex(content):
-    """使用正则表达式解析pnpm-lock.yaml"""
-    dependencies = []
-
-    # 简单的正则模式匹配 version: 'x.y.z' 行
-    # 这是一个简化版本，因为YAML结构复杂
-    version_pattern = r'\s+version:\s+[\'"]?([0-9.]+[^\'"\n]*)[\'"]?'
-    for match in re.finditer(version_pattern, content):
-        # 这不太精确，但对于基本提取还是可以的
-        pass
-
-    return dependencies
-
-def find_javascript_lock_files(root_dir):
-    """递归查找所有JavaScript包管理器的lock文件"""
-    lock_files = []
-    for dirpath, _, filenames in os.walk(root_dir):
+def _workspace_patterns(dirpath, filenames):
+    """读取工作区根目录声明的成员目录模式（package.json 的 workspaces 或 pnpm-workspace.yaml）"""
+    patterns = []
+    if 'pnpm-workspace.yaml' in filenames:
+        try:
+            with open(os.path.join(dirpath, 'pnpm-workspace.yaml'), 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f) or {}
+            patterns.extend(data.get('packages') or [])
+        except Exception as e:
+            print(f"处理pnpm-workspace.yaml失败 ({dirpath}): {str(e)}")
+    if 'package.json' in filenames:
+        try:
+            with open(os.path.join(dirpath, 'package.json'), 'r', encoding='utf-8') as f:
+                workspaces = json.load(f).get('workspaces')
+            # yarn classic 也支持 {"packages": [...], "nohoist": [...]} 写法
+            if isinstance(workspaces, dict):
+                workspaces = workspaces.get('packages')
+            if isinstance(workspaces, list):
+                patterns.extend(workspaces)
+        except Exception as e:
+            print(f"读取package.json工作区配置失败 ({dirpath}): {str(e)}")
+    return [p for p in patterns if isinstance(p, str) and p.strip()]
+
+def _workspace_glob_regex(pattern):
+    """工作区 glob -> 正则：* 不跨目录，** 匹配任意层目录"""
+    pattern = pattern.strip().strip('/')
+    if pattern.startswith('./'):
+        pattern = pattern[2:]
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r'\Z')
+
+class _Workspace:
+    """已找到 lock 文件的工作区根目录及其成员目录模式"""
+
+    def __init__(self, root, patterns):
+        self.root = root
+        self.include = [_workspace_glob_regex(p) for p in patterns if not p.startswith('!')]
+        self.exclude = [_workspace_glob_regex(p[1:]) for p in patterns if p.startswith('!')]
+
+    def contains(self, dirpath):
+        relative = os.path.relpath(dirpath, self.root).replace(os.sep, '/')
+        if relative.startswith('../'):
+            return False
+        return (any(r.match(relative) for r in self.include)
+                and not any(r.match(relative) for r in self.exclude))
+
+def iter_javascript_lock_files(root_dir, index=None):
+    """
+    递归查找JavaScript包管理器的lock文件（生成器，读取共享项目索引，跳过 node_modules 等目录）
+
+    npm/yarn/pnpm 工作区中，根目录的 lock 文件已经包含所有成员包的依赖，
+    只有 package.json 的成员目录不再单独解析。
+    """
+    workspaces = []
+    skipped = 0
+    for dirpath, filenames in walk_manifests(root_dir, index):
         # 优先级（按精准度）:
         # 1. pnpm-lock.yaml (pnpm)
         # 2. yarn.lock (yarn)
@@ -213,54 +392,72 @@ def find_javascript_lock_files(root_dir):
         # 4. package.json (fallback)
 
         if 'pnpm-lock.yaml' in filenames:
-            lock_files.append(('pnpm', os.path.join(dirpath, 'pnpm-lock.yaml')))
+            yield ('pnpm', os.path.join(dirpath, 'pnpm-lock.yaml'))
         elif 'yarn.lock' in filenames:
-            lock_files.append(('yarn', os.path.join(dirpath, 'yarn.lock')))
+            yield ('yarn', os.path.join(dirpath, 'yarn.lock'))
         elif 'package-lock.json' in filenames:
-            lock_files.append(('npm_lock', os.path.join(dirpath, 'package-lock.json')))
+            yield ('npm_lock', os.path.join(dirpath, 'package-lock.json'))
         elif 'package.json' in filenames:
-            lock_files.append(('npm', os.path.join(dirpath, 'package.json')))
+            if any(workspace.contains(dirpath) for workspace in workspaces):
+                skipped += 1
+            else:
+                yield ('npm', os.path.join(dirpath, 'package.json'))
+            continue
+        else:
+            continue
+
+        patterns = _workspace_patterns(dirpath, filenames)
+        if patterns:
+            workspaces.append(_Workspace(dirpath, patterns))
+
+    if skipped:
+        print(f"Skipped {skipped} workspace package.json files covered by root lock files")
 
-    return lock_files
+def find_javascript_lock_files(root_dir, index=None):
+    """递归查找所有JavaScript包管理器的lock文件"""
+    return list(iter_javascript_lock_files(root_dir, index))
 
 def find_npm_files(root_dir):
     """递归查找所有package.json和lock文件（向后兼容）"""
     return find_javascript_lock_files(root_dir)
 
-def collect_javascript_dependencies(project_path):
-    """收集JavaScript/Node.js项目的所有依赖（支持npm、yarn、pnpm）"""
-    npm_files = find_npm_files(project_path)
-
-    if not npm_files:
-        print(f"No JavaScript lock files or package.json found in {project_path}")
-        return json.dumps([])
-
-    unique_dependencies = set()
-
-    for file_type, file_path in npm_files:
-        print(f"Processing {file_type}: {file_path}")
-
-        if file_type == 'pnpm':
-            # pnpm-lock.yaml
-            dependencies = parse_pnpm_lock_yaml(file_path)
-        elif file_type == 'yarn':
-            # yarn.lock
-            dependencies = parse_yarn_lock(file_path)
-        elif file_type == 'npm_lock':
-            # package-lock.json (npm)
-            dependencies = parse_package_lock_json(file_path)
-        elif file_type == 'npm':
-            # package.json (fallback)
-            dependencies = parse_package_json(file_path)
-        else:
-            continue
+def parse_javascript_manifest(npm_file):
+    """按文件类型解析 (file_type, file_path)"""
+    file_type, file_path = npm_file
+    print(f"Processing {file_type}: {file_path}")
+
+    if file_type == 'pnpm':
+        # pnpm-lock.yaml
+        dependencies = parse_pnpm_lock_yaml(file_path)
+    elif file_type == 'yarn':
+        # yarn.lock
+        dependencies = parse_yarn_lock(file_path)
+    elif file_type == 'npm_lock':
+        # package-lock.json (npm)
+        dependencies = parse_package_lock_json(file_path)
+    elif file_type == 'npm':
+        # package.json (fallback)
+        dependencies = parse_package_json(file_path)
+    else:
+        return []
 
-        if dependencies:
-            print(f"  Found {len(dependencies)} dependencies from {file_type}")
-            unique_dependencies.update(dependencies)
+    if dependencies:
+        print(f"  Found {len(dependencies)} dependencies from {file_type}")
+    return dependencies or []
 
-    print(f"Found {len(unique_dependencies)} unique JavaScript dependencies in total")
-    return llm_communicate(unique_dependencies, system_prompt, 10)
+def iter_javascript_dependencies(project_path, index=None):
+    """边遍历边解析lock文件，逐个产出去重后的依赖"""
+    return iter_unique_dependencies(iter_javascript_lock_files(project_path, index),
+                                    parse_javascript_manifest, "JavaScript", project_path, index=index)
+
+def list_javascript_dependencies(project_path, index=None):
+    """收集JavaScript/Node.js项目的所有依赖（支持npm、yarn、pnpm），返回去重后的依赖列表（不调用LLM）"""
+    return sorted(iter_javascript_dependencies(project_path, index))
+
+def collect_javascript_dependencies(project_path, index=None, as_records=False):
+    """收集JavaScript/Node.js项目的所有依赖（支持npm、yarn、pnpm）"""
+    return llm_communicate(iter_javascript_dependencies(project_path, index), system_prompt, ecosystem="javascript",
+                           as_records=as_records)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+"""
+容错的 LLM JSON 响应提取器
+
+LLM 返回的 JSON 数组经常有轻微错误：外层包了 ```json 代码块、被截断、
+对象之间缺逗号、末尾多逗号等。json.loads 失败时整批结果都会被丢弃。
+这里逐字符扫描响应（支持分块 feed），把每个完整的 {...} 对象单独解析，
+尽可能多地保留 {name, description} 条目。
+"""
+
+import json
+import re
+from typing import Dict, List, Tuple
+
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_CODE_FENCE = re.compile(r'^\s*```[\w-]*[ \t]*\n?(.*?)\n?\s*```\s*$', re.DOTALL)
+# 对象本身不是合法 JSON 时（例如描述里有未转义的引号），退回到按字段提取。
+# 未转义的引号会打乱字符串状态，使扫描到的 {...} 跨越相邻的多个对象，
+# 因此先在对象边界处切开，每个字段只在所属对象的范围内匹配
+_OBJECT_BOUNDARY = re.compile(r'(?<=})\s*,?\s*(?={)')
+_NAME_FIELD = re.compile(r'"name"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_DESC_FIELD = re.compile(r'"description"\s*:\s*"(.*)"\s*}\s*$', re.DOTALL)
+
+
+class JsonObjectExtractor:
+    """
+    增量式对象提取器
+
+    用法：
+        extractor = JsonObjectExtractor()
+        for chunk in chunks:
+            for obj in extractor.feed(chunk):
+                ...
+    只返回最外层的对象（数组中的元素），忽略对象外的任何文本。
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Dict]:
+        objects = []
+        for ch in chunk:
+            if self._depth == 0:
+                if ch == '{':
+                    self._depth = 1
+                    self._buffer = [ch]
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    objects.extend(_load_objects("".join(self._buffer)))
+                    self._buffer = []
+        return objects
+
+    def flush(self) -> List[Dict]:
+        """
+        响应结束时调用：描述中有奇数个未转义的引号时，最后一个对象永远不会闭合，
+        对剩余文本中已经以 } 结束的对象按字段提取（被截断的对象不会匹配）
+        """
+        if not self._depth:
+            return []
+        text = "".join(self._buffer).rstrip().rstrip('`').rstrip().rstrip(']').rstrip()
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        return _load_objects(text)
+
+    @property
+    def incomplete(self) -> bool:
+        """是否还有未闭合的对象（响应被截断）"""
+        return self._depth > 0
+
+
+def _load_objects(text: str) -> List[Dict]:
+    try:
+        obj = json.loads(text)
+        return [obj] if isinstance(obj, dict) else []
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        obj = json.loads(_TRAILING_COMMA.sub(r'\1', text))
+        return [obj] if isinstance(obj, dict) else []
+    except json.JSONDecodeError:
+        pass
+
+    objects = []
+    for segment in _OBJECT_BOUNDARY.split(text):
+        name_match = _NAME_FIELD.search(segment)
+        desc_match = _DESC_FIELD.search(segment)
+        if name_match and desc_match:
+            objects.append({
+                'name': _unescape(name_match.group(1)),
+                'description': _unescape(desc_match.group(1))
+            })
+    return objects
+
+
+def _unescape(value: str) -> str:
+    try:
+        return json.loads(f'"{value}"')
+    except json.JSONDecodeError:
+        return value.replace('\\"', '"')
+
+
+def extract_description_items(response: str) -> Tuple[List[Dict], bool]:
+    """
+    从 LLM 响应中提取 {name, description} 条目
+
+    Returns:
+        (条目列表, 是否为完整合法的 JSON 数组)
+    """
+    if not response:
+        return [], False
+
+    # 外层的 ```json 代码块不影响结果是否完整
+    fenced = _CODE_FENCE.match(response)
+    if fenced:
+        response = fenced.group(1)
+
+    try:
+        parsed = json.loads(response)
+        if isinstance(parsed, list):
+            return [item for item in parsed if _is_description_item(item)], True
+    except json.JSONDecodeError:
+        pass
+
+    extractor = JsonObjectExtractor()
+    objects = extractor.feed(response) + extractor.flush()
+    return [obj for obj in objects if _is_description_item(obj)], False
+
+
+def _is_description_item(item) -> bool:
+    return isinstance(item, dict) and bool(item.get('name')) and 'description' in item
@@ -0,0 +1,209 @@
+"""
+流式 JSON lock 文件读取器
+
+package-lock.json、composer.lock、Pipfile.lock 可能有几十 MB，json.load 会一次性
+构建整个对象树，请求期间产生几百 MB 的临时对象。这里分块读取文件，只遍历顶层对象
+中需要的字段（如 "packages"），逐个解码其中的条目并交给调用方，其余字段直接跳过，
+内存占用只与单个条目大小和读取块大小有关。
+
+小文件走 json.load 快速路径（更快，且结果相同）。
+"""
+
+import json
+import os
+import re
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+CHUNK_SIZE = 1024 * 1024
+# 单个条目的最大长度；超过时认为文件损坏，避免对非法 JSON 反复扩大缓冲区重试
+MAX_VALUE_BYTES = 16 * CHUNK_SIZE
+# 小于该大小的文件直接 json.load（字节）
+STREAM_MIN_BYTES = int(os.getenv("JSON_STREAM_MIN_BYTES", 4 * 1024 * 1024))
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# 数字之后合法的下一个字符；数字后面紧跟其他字符说明数字被块边界截断（如 "1." + "5e10"）
+_VALUE_DELIMITERS = frozenset(' \t\n\r,]}')
+# 跳过值时只需要关注括号和字符串起点
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+# 字符串剩余部分（起始引号之后），直到未转义的结束引号
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """分块读取的文本缓冲区，已处理的部分会被丢弃"""
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """再读一块；文件已读完返回 False"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（文件结束返回空串）"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, ch: str):
+        if self.peek() != ch:
+            raise json.JSONDecodeError(f"Expecting '{ch}'", self.buf, self.pos)
+        self.pos += 1
+
+    def decode(self) -> Any:
+        """解码下一个完整的 JSON 值；值被块边界截断时读入更多内容后重试"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if len(self.buf) - self.pos < MAX_VALUE_BYTES and self.fill():
+                    continue
+                raise
+            # 数字在块末尾可能只读到一部分：到达缓冲区末尾，或者停在了数字中间
+            if type(value) in (int, float) and (end == len(self.buf) or self.buf[end] not in _VALUE_DELIMITERS):
+                if self.fill():
+                    continue
+            elif end == len(self.buf) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def skip(self):
+        """跳过下一个值而不构建对象"""
+        ch = self.peek()
+        if ch not in '{[':
+            self.decode()
+            return
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise json.JSONDecodeError("Unterminated value", self.buf, self.pos)
+                continue
+            token = match.group()
+            if token == '"':
+                tail = _STRING_TAIL.match(self.buf, match.end())
+                if tail is None:
+                    # 字符串被块边界截断
+                    self.pos = match.start()
+                    if not self.fill():
+                        raise json.JSONDecodeError("Unterminated string", self.buf, self.pos)
+                    continue
+                self.pos = tail.end()
+                continue
+            self.pos = match.end()
+            depth += 1 if token in '{[' else -1
+            if depth == 0:
+                return
+
+    def iter_members(self) -> Iterator[Tuple[Optional[str], Any]]:
+        """逐个产出对象的 (key, value) 或数组的 (None, value)，每次只解码一个条目"""
+        opening = self.peek()
+        if opening not in '{[':
+            self.decode()  # 不是容器，没有条目
+            return
+        closing = '}' if opening == '{' else ']'
+        self.pos += 1
+        if self.peek() == closing:
+            self.pos += 1
+            return
+        while True:
+            key = None
+            if opening == '{':
+                key = self.decode()
+                self.expect(':')
+            yield key, self.decode()
+            ch = self.peek()
+            self.pos += 1
+            if ch == closing:
+                return
+            if ch != ',':
+                raise json.JSONDecodeError(f"Expecting ',' or '{closing}'", self.buf, self.pos - 1)
+
+
+def _iter_loaded(data: Any, want: Callable[[str], bool]) -> Iterator[Tuple[str, Optional[str], Any]]:
+    """快速路径：文件已整体加载"""
+    if not isinstance(data, dict):
+        return
+    for section, value in data.items():
+        if not want(section):
+            continue
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield section, key, item
+        elif isinstance(value, list):
+            for item in value:
+                yield section, None, item
+
+
+def iter_json_sections(path: str, sections: Union[Iterable[str], Callable[[str], bool]],
+                       min_stream_bytes: int = None) -> Iterator[Tuple[str, Optional[str], Any]]:
+    """
+    遍历 JSON 文件顶层对象中指定字段的条目
+
+    Args:
+        path: JSON 文件路径
+        sections: 需要的顶层字段名集合，或在遇到每个顶层字段时调用的判断函数
+                  （可以根据已经读到的字段决定是否还需要后面的字段）
+        min_stream_bytes: 文件小于该大小时直接 json.load，默认 JSON_STREAM_MIN_BYTES
+
+    Yields:
+        (字段名, 条目 key（数组元素为 None）, 条目值)
+
+    Raises:
+        json.JSONDecodeError: 文件不是合法 JSON（已产出的条目仍然有效）
+    """
+    want = sections if callable(sections) else set(sections).__contains__
+    threshold = STREAM_MIN_BYTES if min_stream_bytes is None else min_stream_bytes
+
+    with open(path, 'r', encoding='utf-8') as f:
+        if os.fstat(f.fileno()).st_size < threshold:
+            yield from _iter_loaded(json.load(f), want)
+            return
+
+        reader = _Reader(f)
+        if reader.peek() != '{':
+            return
+        for section in _iter_top_level(reader, want):
+            for key, item in reader.iter_members():
+                yield section, key, item
+
+
+def _iter_top_level(reader: _Reader, want: Callable[[str], bool]) -> Iterator[str]:
+    """遍历顶层对象的字段：需要的字段停在值的起点交给调用方读取，其余跳过"""
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        section = reader.decode()
+        reader.expect(':')
+        if want(section):
+            yield section  # 由调用方读取该字段的值
+        else:
+            reader.skip()
+        ch = reader.peek()
+        reader.pos += 1
+        if ch == '}':
+            return
+        if ch != ',':
+            raise json.JSONDecodeError("Expecting ',' or '}'", reader.buf, reader.pos - 1)
@@ -0,0 +1,262 @@
+"""
+清单文件解析结果缓存 - 重复扫描同一项目时只解析有变化的文件
+
+功能：
+1. 按 (文件路径, 解析器) 存储解析出的依赖列表，SQLite 文件在 worker 间共享
+2. 文件大小和 mtime 都没变时直接命中；mtime 变了但内容哈希相同也算命中
+3. 项目是 git 仓库时按 blob id 命中（见 project_index），不需要 stat 和哈希文件
+4. 解析器模块本身被修改后，旧的缓存结果自动失效
+5. 统计命中率，供 /metrics 接口展示
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.getenv("KULIN_CACHE_DIR", os.path.join(PROJECT_ROOT, "cache"))
+DEFAULT_DB_PATH = os.path.join(DEFAULT_CACHE_DIR, "manifest_parse.db")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_path(manifest) -> str:
+    """解析器的清单参数可能是路径，也可能是 (文件类型, 路径)"""
+    return manifest if isinstance(manifest, str) else manifest[-1]
+
+
+class ManifestCache:
+    """基于 SQLite 的清单解析结果缓存（线程安全，可被多个 gunicorn worker 共享）"""
+
+    def __init__(self, db_path: str = None, ttl: float = None):
+        """
+        Args:
+            db_path: SQLite 文件路径，默认 cache/manifest_parse.db
+            ttl: 条目多久没有被重新验证就删除（秒），默认 30 天
+        """
+        self.db_path = db_path or os.getenv("MANIFEST_CACHE_PATH", DEFAULT_DB_PATH)
+        self.ttl = ttl if ttl is not None else float(os.getenv("MANIFEST_CACHE_TTL", 30 * 86400))
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._local = threading.local()
+        self._parser_versions: Dict[Callable, str] = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'hash_hits': 0, 'git_hits': 0, 'misses': 0}
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程使用独立连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS manifest_results (
+                    path TEXT NOT NULL,
+                    parser TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    dependencies TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (path, parser)
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(manifest_results)")}
+            if 'content_id' not in columns:
+                conn.execute("ALTER TABLE manifest_results ADD COLUMN content_id TEXT")
+            conn.execute("DELETE FROM manifest_results WHERE updated_at < ?", (time.time() - self.ttl,))
+
+    def parser_key(self, parse_manifest: Callable, manifest) -> str:
+        """解析器标识: 函数名 + 文件类型 + 解析器模块的修改时间（模块改动后缓存失效）"""
+        version = self._parser_versions.get(parse_manifest)
+        if version is None:
+            module = sys.modules.get(parse_manifest.__module__)
+            try:
+                version = str(os.stat(module.__file__).st_mtime_ns)
+            except (AttributeError, TypeError, OSError):
+                version = "0"
+            self._parser_versions[parse_manifest] = version
+        file_type = "" if isinstance(manifest, str) else ":".join(str(part) for part in manifest[:-1])
+        return f"{parse_manifest.__module__}.{parse_manifest.__name__}:{file_type}@{version}"
+
+    def lookup(self, path: str, parser: str,
+               content_id: Optional[str] = None) -> Tuple[Optional[List[str]], Optional[Tuple]]:
+        """
+        查询缓存
+
+        Args:
+            content_id: 文件内容标识（git blob id），与缓存中记录的相同时不再检查文件
+
+        Returns:
+            (依赖列表或 None, 文件指纹 (size, mtime_ns, sha256, content_id)，文件不存在时为 None)
+        """
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT size, mtime_ns, sha256, dependencies, content_id FROM manifest_results "
+            "WHERE path = ? AND parser = ?",
+            (path, parser)
+        ).fetchone()
+
+        if content_id and row and row[4] == content_id:
+            self._record('git_hits')
+            return json.loads(row[3]), (row[0], row[1], row[2], content_id)
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None, None
+        size, mtime_ns = stat.st_size, stat.st_mtime_ns
+
+        if row and row[0] == size and row[1] == mtime_ns:
+            if content_id:
+                with conn:
+                    conn.execute("UPDATE manifest_results SET content_id = ? WHERE path = ? AND parser = ?",
+                                 (content_id, path, parser))
+            self._record('hits')
+            return json.loads(row[3]), (size, mtime_ns, row[2], content_id)
+
+        sha = file_sha256(path)
+        if row and row[0] == size and row[2] == sha:
+            # 内容没变（例如重新上传或 touch），更新 mtime 后命中
+            with conn:
+                conn.execute(
+                    "UPDATE manifest_results SET mtime_ns = ?, content_id = ?, updated_at = ? "
+                    "WHERE path = ? AND parser = ?",
+                    (mtime_ns, content_id, time.time(), path, parser)
+                )
+            self._record('hash_hits')
+            return json.loads(row[3]), (size, mtime_ns, sha, content_id)
+
+        self._record('misses')
+        return None, (size, mtime_ns, sha, content_id)
+
+    def store(self, path: str, parser: str, fingerprint: Tuple, dependencies):
+        """dependencies: 依赖列表，或其他可 JSON 序列化的解析结果（如 Maven 原始模型）"""
+        size, mtime_ns, sha, content_id = fingerprint
+        if not isinstance(dependencies, (list, dict)):
+            dependencies = list(dependencies)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO manifest_results "
+                "(path, parser, size, mtime_ns, sha256, dependencies, updated_at, content_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, parser, size, mtime_ns, sha, json.dumps(dependencies, ensure_ascii=False), time.time(),
+                 content_id)
+            )
+
+    def _record(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total = stats['hits'] + stats['hash_hits'] + stats['git_hits'] + stats['misses']
+        entries = self._connect().execute("SELECT COUNT(*) FROM manifest_results").fetchone()[0]
+        return dict(
+            stats,
+            db_path=self.db_path,
+            entries=entries,
+            hit_rate=round((stats['hits'] + stats['hash_hits'] + stats['git_hits']) / total, 4) if total else 0.0
+        )
+
+
+def lookup_cached(parse_manifest: Callable, manifest,
+                  content_ids: Optional[Dict[str, str]] = None) -> Tuple[Any, Optional[Tuple]]:
+    """
+    查询单个清单文件的缓存结果
+
+    content_ids: ProjectIndex.content_ids（git 仓库中未修改文件的 blob id），可为 None
+
+    Returns:
+        (命中的结果或 None, 未命中时传给 store_cached 的写入信息；缓存不可用时为 None)
+    """
+    cache = get_manifest_cache()
+    if cache is None:
+        return None, None
+
+    path = manifest_path(manifest)
+    parser = cache.parser_key(parse_manifest, manifest)
+    try:
+        content_id = content_ids.get(os.path.normpath(path)) if content_ids else None
+        result, fingerprint = cache.lookup(path, parser, content_id)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[解析缓存] 查询失败 ({path}): {str(e)}")
+        return None, None
+    if result is not None or fingerprint is None:
+        return result, None
+    return None, (cache, path, parser, fingerprint)
+
+
+def store_cached(pending: Optional[Tuple], result):
+    """写入 lookup_cached 未命中的解析结果（指纹在解析之前取得，解析期间文件被修改时下次会重新解析）"""
+    if pending is None:
+        return
+    cache, path, parser, fingerprint = pending
+    try:
+        cache.store(path, parser, fingerprint, [] if result is None else result)
+    except sqlite3.Error as e:
+        print(f"[解析缓存] 写入失败 ({path}): {str(e)}")
+
+
+def parse_with_cache(parse_manifest: Callable, manifest, content_ids: Optional[Dict[str, str]] = None):
+    """带缓存地解析单个清单文件（结果需可 JSON 序列化）；缓存关闭或文件无法读取时直接解析"""
+    result, pending = lookup_cached(parse_manifest, manifest, content_ids)
+    if result is None:
+        result = parse_manifest(manifest)
+        if result is None:
+            result = []
+        store_cached(pending, result)
+    return result
+
+
+_cache_instance: Optional[ManifestCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_manifest_cache() -> Optional[ManifestCache]:
+    """获取全局解析结果缓存实例（懒加载），设置 MANIFEST_CACHE_ENABLED=false 可关闭"""
+    global _cache_instance
+    if os.getenv("MANIFEST_CACHE_ENABLED", "true").lower() == "false":
+        return None
+
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                try:
+                    _cache_instance = ManifestCache()
+                except sqlite3.Error as e:
+                    print(f"[解析缓存] 初始化失败，跳过缓存: {str(e)}")
+                    return None
+    return _cache_instance
+
+
+def get_manifest_cache_stats() -> Dict:
+    """获取缓存统计，缓存关闭时返回 enabled=False"""
+    cache = get_manifest_cache()
+    if cache is None:
+        return {'enabled': False}
+    return dict(cache.get_stats(), enabled=True)
@@ -0,0 +1,282 @@
+"""
+Maven 多模块模型解析 - 继承 parent、properties、dependencyManagement 和 BOM
+
+企业多模块项目中大部分依赖不写 <version>，版本来自 parent 的 <dependencyManagement>、
+导入的 BOM 或 ${property} 占位符。这里：
+1. 用 iterparse 读取每个 pom.xml 的原始模型（坐标、parent、properties、依赖、插件），
+   原始模型只与文件本身有关，按文件内容缓存（见 manifest_cache）
+2. 在扫描到的模块之间解析 parent 链和 BOM 导入，每个 POM 的有效模型只计算一次并记忆化，
+   400 个模块的项目也只是一次线性遍历
+3. 用模块的有效 properties 替换占位符，缺少版本的依赖从 dependencyManagement 中补全
+
+项目外部的 parent/BOM（如 spring-boot-starter-parent）无法解析，对应的依赖仍然缺少版本。
+"""
+
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from parase.manifest_cache import parse_with_cache
+from parase.parallel_parse import iter_parsed
+
+_PLACEHOLDER = re.compile(r'\$\{([^}]+)\}')
+# 嵌套属性（${a} -> ${b} -> 值）最多展开的层数
+_MAX_INTERPOLATION_DEPTH = 10
+DEFAULT_PLUGIN_GROUP = 'org.apache.maven.plugins'
+
+_COORDINATE_FIELDS = ('groupId', 'artifactId', 'version')
+_DEPENDENCY_FIELDS = ('groupId', 'artifactId', 'version', 'type', 'scope')
+
+
+def _local(tag: str) -> str:
+    """去掉命名空间：{http://maven.apache.org/POM/4.0.0}version -> version"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _child_texts(elem, names) -> Dict[str, str]:
+    values = {}
+    for child in elem:
+        name = _local(child.tag)
+        if name in names and child.text and child.text.strip():
+            values[name] = child.text.strip()
+    return values
+
+
+def read_pom_model(pom_path: str) -> Dict:
+    """
+    用 iterparse 读取 pom.xml 的原始模型（不做继承和占位符替换）
+
+    Returns:
+        {groupId, artifactId, version, parent, properties, managed, dependencies,
+         managed_plugins, plugins}，文件无法解析时返回 {}
+    """
+    model = {'parent': None, 'properties': {}, 'managed': [], 'dependencies': [],
+             'managed_plugins': [], 'plugins': []}
+    stack = []
+    try:
+        for event, elem in ET.iterparse(pom_path, events=('start', 'end')):
+            if event == 'start':
+                stack.append(_local(elem.tag))
+                continue
+
+            name = stack[-1]
+            depth = len(stack)
+            if depth == 2 and name in _COORDINATE_FIELDS and elem.text:
+                model[name] = elem.text.strip()
+            elif depth == 2 and name == 'parent':
+                model['parent'] = _child_texts(elem, _COORDINATE_FIELDS + ('relativePath',))
+                # <relativePath/> 表示不在本地查找 parent
+                model['parent'].setdefault('relativePath', '' if _has_child(elem, 'relativePath') else '../pom.xml')
+            elif depth == 3 and stack[1] == 'properties':
+                model['properties'][name] = (elem.text or '').strip()
+            elif name == 'dependency':
+                # 其他位置（profile、插件的 dependencies）中的依赖也记录，与之前的行为一致
+                target = 'managed' if 'dependencyManagement' in stack else 'dependencies'
+                model[target].append(_child_texts(elem, _DEPENDENCY_FIELDS))
+                elem.clear()
+            elif name == 'plugin':
+                target = 'managed_plugins' if 'pluginManagement' in stack else 'plugins'
+                model[target].append(_child_texts(elem, _COORDINATE_FIELDS))
+                elem.clear()
+            stack.pop()
+        return model
+
+    except ET.ParseError as e:
+        print(f"XML解析错误 ({pom_path}): {str(e)}")
+        return {}
+    except Exception as e:
+        print(f"处理文件失败 ({pom_path}): {str(e)}")
+        return {}
+
+
+def _has_child(elem, name: str) -> bool:
+    return any(_local(child.tag) == name for child in elem)
+
+
+def interpolate(value: str, properties: Dict[str, str]) -> str:
+    """替换 ${property} 占位符，无法解析的占位符原样保留"""
+    for _ in range(_MAX_INTERPOLATION_DEPTH):
+        if '${' not in value:
+            break
+        replaced = _PLACEHOLDER.sub(lambda m: properties.get(m.group(1), m.group(0)), value)
+        if replaced == value:
+            break
+        value = replaced
+    return value
+
+
+class _EffectiveModel:
+    """继承 parent 并导入 BOM 之后的模型（properties 已合并，管理的版本尚未替换占位符）"""
+
+    __slots__ = ('groupId', 'artifactId', 'version', 'properties', 'managed', 'managed_plugins')
+
+    def __init__(self):
+        self.groupId = ''
+        self.artifactId = ''
+        self.version = ''
+        self.properties: Dict[str, str] = {}
+        self.managed: Dict[Tuple[str, str, str], str] = {}
+        self.managed_plugins: Dict[Tuple[str, str], str] = {}
+
+
+class MavenReactor:
+    """
+    一次扫描中所有 pom.xml 的集合，按需解析每个模块的有效模型并记忆化
+
+    用法：
+        reactor = MavenReactor()
+        for pom_path in reactor.iter_modules(pom_paths):   # 先读取所有原始模型
+            deps = reactor.module_dependencies(pom_path)
+    """
+
+    def __init__(self, content_ids: Optional[Dict[str, str]] = None, cached: bool = True):
+        """
+        Args:
+            content_ids: git 仓库中未修改文件的 blob id（ProjectIndex.content_ids），原始模型缓存按此命中
+            cached: 是否缓存原始模型（见 manifest_cache）
+        """
+        self._content_ids = content_ids
+        self._cached = cached
+        self._models: Dict[str, Dict] = {}
+        self._by_coordinates: Dict[Tuple[str, str], List[str]] = {}
+        self._effective: Dict[str, _EffectiveModel] = {}
+        self._resolving = set()
+
+    def iter_modules(self, pom_paths: Iterable[str]) -> Iterator[str]:
+        """读取所有模块的原始模型（建立坐标索引，供按坐标查找 parent/BOM），然后逐个产出路径"""
+        paths = [os.path.normpath(path) for path in pom_paths]
+        for path, model in iter_parsed(paths, read_pom_model, self._cached, self._content_ids):
+            self._add(path, model)
+        yield from paths
+
+    def _load(self, path: str) -> Dict:
+        model = self._models.get(path)
+        if model is None:
+            if self._cached:
+                model = self._add(path, parse_with_cache(read_pom_model, path, self._content_ids))
+            else:
+                model = self._add(path, read_pom_model(path))
+        return model
+
+    def _add(self, path: str, model: Dict) -> Dict:
+        model = model or {}
+        self._models[path] = model
+        if model.get('artifactId'):
+            parent = model.get('parent') or {}
+            group_id = model.get('groupId') or parent.get('groupId', '')
+            self._by_coordinates.setdefault((group_id, model['artifactId']), []).append(path)
+        return model
+
+    def _find(self, group_id: str, artifact_id: str, version: str = '',
+              candidate: str = None) -> Optional[str]:
+        """按 relativePath 或坐标在项目中查找 POM"""
+        if candidate:
+            if os.path.isdir(candidate):
+                candidate = os.path.join(candidate, 'pom.xml')
+            candidate = os.path.normpath(candidate)
+            if os.path.isfile(candidate):
+                model = self._load(candidate)
+                if model.get('artifactId') == artifact_id:
+                    return candidate
+        paths = self._by_coordinates.get((group_id, artifact_id), [])
+        for path in paths:
+            if not version or self.effective(path).version == version:
+                return path
+        return paths[0] if paths else None
+
+    def effective(self, path: str) -> _EffectiveModel:
+        """计算（并记忆化）模块的有效模型；parent/BOM 各自只解析一次"""
+        result = self._effective.get(path)
+        if result is not None:
+            return result
+
+        model = self._load(path)
+        result = _EffectiveModel()
+        if path in self._resolving:
+            return result  # parent 循环引用
+        self._resolving.add(path)
+        try:
+            parent = model.get('parent')
+            if parent:
+                relative = parent.get('relativePath')
+                parent_path = self._find(
+                    parent.get('groupId', ''), parent.get('artifactId', ''), parent.get('version', ''),
+                    os.path.join(os.path.dirname(path), relative) if relative else None
+                )
+                if parent_path:
+                    inherited = self.effective(parent_path)
+                    result.properties.update(inherited.properties)
+                    result.managed.update(inherited.managed)
+                    result.managed_plugins.update(inherited.managed_plugins)
+
+            parent = parent or {}
+            result.groupId = model.get('groupId') or parent.get('groupId', '')
+            result.artifactId = model.get('artifactId', '')
+            result.version = model.get('version') or parent.get('version', '')
+            result.properties.update(model.get('properties', {}))
+            for prefix in ('project.', 'pom.', ''):
+                result.properties[prefix + 'groupId'] = result.groupId
+                result.properties[prefix + 'artifactId'] = result.artifactId
+                result.properties[prefix + 'version'] = result.version
+            result.properties['project.parent.groupId'] = parent.get('groupId', '')
+            result.properties['project.parent.version'] = parent.get('version', '')
+            result.properties['parent.version'] = parent.get('version', '')
+
+            for entry in model.get('managed', []):
+                if entry.get('scope') == 'import' and entry.get('type') == 'pom':
+                    self._import_bom(entry, result)
+                elif entry.get('version'):
+                    key = (interpolate(entry.get('groupId', ''), result.properties),
+                           interpolate(entry.get('artifactId', ''), result.properties),
+                           entry.get('type', 'jar'))
+                    result.managed[key] = entry['version']
+            for plugin in model.get('managed_plugins', []):
+                if plugin.get('version'):
+                    key = (interpolate(plugin.get('groupId', DEFAULT_PLUGIN_GROUP), result.properties),
+                           interpolate(plugin.get('artifactId', ''), result.properties))
+                    result.managed_plugins[key] = plugin['version']
+        finally:
+            self._resolving.discard(path)
+
+        self._effective[path] = result
+        return result
+
+    def _import_bom(self, entry: Dict, result: _EffectiveModel):
+        """导入项目内的 BOM：其管理的版本在 BOM 自己的上下文中替换占位符，不覆盖已声明的条目"""
+        group_id = interpolate(entry.get('groupId', ''), result.properties)
+        artifact_id = interpolate(entry.get('artifactId', ''), result.properties)
+        version = interpolate(entry.get('version', ''), result.properties)
+        bom_path = self._find(group_id, artifact_id, version)
+        if not bom_path:
+            return
+        bom = self.effective(bom_path)
+        for key, managed_version in bom.managed.items():
+            result.managed.setdefault(key, interpolate(managed_version, bom.properties))
+
+    def module_dependencies(self, path: str) -> List[str]:
+        """模块的依赖和插件（groupId:artifactId:version），版本已补全并替换占位符"""
+        model = self._load(path)
+        if not model:
+            return []
+        effective = self.effective(path)
+        properties = effective.properties
+        dependencies = []
+
+        # dependencyManagement 中声明的条目本身也记录（与之前的行为一致）
+        for entry in model.get('managed', []) + model.get('dependencies', []):
+            group_id = interpolate(entry.get('groupId', ''), properties)
+            artifact_id = interpolate(entry.get('artifactId', ''), properties)
+            version = entry.get('version') or effective.managed.get(
+                (group_id, artifact_id, entry.get('type', 'jar')), '')
+            if version:  # 仅记录能确定版本的条目
+                dependencies.append(f"{group_id}:{artifact_id}:{interpolate(version, properties)}")
+
+        for plugin in model.get('plugins', []) + model.get('managed_plugins', []):
+            group_id = interpolate(plugin.get('groupId', DEFAULT_PLUGIN_GROUP), properties)
+            artifact_id = interpolate(plugin.get('artifactId', ''), properties)
+            version = plugin.get('version') or effective.managed_plugins.get((group_id, artifact_id), '')
+            if version:
+                dependencies.append(f"{group_id}:{artifact_id}:{interpolate(version, properties)}")
+
+        return dependencies
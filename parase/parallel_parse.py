@@ -0,0 +1,197 @@
+"""
+清单文件并行解析 - 大型单体仓库的清单文件交给进程池解析
+
+同一语言的清单文件原本在一个线程中逐个解析，XML/JSON 解码是 CPU 密集的，
+几百个 pom.xml、go.mod、Cargo.toml 时会受 GIL 限制。这里：
+1. 先从清单迭代器中预读，文件数或总大小超过阈值才启用进程池，小项目仍在本进程解析，
+   避免进程池启动开销
+2. 解析结果缓存（manifest_cache）在本进程查询和写入，只有未命中的文件交给进程池
+3. 按输入顺序产出结果，合并去重的结果与顺序解析完全一致
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from parase.manifest_cache import lookup_cached, manifest_path, parse_with_cache, store_cached
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def pool_enabled() -> bool:
+    """单核机器上进程池只有开销，不启用"""
+    return os.getenv("PARSE_POOL_ENABLED", "true").lower() != "false" and pool_workers() > 1
+
+
+def _file_size(manifest) -> int:
+    try:
+        return os.path.getsize(manifest_path(manifest))
+    except OSError:
+        return 0
+
+
+# 需要在本进程解析的条目（未提交到进程池，或子进程解析失败）；
+# 与 None/空结果区分，子进程正常解析出的空结果直接使用
+_UNPARSED = object()
+
+
+def _parse_in_worker(parse_manifest: Callable, manifest):
+    """在子进程中解析单个清单文件"""
+    return parse_manifest(manifest)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'in_process_runs': 0, 'pool_runs': 0, 'pool_files': 0, 'pool_failures': 0}
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """全局解析进程池（懒加载）；Linux 上用 forkserver，避免在多线程的服务进程中直接 fork"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                _pool = ProcessPoolExecutor(max_workers=pool_workers(), mp_context=context)
+    return _pool
+
+
+def pool_workers() -> int:
+    return max(1, _env_int("PARSE_POOL_WORKERS", os.cpu_count() or 2))
+
+
+def _reset_pool():
+    """进程池损坏（子进程被杀）时丢弃，下次使用时重建"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+def _record(name: str, count: int = 1):
+    with _stats_lock:
+        _stats[name] += count
+
+
+def _parse_local(parse_manifest: Callable, manifest, cached: bool, content_ids: Optional[Dict[str, str]]):
+    if cached:
+        return parse_with_cache(parse_manifest, manifest, content_ids)
+    result = parse_manifest(manifest)
+    return [] if result is None else result
+
+
+def iter_parsed(manifests: Iterable, parse_manifest: Callable, cached: bool = True,
+                content_ids: Optional[Dict[str, str]] = None) -> Iterator[Tuple[Any, Any]]:
+    """
+    解析清单文件，按输入顺序产出 (清单, 解析结果)
+
+    Args:
+        manifests: 清单迭代器（路径或 (文件类型, 路径)）
+        parse_manifest: 模块级解析函数（需要能被 pickle 传给子进程）
+        cached: 是否使用解析结果缓存
+        content_ids: git 仓库中未修改文件的 blob id（ProjectIndex.content_ids），缓存按此直接命中
+    """
+    manifests = iter(manifests)
+    min_files = _env_int("PARSE_POOL_MIN_FILES", 64)
+    min_bytes = _env_int("PARSE_POOL_MIN_BYTES", 8 * 1024 * 1024)
+
+    # 预读到超过阈值为止；清单较少时全部在本进程解析
+    prefetched = []
+    total_bytes = 0
+    use_pool = False
+    if pool_enabled():
+        for manifest in manifests:
+            prefetched.append(manifest)
+            total_bytes += _file_size(manifest)
+            if len(prefetched) >= min_files or total_bytes >= min_bytes:
+                use_pool = True
+                break
+
+    if not use_pool:
+        _record('in_process_runs')
+        for manifest in chain(prefetched, manifests):
+            yield manifest, _parse_local(parse_manifest, manifest, cached, content_ids)
+        return
+
+    _record('pool_runs')
+    yield from _iter_parsed_pool(chain(prefetched, manifests), parse_manifest, cached, content_ids)
+
+
+def _iter_parsed_pool(manifests: Iterator, parse_manifest: Callable, cached: bool,
+                      content_ids: Optional[Dict[str, str]]) -> Iterator[Tuple[Any, Any]]:
+    pool = get_parse_pool()
+    # 同时提交的任务数上限，保持流式产出且不会一次性把所有文件排进队列
+    window = 4 * pool_workers()
+    inflight = deque()  # (清单, future 或 None, 缓存命中的结果或 _UNPARSED, 缓存待写入信息)
+    broken = False
+
+    def submit(manifest):
+        nonlocal broken
+        result, pending = lookup_cached(parse_manifest, manifest, content_ids) if cached else (None, None)
+        if result is not None:
+            inflight.append((manifest, None, result, None))
+            return
+        if broken:
+            inflight.append((manifest, None, _UNPARSED, pending))
+            return
+        try:
+            inflight.append((manifest, pool.submit(_parse_in_worker, parse_manifest, manifest), None, pending))
+            _record('pool_files')
+        except (BrokenProcessPool, RuntimeError):
+            broken = True
+            inflight.append((manifest, None, _UNPARSED, pending))
+
+    exhausted = False
+    while True:
+        while not exhausted and len(inflight) < window:
+            manifest = next(manifests, None)
+            if manifest is None:
+                exhausted = True
+            else:
+                submit(manifest)
+        if not inflight:
+            return
+
+        manifest, future, result, pending = inflight.popleft()
+        if future is not None:
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # 子进程异常退出：剩余文件回到本进程解析
+                if not broken:
+                    print("[并行解析] 进程池不可用，改为在本进程解析")
+                    _record('pool_failures')
+                    _reset_pool()
+                    broken = True
+                result = _UNPARSED
+            except Exception as e:
+                # 例如解析函数无法 pickle：在本进程重新解析
+                print(f"[并行解析] 子进程解析失败，改为在本进程解析: {str(e)}")
+                result = _UNPARSED
+        if result is _UNPARSED:
+            result = parse_manifest(manifest)
+        if result is None:
+            result = []
+        store_cached(pending, result)
+        yield manifest, result
+
+
+def get_parse_pool_stats() -> Dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['enabled'] = pool_enabled()
+    stats['pool_started'] = _pool is not None
+    return stats
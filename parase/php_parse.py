@@ -2,6 +2,9 @@ import os
 import json
 
 from parase.pom_parse import llm_communicate
+from parase.dependency_stream import iter_unique_dependencies
+from parase.project_index import walk_manifests
+from parase.json_stream import iter_json_sections
 
 system_prompt = """Generate technical descriptions in English for PHP Composer dependencies following these rules:
 1. For each dependency in format 'vendor/package version' (e.g. laravel/framework 10.0.0)
@@ -65,28 +68,18 @@ def parse_composer_json(composer_json_path):
         return []
 
 def parse_composer_lock(composer_lock_path):
-    """解析composer.lock文件并提取依赖信息"""
+    """解析composer.lock文件并提取依赖信息（大文件流式读取，只解码 packages/packages-dev 中的条目）"""
     try:
-        with open(composer_lock_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
         dependencies = []
 
-        # 提取packages
-        if 'packages' in data and isinstance(data['packages'], list):
-            for package in data['packages']:
-                name = package.get('name', '')
-                version = package.get('version', '').lstrip('v')
-                if name and version:
-                    dependencies.append(f"{name} {version}")
-
-        # 提取packages-dev
-        if 'packages-dev' in data and isinstance(data['packages-dev'], list):
-            for package in data['packages-dev']:
-                name = package.get('name', '')
-                version = package.get('version', '').lstrip('v')
-                if name and version:
-                    dependencies.append(f"{name} {version}")
+        # 提取packages和packages-dev
+        for _, _, package in iter_json_sections(composer_lock_path, ('packages', 'packages-dev')):
+            if not isinstance(package, dict):
+                continue
+            name = package.get('name', '')
+            version = package.get('version', '').lstrip('v')
+            if name and version:
+                dependencies.append(f"{name} {version}")
 
         return dependencies
 
@@ -97,38 +90,39 @@ def parse_composer_lock(composer_lock_path):
         print(f"处理composer.lock文件失败 ({composer_lock_path}): {str(e)}")
         return []
 
-def find_composer_files(root_dir):
-    """递归查找所有composer文件"""
-    composer_files = []
-    for dirpath, _, filenames in os.walk(root_dir):
+def iter_composer_files(root_dir, index=None):
+    """递归查找composer文件（生成器，读取共享项目索引，跳过 node_modules 等目录）"""
+    for dirpath, filenames in walk_manifests(root_dir, index):
         # 优先使用composer.lock（版本更精确）
         if 'composer.lock' in filenames:
-            composer_files.append(('lock', os.path.join(dirpath, 'composer.lock')))
+            yield ('lock', os.path.join(dirpath, 'composer.lock'))
         elif 'composer.json' in filenames:
-            composer_files.append(('json', os.path.join(dirpath, 'composer.json')))
-
-    return composer_files
+            yield ('json', os.path.join(dirpath, 'composer.json'))
 
-def collect_php_dependencies(project_path):
-    """收集PHP项目的所有依赖"""
-    composer_files = find_composer_files(project_path)
-
-    if not composer_files:
-        print(f"No composer.json or composer.lock files found in {project_path}")
-        return json.dumps([])
+def find_composer_files(root_dir, index=None):
+    """递归查找所有composer文件"""
+    return list(iter_composer_files(root_dir, index))
 
-    unique_dependencies = set()
+def parse_composer_manifest(composer_file):
+    """按文件类型解析 (file_type, file_path)"""
+    file_type, file_path = composer_file
+    if file_type == 'lock':
+        return parse_composer_lock(file_path)
+    return parse_composer_json(file_path)
 
-    for file_type, file_path in composer_files:
-        if file_type == 'lock':
-            dependencies = parse_composer_lock(file_path)
-        else:
-            dependencies = parse_composer_json(file_path)
+def iter_php_dependencies(project_path, index=None):
+    """边遍历边解析composer文件，逐个产出去重后的依赖"""
+    return iter_unique_dependencies(iter_composer_files(project_path, index), parse_composer_manifest, "PHP", project_path,
+                                    index=index)
 
-        unique_dependencies.update(dependencies)
+def list_php_dependencies(project_path, index=None):
+    """收集PHP项目的所有依赖，返回去重后的依赖列表（不调用LLM）"""
+    return sorted(iter_php_dependencies(project_path, index))
 
-    print(f"Found {len(unique_dependencies)} unique PHP dependencies")
-    return llm_communicate(unique_dependencies, system_prompt, 10)
+def collect_php_dependencies(project_path, index=None, as_records=False):
+    """收集PHP项目的所有依赖"""
+    return llm_communicate(iter_php_dependencies(project_path, index), system_prompt, ecosystem="php",
+                           as_records=as_records)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,18 @@
 import json
 import os
+import queue
+import re
+import threading
 import time
-import xml.etree.ElementTree as ET
+from collections import deque
 
-from llm.llm import QwenClient
+from parase.batch_budget import get_batch_controller, looks_truncated
+from parase.dependency_stream import iter_unique_dependencies
+from parase.project_index import manifest_paths
+from parase.maven_model import MavenReactor
+from parase.description_cache import get_description_cache
+from parase.json_salvage import extract_description_items
+from parase.dependency_record import make_dependency
 
 
 # 批量处理提示词模板
@@ -24,77 +33,190 @@ Example:
 }]"""
 
 def parse_pom_file(pom_path):
-    """解析本地pom.xml文件并提取依赖信息"""
+    """解析本地pom.xml文件并提取依赖信息（同时解析本地 parent 链、properties 和 dependencyManagement）"""
+    reactor = MavenReactor()
+    for path in reactor.iter_modules([pom_path]):
+        return reactor.module_dependencies(path)
+    return []
+
+def iter_pom_files(root_dir, index=None):
+    """递归查找pom.xml文件（生成器，从共享项目索引中按文件名取出，跳过 node_modules 等目录）"""
+    yield from manifest_paths(root_dir, 'pom.xml', index)
+
+def find_pom_files(root_dir, index=None):
+    """递归查找所有pom.xml文件"""
+    return list(iter_pom_files(root_dir, index))
+
+def iter_maven_dependencies(project_folder, index=None):
+    """
+    解析所有pom.xml，逐个产出去重后的依赖
+
+    先读取所有模块的原始模型（按文件缓存，模块较多时并行读取），再在模块之间解析 parent/BOM 继承；
+    模块的依赖还取决于其 parent，因此不按单个文件缓存最终结果
+    """
+    if index is None:
+        reactor = MavenReactor()
+    else:
+        reactor = MavenReactor(index.content_ids, index.use_manifest_cache)
+    return iter_unique_dependencies(reactor.iter_modules(iter_pom_files(project_folder, index)),
+                                    reactor.module_dependencies, "Maven", project_folder,
+                                    cached=False, parallel=False)
+
+def list_maven_dependencies(project_folder, index=None):
+    """解析所有pom.xml，返回去重后的依赖列表（不调用LLM）"""
+    return sorted(iter_maven_dependencies(project_folder, index))
+
+def process_projects(project_folder, index=None, as_records=False):
+    return llm_communicate(iter_maven_dependencies(project_folder, index), system_prompt, ecosystem="java",
+                           as_records=as_records)
+
+# 名称与版本之间的分隔符：LLM 常把 'lodash 4.17.21' 写成 'lodash@4.17.21' 或 'lodash:4.17.21'；
+# 开头的 @（npm 作用域包）不是分隔符
+_NAME_SEPARATORS = re.compile(r'(?<=\S)[\s@:]+')
+
+def _match_key(name):
+    """LLM 有时会改写空白、大小写或名称与版本之间的分隔符，用规范化后的名称把结果对应回输入依赖"""
+    return _NAME_SEPARATORS.sub(" ", str(name).strip()).lower()
+
+def _match_batch(items, batch, pending_keys):
+    """
+    把 LLM 返回的条目对应到输入依赖，返回 {依赖: 描述}
+
+    先按规范化名称匹配；名称对不上但条目数与批次相同时，按批次内的位置对应剩余条目
+    """
+    matched = {}
+    leftovers = []
+    for position, item in enumerate(items):
+        dep = pending_keys.get(_match_key(item['name']))
+        if dep and dep not in matched:
+            matched[dep] = item.get('description', '')
+        else:
+            leftovers.append(position)
+    if leftovers and len(items) == len(batch):
+        for position in leftovers:
+            dep = batch[position]
+            if dep not in matched:
+                matched[dep] = items[position].get('description', '')
+    return matched
+
+_SOURCE_DONE = object()
+
+class _SourceFailed:
+    """队列中的结束标记：依赖生成器抛出了异常"""
+
+    def __init__(self, error):
+        self.error = error
+
+def _produce(source, arrivals):
+    """生产者线程：遍历依赖生成器（文件系统遍历 + 清单解析），逐个放入队列；异常交给消费者重新抛出"""
     try:
-        # 读取文件内容
-        with open(pom_path, 'r', encoding='utf-8') as f:
-            xml_content = f.read()
-
-        # 解析XML内容
-        root = ET.fromstring(xml_content)
-        dependencies = []
-        ns = {'maven': 'http://maven.apache.org/POM/4.0.0'}
-
-        # 处理依赖项
-        for element in root.findall('.//maven:dependency', ns):
-            group_id = element.findtext('maven:groupId', namespaces=ns) or ""
-            artifact_id = element.findtext('maven:artifactId', namespaces=ns) or ""
-            version = element.findtext('maven:version', namespaces=ns) or ""
-
-            if version:  # 仅记录有版本号的条目
-                dependencies.append(f"{group_id}:{artifact_id}:{version}")
-
-        # 处理插件项
-        for plugin in root.findall('.//maven:plugin', ns):
-            group_id = plugin.findtext('maven:groupId', namespaces=ns) or ""
-            artifact_id = plugin.findtext('maven:artifactId', namespaces=ns) or ""
-            version = plugin.findtext('maven:version', namespaces=ns) or ""
-
-            if version:
-                dependencies.append(f"{group_id}:{artifact_id}:{version}")
-
-        return dependencies
-
-    except ET.ParseError as e:
-        print(f"XML解析错误 ({pom_path}): {str(e)}")
-        return []
+        for dep in source:
+            arrivals.put(dep)
     except Exception as e:
-        print(f"处理文件失败 ({pom_path}): {str(e)}")
-        return []
+        arrivals.put(_SourceFailed(e))
+    else:
+        arrivals.put(_SOURCE_DONE)
 
-def find_pom_files(root_dir):
-    """递归查找所有pom.xml文件"""
-    pom_files = []
-    for dirpath, _, filenames in os.walk(root_dir):
-        for filename in filenames:
-            if filename.lower() == 'pom.xml':
-                pom_files.append(os.path.join(dirpath, filename))
-    return pom_files
+def llm_communicate(unique_dependencies, system_prompt, batch_size=None, ecosystem=None, on_result=None,
+                    as_records=False):
+    """
+    为依赖批量生成描述
 
-def process_projects(project_folder):
-    pom_files = find_pom_files(project_folder)
-    if not pom_files:
-        print(f"No pom.xml files found in {project_folder}")
-        return json.dumps([])
+    Args:
+        unique_dependencies: 依赖字符串集合/列表，或逐个产出依赖的生成器。
+                             传入生成器时，清单解析在后台线程进行，累积到一个
+                             完整批次就立即发送，解析与 LLM 请求流水线重叠
+        system_prompt: 对应语言的提示词
+        batch_size: 每批最多依赖数（可选）。批次大小主要由 token 预算决定，
+                    见 parase/batch_budget.py
+        ecosystem: 语言标识 (java/go/javascript/...)，提供时启用描述缓存，
+                   只有缓存未命中的依赖会发送给 LLM
+        on_result: 可选回调，每当有一批描述可用（缓存命中或某个批次完成）时
+                   以 [{"name": ..., "description": ...}] 调用，用于异步任务逐步产出
+        as_records: 为 True 时返回 Dependency 记录列表（见 dependency_record），
+                    供 unified_parse 在进程内使用，避免 JSON 字符串往返
 
-    unique_dependencies = set()
-    for pom_path in pom_files:
-        dependencies = parse_pom_file(pom_path)
-        unique_dependencies.update(dependencies)
+    Returns:
+        JSON 字符串，按输入顺序排列的 [{"name": ..., "description": ...}]
+    """
+    arrivals = queue.Queue()
+    if isinstance(unique_dependencies, (list, tuple, set, frozenset)):
+        for dep in unique_dependencies:
+            arrivals.put(dep)
+        arrivals.put(_SOURCE_DONE)
+    else:
+        threading.Thread(target=_produce, args=(unique_dependencies, arrivals), daemon=True).start()
 
-    return llm_communicate(unique_dependencies,system_prompt,10)
+    cache = get_description_cache() if ecosystem else None
+    all_deps = []
+    seen = set()
+    cached = {}
+    pending = deque()
+    pending_keys = {}
+    generated = {}
+    attempts = {}
+    max_attempts = 1 + int(os.getenv("LLM_SALVAGE_RETRIES", "2"))
 
-def llm_communicate(unique_dependencies,system_prompt,batch_size = 10):
+    model_name = "qwen-max"
+    qwen_client = None
+    controller = get_batch_controller()
+    source_done = False
+    source_error = None
+    batch_index = 0
 
-    # 初始化客户端
-    qwen_client = QwenClient(model_name="qwen-max")
-    all_deps = list(unique_dependencies)
-    total = len(all_deps)
+    while True:
+        # 收集新到达的依赖：还有数据要来且当前不足一个批次时阻塞等待
+        arrived = []
+        block = not source_done and not controller.batch_full(model_name, pending, system_prompt, batch_size)
+        while not source_done:
+            try:
+                item = arrivals.get(block=block)
+            except queue.Empty:
+                break
+            block = False
+            if item is _SOURCE_DONE:
+                source_done = True
+            elif isinstance(item, _SourceFailed):
+                # 已收到的依赖照常处理完，再把异常抛给调用方
+                source_done = True
+                source_error = item.error
+            elif item not in seen:
+                seen.add(item)
+                arrived.append(item)
 
-    result = []
+        if arrived:
+            all_deps.extend(arrived)
+            hits = cache.get_many(ecosystem, arrived) if cache else {}
+            if hits:
+                cached.update(hits)
+                if on_result:
+                    on_result([{"name": dep, "description": desc} for dep, desc in hits.items()])
+            for dep in arrived:
+                if dep not in hits:
+                    pending.append(dep)
+                    pending_keys[_match_key(dep)] = dep
 
-    for i in range(0, total, batch_size):
-        batch = all_deps[i:i + batch_size]
+        if not pending:
+            if source_done:
+                break
+            continue
+        if not source_done and not controller.batch_full(model_name, pending, system_prompt, batch_size):
+            continue
+
+        # 初始化客户端（全部命中缓存时不创建）
+        if qwen_client is None:
+            from llm.llm import QwenClient  # 延迟导入 openai/httpx，仅在真正需要请求 LLM 时加载
+            qwen_client = QwenClient(model_name=model_name)
+
+        # 批次按输出预算打包，同一个预算作为 max_tokens 发送，超出预算的响应才会被截断
+        output_budget = controller.output_budget(model_name)
+        batch = controller.take_batch(model_name, pending, system_prompt, batch_size, output_budget)
+        for dep in batch:
+            attempts[dep] = attempts.get(dep, 0) + 1
+
+        truncated = False
+        complete = False
+        start = time.time()
         try:
             # 构造批量请求
             user_content = "Dependencies:\n" + "\n".join(batch)
@@ -102,24 +224,67 @@ def llm_communicate(unique_dependencies,system_prompt,batch_size = 10):
             response = qwen_client.Think([
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_content}
-            ])
+            ], subsystem="parser", max_tokens=output_budget)
 
-            # 新增：解析响应内容
-            try:
-                parsed_response = json.loads(response)
-                if isinstance(parsed_response, list):
-                    result.extend(parsed_response)
-                else:
-                    print(f"Invalid response format in batch {i // batch_size}")
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing failed in batch {i // batch_size}: {str(e)}")
+            # 解析响应内容；JSON 不合法时尽量保留其中完整的对象
+            items, complete = extract_description_items(response)
+            if not complete:
+                truncated = looks_truncated(response)
+                print(f"JSON parsing failed in batch {batch_index} ({len(batch)} deps"
+                      f"{', truncated' if truncated else ''}), salvaged {len(items)} items")
+
+            # 结果统一使用输入的依赖名称，LLM 改写过的名称不会进入结果或缓存
+            batch_results = {}
+            for dep, description in _match_batch(items, batch, pending_keys).items():
+                item = {"name": dep, "description": description}
+                if dep not in generated:
+                    batch_results[dep] = item
+                generated[dep] = item
+            if batch_results:
+                if on_result:
+                    on_result(list(batch_results.values()))
+                if cache:
+                    cache.put_many(ecosystem, [(dep, item['description']) for dep, item in batch_results.items()])
+
+            controller.record(model_name, len(batch), time.time() - start, truncated)
 
         except Exception as e:
-            print(f"Batch {i // batch_size} failed: {str(e)}")
+            print(f"Batch {batch_index} failed: {str(e)}")
+
+        # 响应被截断、无法解析或请求失败时，只把缺失的依赖放回队首，作为更小的补充请求；
+        # 完整响应中缺少的依赖重试也不会有不同结果
+        missing = [] if complete else [dep for dep in batch if dep not in generated and attempts[dep] < max_attempts]
+        if missing:
+            print(f"Re-requesting {len(missing)} missing dependencies from batch {batch_index}")
+            pending.extendleft(reversed(missing))
+
+        batch_index += 1
+
+    if source_error is not None:
+        raise source_error
+
+    if cached:
+        print(f"Description cache: {len(cached)} hits, {len(all_deps) - len(cached)} misses")
+
+    # 按输入顺序合并缓存命中与新生成的结果
+    result = []
+    missing = []
+    for dep in all_deps:
+        if dep in cached:
+            result.append({"name": dep, "description": cached[dep]})
+        elif dep in generated:
+            result.append(generated[dep])
+        else:
+            # 多次请求仍未生成描述的依赖也保留在结果中，不丢失
+            missing.append({"name": dep, "description": ""})
+            result.append(missing[-1])
+    if on_result and missing:
+        on_result(missing)
 
-        time.sleep(1)  # 控制请求频率
+    if as_records:
+        return [make_dependency(item.get('name', ''), item.get('description', '')) for item in result]
 
-        # 返回合并后的JSON格式结果
+    # 返回合并后的JSON格式结果
     return json.dumps(result, indent=2)
 
 if __name__ == "__main__":
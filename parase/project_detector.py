@@ -13,6 +13,8 @@ import os
 from pathlib import Path
 from typing import Dict, List, Tuple, Set
 
+from parase.project_index import ProjectIndex, SKIP_DIRS
+
 
 class ProjectDetector:
     """项目语言自动检测器"""
@@ -77,21 +79,18 @@ class ProjectDetector:
     }
 
     # 需要跳过的目录
-    SKIP_DIRS = {
-        '.git', '.svn', '__pycache__', '.pytest_cache',
-        'node_modules', '.idea', '.vscode', 'venv',
-        'env', '.env', 'dist', 'build', 'target',
-        'vendor', '.gradle', '.m2'
-    }
+    SKIP_DIRS = SKIP_DIRS
 
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, index: ProjectIndex = None):
         """
         初始化项目检测器
 
         Args:
             project_path: 项目根目录路径
+            index: 共享的项目文件索引（可选），传入时不再单独遍历目录
         """
         self.project_path = Path(project_path)
+        self.index = index
         self.detected_languages = {}  # {language: {files: [...], package_manager: ...}}
 
     def detect(self) -> Dict[str, Dict]:
@@ -123,25 +122,35 @@ class ProjectDetector:
 
     def _scan_project(self):
         """递归扫描项目目录，查找特征文件"""
-        for root, dirs, files in os.walk(self.project_path):
-            # 过滤掉不需要的目录
-            dirs[:] = [d for d in dirs if d not in self.SKIP_DIRS]
+        if self.index is None:
+            # 单独使用检测器时与之前一样遍历目录；只有请求共享的索引才使用 git
+            self.index = ProjectIndex(str(self.project_path), self.SKIP_DIRS, use_git=False)
 
+        # 索引只包含带清单文件的目录，已按 SKIP_DIRS 过滤
+        for root, files in self.index.walk():
             # 检查当前目录的文件
             for language, config in self.LANGUAGE_SIGNATURES.items():
                 for feature_file in config['files']:
                     if feature_file in files:
-                        file_path = os.path.join(root, feature_file)
-
-                        if language not in self.detected_languages:
-                            self.detected_languages[language] = {
-                                'files': [],
-                                'package_manager': config['package_manager'],
-                                'priority': config['priority']
-                            }
+                        self._add_detected(language, config, os.path.join(root, feature_file))
+
+        # 按扩展名识别的特征文件（如 .csproj）直接从索引的扩展名表中取出
+        for language, config in self.LANGUAGE_SIGNATURES.items():
+            for feature_file in config['files']:
+                if feature_file.startswith('.'):
+                    for file_path in self.index.paths_with_extension(feature_file):
+                        self._add_detected(language, config, file_path)
+
+    def _add_detected(self, language: str, config: Dict, file_path: str):
+        if language not in self.detected_languages:
+            self.detected_languages[language] = {
+                'files': [],
+                'package_manager': config['package_manager'],
+                'priority': config['priority']
+            }
 
-                        if file_path not in self.detected_languages[language]['files']:
-                            self.detected_languages[language]['files'].append(file_path)
+        if file_path not in self.detected_languages[language]['files']:
+            self.detected_languages[language]['files'].append(file_path)
 
     def get_detected_languages(self) -> List[str]:
         """获取检测到的所有语言列表"""
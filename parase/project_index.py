@@ -0,0 +1,297 @@
+"""
+项目文件索引 - 一次遍历，供语言检测和所有解析器共享
+
+一次 unified_parse 请求原本要遍历项目目录十来次（检测器一次，每个解析器各一次），
+而且解析器的遍历不跳过 node_modules、.git、target 等目录。这里用 os.scandir
+只遍历一次，按目录记录其中出现的清单文件，检测器和解析器都从索引中读取。
+
+项目目录是 git 仓库的根目录时，改用本地 git 元数据建立索引（不访问网络）：
+1. git ls-files 列出已跟踪、未跟踪和被忽略的文件（被忽略的目录整体列出后再遍历，
+   跳过 SKIP_DIRS），结果与目录遍历一致，但不再逐个目录 scandir
+2. 工作区未修改的已跟踪清单文件记录其 blob id，解析结果缓存按 blob id 直接命中，
+   重新扫描（包括重新 clone / checkout 导致 mtime 全部变化）时只重新解析内容有变化的清单文件
+3. 记录扫描时的提交（get_stats 中的 commit）
+git 索引只在共享索引（unified_parse 每次请求建立一次）中使用；各解析器单独调用时
+（walk_manifests 未传入索引）直接遍历目录，不启动 git 进程。
+非 git 目录、git 不可用或命令失败时回退到目录遍历。
+"""
+
+import os
+import shutil
+import subprocess
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# 遍历时跳过的目录（与语言检测器保持一致）
+SKIP_DIRS = {
+    '.git', '.svn', '__pycache__', '.pytest_cache',
+    'node_modules', '.idea', '.vscode', 'venv',
+    'env', '.env', 'dist', 'build', 'target',
+    'vendor', '.gradle', '.m2'
+}
+
+# 需要记录的清单文件名（小写比较，记录实际文件名）
+MANIFEST_NAMES = {
+    # Java
+    'pom.xml', 'build.gradle', 'build.gradle.kts',
+    # Go
+    'go.mod', 'go.sum',
+    # JavaScript
+    'package.json', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'pnpm-workspace.yaml',
+    # Python
+    'requirements.txt', 'setup.py', 'setup.cfg', 'pyproject.toml', 'pipfile', 'pipfile.lock', 'poetry.lock',
+    # PHP / Ruby / Rust / Erlang
+    'composer.json', 'composer.lock',
+    'gemfile', 'gemfile.lock',
+    'cargo.toml', 'cargo.lock',
+    'rebar.config', 'rebar.lock',
+    # C/C++ / .NET
+    'kulin.txt', 'cmakelists.txt', 'makefile', 'conanfile.txt', 'conanfile.py', 'vcpkg.json',
+    'packages.config',
+}
+
+# 按扩展名记录的文件
+MANIFEST_EXTENSIONS = {'.csproj', '.sln'}
+
+
+class ProjectIndex:
+    """
+    项目清单文件索引
+
+    用法：
+        index = ProjectIndex(project_path)
+        for dirpath, filenames in index.walk():   # 与 os.walk 的 (dirpath, filenames) 用法相同
+            ...
+    walk() 只产出包含清单文件的目录，filenames 中只有清单文件。
+    """
+
+    def __init__(self, root: str, skip_dirs: Iterable[str] = None, use_git: bool = None,
+                 use_manifest_cache: bool = True):
+        """
+        Args:
+            root: 项目目录
+            skip_dirs: 跳过的目录名，默认 SKIP_DIRS
+            use_git: 是否尝试用 git 元数据建立索引，默认由 PROJECT_INDEX_GIT 决定
+            use_manifest_cache: 解析器是否使用解析结果缓存；临时目录（如压缩包中提取的清单）
+                                的路径不会再次出现，传 False 避免写入永远不会命中的缓存条目
+        """
+        self.root = root
+        self.use_manifest_cache = use_manifest_cache
+        self.skip_dirs = set(SKIP_DIRS if skip_dirs is None else skip_dirs)
+        self._dirs: List[Tuple[str, Set[str]]] = []
+        self._by_name: Dict[str, List[str]] = {}
+        self._by_extension: Dict[str, List[str]] = {}
+        self.dirs_scanned = 0
+        self.files_scanned = 0
+        self.build_seconds = 0.0
+        # git 模式下：工作区未修改的已跟踪清单文件的 blob id（规范化路径 -> blob id）
+        self.content_ids: Dict[str, str] = {}
+        self.source = 'walk'
+        self.commit: Optional[str] = None
+        if use_git is None:
+            use_git = git_index_enabled()
+        start = time.time()
+        if not (use_git and self._build_from_git()):
+            self._build()
+        self.build_seconds = time.time() - start
+
+    def _build(self):
+        # 显式栈 + 逆序压栈，保证按目录名排序的先序遍历（结果与平台无关、可复现）
+        stack = [self.root]
+        while stack:
+            dirpath = stack.pop()
+            self.dirs_scanned += 1
+            try:
+                with os.scandir(dirpath) as entries:
+                    entries = sorted(entries, key=lambda entry: entry.name)
+            except OSError:
+                continue
+
+            manifests = set()
+            subdirs = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if entry.name not in self.skip_dirs:
+                        subdirs.append(entry.path)
+                    continue
+
+                self.files_scanned += 1
+                lower = entry.name.lower()
+                extension = os.path.splitext(lower)[1]
+                if lower in MANIFEST_NAMES:
+                    manifests.add(entry.name)
+                    self._by_name.setdefault(lower, []).append(entry.path)
+                elif extension in MANIFEST_EXTENSIONS:
+                    manifests.add(entry.name)
+                    self._by_extension.setdefault(extension, []).append(entry.path)
+
+            if manifests:
+                self._dirs.append((dirpath, manifests))
+            stack.extend(reversed(subdirs))
+
+    def _build_from_git(self) -> bool:
+        """用 git ls-files 建立索引；不是 git 仓库根目录或命令失败时返回 False"""
+        root = os.path.realpath(self.root)
+        # 只在项目目录就是工作区根目录时使用：位于其他仓库中（可能是被忽略的目录）时 ls-files 结果不完整
+        # 还没有提交的仓库 rev-parse HEAD 会失败，此时也回退到目录遍历
+        revision = _git(self.root, 'rev-parse', '--show-toplevel', 'HEAD')
+        if revision is None:
+            return False
+        lines = revision.splitlines()
+        if len(lines) != 2 or os.path.realpath(os.fsdecode(lines[0])) != root:
+            return False
+        staged = _git(self.root, 'ls-files', '-z', '--stage')
+        untracked = _git(self.root, 'ls-files', '-z', '--others', '--exclude-standard')
+        # 被忽略的文件（如被忽略的 Cargo.lock、package-lock.json）目录遍历同样会读取；
+        # --directory 使被忽略的目录（node_modules 等）只输出一项，不展开其中的文件
+        ignored = _git(self.root, 'ls-files', '-z', '--others', '--ignored', '--exclude-standard', '--directory')
+        modified = _git(self.root, 'diff', '--name-only', '-z')
+        if staged is None or untracked is None or ignored is None or modified is None:
+            return False
+
+        self.commit = lines[1].decode().strip()
+        dirty = set(_split_z(modified))
+
+        manifests: Dict[str, Set[str]] = {}
+        subtrees = []
+
+        def add(relative: str, blob: Optional[str]) -> bool:
+            parts = relative.split('/')
+            if any(part in self.skip_dirs for part in parts[:-1]):
+                return False
+            self.files_scanned += 1
+            lower = parts[-1].lower()
+            if lower not in MANIFEST_NAMES and os.path.splitext(lower)[1] not in MANIFEST_EXTENSIONS:
+                return False
+            path = os.path.join(self.root, *parts)
+            # 已从工作区删除但尚未提交删除的文件
+            if not os.path.lexists(path):
+                return False
+            manifests.setdefault('/'.join(parts[:-1]), set()).add(parts[-1])
+            if blob and relative not in dirty:
+                self.content_ids[os.path.normpath(path)] = blob
+            return True
+
+        seen = set()
+        for entry in _split_z(staged):
+            # <mode> <object> <stage>\t<path>；有冲突的文件每个阶段各占一行
+            info, _, relative = entry.partition('\t')
+            if relative in seen:
+                continue
+            seen.add(relative)
+            mode, blob, stage = info.split(' ', 2)
+            if mode == '160000':
+                subtrees.append(relative)
+            else:
+                add(relative, blob if stage == '0' else None)
+        for relative in _split_z(untracked) + _split_z(ignored):
+            # 以 / 结尾的是整体列出的目录（被忽略的目录、未跟踪的嵌套仓库）
+            if relative.endswith('/'):
+                subtrees.append(relative.rstrip('/'))
+            else:
+                add(relative, None)
+
+        # 子模块和整体列出的目录内的文件不在 ls-files 结果中，按目录遍历
+        for relative in subtrees:
+            if any(part in self.skip_dirs for part in relative.split('/')):
+                continue
+            self._scan_tree(os.path.join(self.root, *relative.split('/')), manifests)
+
+        # 与目录遍历相同的顺序：按路径分量排序即目录名排序的先序遍历
+        for directory in sorted(manifests, key=lambda d: d.split('/') if d else []):
+            names = manifests[directory]
+            dirpath = os.path.join(self.root, *directory.split('/')) if directory else self.root
+            self._dirs.append((dirpath, names))
+            for name in sorted(names):
+                lower = name.lower()
+                path = os.path.join(dirpath, name)
+                if lower in MANIFEST_NAMES:
+                    self._by_name.setdefault(lower, []).append(path)
+                else:
+                    self._by_extension.setdefault(os.path.splitext(lower)[1], []).append(path)
+
+        self.source = 'git'
+        return True
+
+    def _scan_tree(self, start: str, manifests: Dict[str, Set[str]]):
+        """遍历一个子目录（git 子模块或被忽略的目录），把清单文件按相对目录加入 manifests"""
+        for dirpath, dirnames, filenames in os.walk(start):
+            dirnames[:] = [name for name in dirnames if name not in self.skip_dirs]
+            self.dirs_scanned += 1
+            directory = os.path.relpath(dirpath, self.root).replace(os.sep, '/')
+            for name in filenames:
+                self.files_scanned += 1
+                lower = name.lower()
+                if lower in MANIFEST_NAMES or os.path.splitext(lower)[1] in MANIFEST_EXTENSIONS:
+                    manifests.setdefault(directory, set()).add(name)
+
+    def walk(self) -> Iterator[Tuple[str, Set[str]]]:
+        """按遍历顺序产出 (目录, 该目录下的清单文件名集合)"""
+        return iter(self._dirs)
+
+    def paths(self, filename: str) -> List[str]:
+        """指定文件名（不区分大小写）的所有路径"""
+        return list(self._by_name.get(filename.lower(), []))
+
+    def paths_with_extension(self, extension: str) -> List[str]:
+        """指定扩展名（如 '.csproj'）的所有路径"""
+        return list(self._by_extension.get(extension.lower(), []))
+
+    def get_stats(self) -> Dict:
+        stats = {
+            'root': self.root,
+            'source': self.source,
+            'dirs_scanned': self.dirs_scanned,
+            'files_scanned': self.files_scanned,
+            'manifest_dirs': len(self._dirs),
+            'build_seconds': round(self.build_seconds, 3)
+        }
+        if self.source == 'git':
+            stats['commit'] = self.commit
+            stats['content_ids'] = len(self.content_ids)
+        return stats
+
+
+def git_index_enabled() -> bool:
+    """设置 PROJECT_INDEX_GIT=false 可关闭 git 索引，始终遍历目录"""
+    return os.getenv("PROJECT_INDEX_GIT", "true").lower() != "false" and shutil.which("git") is not None
+
+
+def _git(cwd: str, *args: str) -> Optional[bytes]:
+    """在 cwd 中执行只读的 git 命令，失败时返回 None"""
+    try:
+        result = subprocess.run(
+            ['git', '-C', cwd, *args],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            timeout=float(os.getenv("PROJECT_INDEX_GIT_TIMEOUT", 60)),
+            env=dict(os.environ, GIT_OPTIONAL_LOCKS='0', GIT_TERMINAL_PROMPT='0')
+        )
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def _split_z(output: bytes) -> List[str]:
+    """拆分 git -z 输出（路径按文件系统编码解码，与 os.scandir 得到的文件名一致）"""
+    return [os.fsdecode(item) for item in output.split(b'\0') if item]
+
+
+def manifest_paths(root_dir: str, filename: str, index: ProjectIndex = None) -> List[str]:
+    """只需要一种清单文件的解析器使用：按文件名直接从索引中取出所有路径（遍历顺序）"""
+    if index is None:
+        index = ProjectIndex(root_dir, use_git=False)
+    return index.paths(filename)
+
+
+def walk_manifests(root_dir: str, index: ProjectIndex = None) -> Iterator[Tuple[str, Set[str]]]:
+    """
+    需要在同一目录的多种清单文件中选择的解析器（如 lock 文件优先）使用的遍历入口：
+    传入了共享索引就直接读取，否则为该目录建立索引（直接遍历，不启动 git 进程）
+    """
+    if index is None:
+        index = ProjectIndex(root_dir, use_git=False)
+    return index.walk()
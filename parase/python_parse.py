@@ -4,6 +4,9 @@ import ast
 import json
 
 from parase.pom_parse import llm_communicate
+from parase.dependency_stream import iter_unique_dependencies
+from parase.project_index import walk_manifests
+from parase.json_stream import iter_json_sections
 
 system_prompt = """Generate technical descriptions in English for Python package dependencies following these rules:
 1. For each dependency in format 'package-name version' (e.g. django 4.2.0)
@@ -263,31 +266,28 @@ def parse_pyproject_toml(pyproject_path):
         return []
 
 def parse_pipfile_lock(pipfile_lock_path):
-    """解析Pipfile.lock文件"""
+    """解析Pipfile.lock文件（大文件流式读取，只解码 default/develop 中的条目）"""
     try:
         dependencies = []
-        with open(pipfile_lock_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
         try:
-            # Pipfile.lock是JSON格式
-            data = json.loads(content)
-
-            # 获取default和develop依赖
-            for section in ['default', 'develop']:
-                if section in data:
-                    for pkg_name, pkg_info in data[section].items():
-                        if isinstance(pkg_info, dict) and 'version' in pkg_info:
-                            version = pkg_info['version']
-                            # 移除版本前的==
-                            clean_version = version.lstrip('=')
-                            if clean_version:
-                                dependencies.append(f"{pkg_name} {clean_version}")
-                        else:
-                            dependencies.append(pkg_name)
+            # Pipfile.lock是JSON格式，获取default和develop依赖
+            for _, pkg_name, pkg_info in iter_json_sections(pipfile_lock_path, ('default', 'develop')):
+                if pkg_name is None:
+                    continue
+                if isinstance(pkg_info, dict) and 'version' in pkg_info:
+                    version = pkg_info['version']
+                    # 移除版本前的==
+                    clean_version = version.lstrip('=')
+                    if clean_version:
+                        dependencies.append(f"{pkg_name} {clean_version}")
+                else:
+                    dependencies.append(pkg_name)
         except json.JSONDecodeError:
             # 如果JSON解析失败，使用正则
             # 简单的[[package]] 式Pipfile.lock
+            with open(pipfile_lock_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            dependencies = []
             package_pattern = r'\[\[package\]\]\s*\nname\s*=\s*"([^"]+)"\s*\nversion\s*=\s*"([^"]+)"'
             for match in re.finditer(package_pattern, content):
                 pkg_name, version = match.groups()
@@ -299,10 +299,9 @@ def parse_pipfile_lock(pipfile_lock_path):
         print(f"处理Pipfile.lock失败 ({pipfile_lock_path}): {str(e)}")
         return []
 
-def find_python_dependency_files(root_dir):
-    """递归查找所有Python依赖文件"""
-    files = []
-    for dirpath, _, filenames in os.walk(root_dir):
+def iter_python_dependency_files(root_dir, index=None):
+    """递归查找Python依赖文件（生成器，读取共享项目索引，跳过 node_modules 等目录）"""
+    for dirpath, filenames in walk_manifests(root_dir, index):
         # 优先级（按精准度）:
         # 1. poetry.lock (最精确，包含所有resolved版本)
         # 2. Pipfile.lock (Pipenv的lock文件，精确)
@@ -312,59 +311,64 @@ def find_python_dependency_files(root_dir):
         # 6. setup.py (通常使用版本约束)
 
         if 'poetry.lock' in filenames:
-            files.append(('poetry_lock', os.path.join(dirpath, 'poetry.lock')))
+            yield ('poetry_lock', os.path.join(dirpath, 'poetry.lock'))
         elif 'Pipfile.lock' in filenames:
-            files.append(('pipfile_lock', os.path.join(dirpath, 'Pipfile.lock')))
+            yield ('pipfile_lock', os.path.join(dirpath, 'Pipfile.lock'))
         elif 'requirements.txt' in filenames:
-            files.append(('requirements', os.path.join(dirpath, 'requirements.txt')))
+            yield ('requirements', os.path.join(dirpath, 'requirements.txt'))
         elif 'pyproject.toml' in filenames:
-            files.append(('pyproject', os.path.join(dirpath, 'pyproject.toml')))
+            yield ('pyproject', os.path.join(dirpath, 'pyproject.toml'))
         elif 'Pipfile' in filenames:
-            files.append(('pipfile', os.path.join(dirpath, 'Pipfile')))
+            yield ('pipfile', os.path.join(dirpath, 'Pipfile'))
         elif 'setup.py' in filenames:
-            files.append(('setup', os.path.join(dirpath, 'setup.py')))
+            yield ('setup', os.path.join(dirpath, 'setup.py'))
+
+def find_python_dependency_files(root_dir, index=None):
+    """递归查找所有Python依赖文件"""
+    return list(iter_python_dependency_files(root_dir, index))
+
+def parse_python_dependency_file(dep_file):
+    """按文件类型解析 (file_type, file_path)"""
+    file_type, file_path = dep_file
+    print(f"Processing {file_type}: {file_path}")
+
+    if file_type == 'requirements':
+        dependencies = parse_requirements_txt(file_path)
+    elif file_type == 'pipfile':
+        # Pipfile使用TOML格式解析
+        dependencies = parse_pipfile(file_path)
+    elif file_type == 'pipfile_lock':
+        # Pipfile.lock使用JSON格式解析
+        dependencies = parse_pipfile_lock(file_path)
+    elif file_type == 'poetry_lock':
+        # poetry.lock是TOML格式，包含所有resolved版本
+        dependencies = parse_poetry_lock(file_path)
+    elif file_type == 'pyproject':
+        # pyproject.toml支持Poetry配置
+        dependencies = parse_pyproject_toml(file_path)
+    elif file_type == 'setup':
+        # setup.py使用AST解析
+        dependencies = parse_setup_py(file_path)
+    else:
+        return []
+
+    if dependencies:
+        print(f"  Found {len(dependencies)} dependencies from {file_type}")
+    return dependencies or []
+
+def iter_python_dependencies(project_path, index=None):
+    """边遍历边解析Python依赖文件，逐个产出去重后的依赖"""
+    return iter_unique_dependencies(iter_python_dependency_files(project_path, index),
+                                    parse_python_dependency_file, "Python", project_path, index=index)
 
-    return files
+def list_python_dependencies(project_path, index=None):
+    """收集Python项目的所有依赖，返回去重后的依赖列表（不调用LLM）"""
+    return sorted(iter_python_dependencies(project_path, index))
 
-def collect_python_dependencies(project_path):
+def collect_python_dependencies(project_path, index=None, as_records=False):
     """收集Python项目的所有依赖"""
-    dep_files = find_python_dependency_files(project_path)
-
-    if not dep_files:
-        print(f"No Python dependency files found in {project_path}")
-        return json.dumps([])
-
-    unique_dependencies = set()
-
-    for file_type, file_path in dep_files:
-        print(f"Processing {file_type}: {file_path}")
-
-        if file_type == 'requirements':
-            dependencies = parse_requirements_txt(file_path)
-        elif file_type == 'pipfile':
-            # Pipfile使用TOML格式解析
-            dependencies = parse_pipfile(file_path)
-        elif file_type == 'pipfile_lock':
-            # Pipfile.lock使用JSON格式解析
-            dependencies = parse_pipfile_lock(file_path)
-        elif file_type == 'poetry_lock':
-            # poetry.lock是TOML格式，包含所有resolved版本
-            dependencies = parse_poetry_lock(file_path)
-        elif file_type == 'pyproject':
-            # pyproject.toml支持Poetry配置
-            dependencies = parse_pyproject_toml(file_path)
-        elif file_type == 'setup':
-            # setup.py使用AST解析
-            dependencies = parse_setup_py(file_path)
-        else:
-            continue
-
-        if dependencies:
-            print(f"  Found {len(dependencies)} dependencies from {file_type}")
-            unique_dependencies.update(dependencies)
-
-    print(f"Found {len(unique_dependencies)} unique Python dependencies in total")
-    return llm_communicate(unique_dependencies, system_prompt, 10)
+    return llm_communicate(iter_python_dependencies(project_path, index), system_prompt, ecosystem="python",
+                           as_records=as_records)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,9 @@
 import os
 import re
-import json
 
 from parase.pom_parse import llm_communicate
+from parase.dependency_stream import iter_unique_dependencies
+from parase.project_index import walk_manifests
 
 system_prompt = """Generate technical descriptions in English for Ruby gem dependencies following these rules:
 1. For each dependency in format 'gem-name version' (e.g. rails 7.0.0)
@@ -85,43 +86,44 @@ def parse_gemfile_lock(gemfile_lock_path):
         print(f"处理Gemfile.lock失败 ({gemfile_lock_path}): {str(e)}")
         return []
 
-def find_gemfiles(root_dir):
-    """递归查找所有Gemfile"""
-    gemfiles = []
-    for dirpath, _, filenames in os.walk(root_dir):
+def iter_gemfiles(root_dir, index=None):
+    """递归查找Gemfile（生成器，读取共享项目索引，跳过 node_modules 等目录）"""
+    for dirpath, filenames in walk_manifests(root_dir, index):
         # 优先使用Gemfile.lock（版本更精确）
         if 'Gemfile.lock' in filenames:
-            gemfiles.append(('lock', os.path.join(dirpath, 'Gemfile.lock')))
+            yield ('lock', os.path.join(dirpath, 'Gemfile.lock'))
         elif 'Gemfile' in filenames:
-            gemfiles.append(('gemfile', os.path.join(dirpath, 'Gemfile')))
+            yield ('gemfile', os.path.join(dirpath, 'Gemfile'))
         # 也接受小写
         elif 'gemfile.lock' in filenames:
-            gemfiles.append(('lock', os.path.join(dirpath, 'gemfile.lock')))
+            yield ('lock', os.path.join(dirpath, 'gemfile.lock'))
         elif 'gemfile' in filenames:
-            gemfiles.append(('gemfile', os.path.join(dirpath, 'gemfile')))
-
-    return gemfiles
-
-def collect_ruby_dependencies(project_path):
-    """收集Ruby项目的所有依赖"""
-    gemfiles = find_gemfiles(project_path)
+            yield ('gemfile', os.path.join(dirpath, 'gemfile'))
 
-    if not gemfiles:
-        print(f"No Gemfile or Gemfile.lock files found in {project_path}")
-        return json.dumps([])
+def find_gemfiles(root_dir, index=None):
+    """递归查找所有Gemfile"""
+    return list(iter_gemfiles(root_dir, index))
 
-    unique_dependencies = set()
+def parse_gem_manifest(gemfile):
+    """按文件类型解析 (file_type, file_path)"""
+    file_type, file_path = gemfile
+    if file_type == 'lock':
+        return parse_gemfile_lock(file_path)
+    return parse_gemfile(file_path)
 
-    for file_type, file_path in gemfiles:
-        if file_type == 'lock':
-            dependencies = parse_gemfile_lock(file_path)
-        else:
-            dependencies = parse_gemfile(file_path)
+def iter_ruby_dependencies(project_path, index=None):
+    """边遍历边解析Gemfile，逐个产出去重后的依赖"""
+    return iter_unique_dependencies(iter_gemfiles(project_path, index), parse_gem_manifest, "Ruby", project_path,
+                                    index=index)
 
-        unique_dependencies.update(dependencies)
+def list_ruby_dependencies(project_path, index=None):
+    """收集Ruby项目的所有依赖，返回去重后的依赖列表（不调用LLM）"""
+    return sorted(iter_ruby_dependencies(project_path, index))
 
-    print(f"Found {len(unique_dependencies)} unique Ruby dependencies")
-    return llm_communicate(unique_dependencies, system_prompt, 10)
+def collect_ruby_dependencies(project_path, index=None, as_records=False):
+    """收集Ruby项目的所有依赖"""
+    return llm_communicate(iter_ruby_dependencies(project_path, index), system_prompt, ecosystem="ruby",
+                           as_records=as_records)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,9 @@
 import os
 import re
-import json
 
 from parase.pom_parse import llm_communicate
+from parase.dependency_stream import iter_unique_dependencies
+from parase.project_index import walk_manifests
 
 system_prompt = """Generate technical descriptions in English for Rust crate dependencies following these rules:
 1. For each dependency in format 'crate-name version' (e.g. tokio 1.28.0)
@@ -111,38 +112,39 @@ def parse_cargo_lock(cargo_lock_path):
         print(f"处理Cargo.lock失败 ({cargo_lock_path}): {str(e)}")
         return []
 
-def find_cargo_files(root_dir):
-    """递归查找所有Cargo文件"""
-    cargo_files = []
-    for dirpath, _, filenames in os.walk(root_dir):
+def iter_cargo_files(root_dir, index=None):
+    """递归查找Cargo文件（生成器，读取共享项目索引，跳过 node_modules 等目录）"""
+    for dirpath, filenames in walk_manifests(root_dir, index):
         # 优先使用Cargo.lock（版本更精确）
         if 'Cargo.lock' in filenames:
-            cargo_files.append(('lock', os.path.join(dirpath, 'Cargo.lock')))
+            yield ('lock', os.path.join(dirpath, 'Cargo.lock'))
         elif 'Cargo.toml' in filenames:
-            cargo_files.append(('toml', os.path.join(dirpath, 'Cargo.toml')))
-
-    return cargo_files
-
-def collect_rust_dependencies(project_path):
-    """收集Rust项目的所有依赖"""
-    cargo_files = find_cargo_files(project_path)
+            yield ('toml', os.path.join(dirpath, 'Cargo.toml'))
 
-    if not cargo_files:
-        print(f"No Cargo.toml or Cargo.lock files found in {project_path}")
-        return json.dumps([])
+def find_cargo_files(root_dir, index=None):
+    """递归查找所有Cargo文件"""
+    return list(iter_cargo_files(root_dir, index))
 
-    unique_dependencies = set()
+def parse_cargo_manifest(cargo_file):
+    """按文件类型解析 (file_type, file_path)"""
+    file_type, file_path = cargo_file
+    if file_type == 'lock':
+        return parse_cargo_lock(file_path)
+    return parse_cargo_toml(file_path)
 
-    for file_type, file_path in cargo_files:
-        if file_type == 'lock':
-            dependencies = parse_cargo_lock(file_path)
-        else:
-            dependencies = parse_cargo_toml(file_path)
+def iter_rust_dependencies(project_path, index=None):
+    """边遍历边解析Cargo文件，逐个产出去重后的依赖"""
+    return iter_unique_dependencies(iter_cargo_files(project_path, index), parse_cargo_manifest, "Rust", project_path,
+                                    index=index)
 
-        unique_dependencies.update(dependencies)
+def list_rust_dependencies(project_path, index=None):
+    """收集Rust项目的所有依赖，返回去重后的依赖列表（不调用LLM）"""
+    return sorted(iter_rust_dependencies(project_path, index))
 
-    print(f"Found {len(unique_dependencies)} unique Rust dependencies")
-    return llm_communicate(unique_dependencies, system_prompt, 10)
+def collect_rust_dependencies(project_path, index=None, as_records=False):
+    """收集Rust项目的所有依赖"""
+    return llm_communicate(iter_rust_dependencies(project_path, index), system_prompt, ecosystem="rust",
+                           as_records=as_records)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+服务冷启动导入耗时分析
+
+在新的子进程中用 `python -X importtime` 导入 app（或指定模块），
+统计总耗时并列出累计耗时最高的模块。可以在改动前后各跑一次对比：
+
+    python profile_startup.py
+    python profile_startup.py --module app --runs 5 --top 30
+    git stash && python profile_startup.py && git stash pop
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+# import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$')
+
+
+def profile_once(module):
+    """导入一次模块，返回 (墙钟耗时秒, [(累计微秒, 自身微秒, 层级, 模块名)])"""
+    env = dict(os.environ)
+    env.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    entries = []
+    errors = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(cumulative_us), int(self_us), len(indent) // 2, name.strip()))
+        elif not line.startswith("import time:"):
+            errors.append(line)
+
+    if proc.returncode != 0:
+        print("导入失败:")
+        print("\n".join(errors[-20:]))
+        sys.exit(proc.returncode)
+    return elapsed, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析服务冷启动导入耗时")
+    parser.add_argument("--module", default="app", help="要导入的模块（默认 app）")
+    parser.add_argument("--runs", type=int, default=3, help="重复次数，取最小值（默认 3）")
+    parser.add_argument("--top", type=int, default=20, help="列出累计耗时最高的前 N 个模块")
+    args = parser.parse_args()
+
+    runs = [profile_once(args.module) for _ in range(max(1, args.runs))]
+    wall_times = [elapsed for elapsed, _ in runs]
+    # 取墙钟耗时最短的一次作为代表，排除磁盘缓存等干扰
+    _, entries = min(runs, key=lambda run: run[0])
+
+    top_level = [entry for entry in entries if entry[3] == args.module]
+    total_us = top_level[-1][0] if top_level else sum(e[1] for e in entries)
+
+    print("=" * 70)
+    print(f"冷启动分析: import {args.module}")
+    print("=" * 70)
+    print(f"子进程墙钟耗时: 最小 {min(wall_times):.3f}s, 最大 {max(wall_times):.3f}s ({len(runs)} 次)")
+    print(f"{args.module} 累计导入耗时: {total_us / 1e6:.3f}s, 共导入 {len(entries)} 个模块")
+
+    print(f"\n累计耗时最高的 {args.top} 个模块:")
+    print(f"{'累计(ms)':>10} {'自身(ms)':>10}  模块")
+    for cumulative_us, self_us, level, name in sorted(entries, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f} {self_us / 1000:>10.1f}  {'  ' * level}{name}")
+
+    heavy = ["openai", "httpx", "pandas", "sklearn", "nltk", "Levenshtein", "tqdm", "bs4"]
+    loaded = {name for _, _, _, name in entries}
+    print("\n重量级依赖是否在启动时加载:")
+    for name in heavy:
+        print(f"  {name:<12} {'已加载' if name in loaded else '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压缩包扫描测试：只提取清单文件，不安全的路径被跳过，解析时不写入清单解析缓存
+
+    python -m pytest -q test_archive_fs.py
+"""
+
+import io
+import os
+import sys
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase import manifest_cache
+from parase.archive_fs import ArchiveError, ArchiveProject
+from parase.go_parse import list_go_dependencies
+from parase.manifest_cache import ManifestCache
+from parase.pom_parse import list_maven_dependencies
+from parase.project_index import ProjectIndex
+
+POM = ('<project><groupId>g</groupId><artifactId>a</artifactId><version>1</version>'
+       '<dependencies><dependency><groupId>x</groupId><artifactId>y</artifactId><version>2</version>'
+       '</dependency></dependencies></project>')
+
+MEMBERS = {
+    'repo/go.mod': b'module x\n\nrequire github.com/pkg/errors v0.9.1\n',
+    'repo/service/pom.xml': POM.encode(),
+    'repo/web/node_modules/left-pad/package.json': b'{}',
+    'repo/src/main.go': b'package main\n',
+    '../evil/go.mod': b'module evil\n',
+}
+
+
+class _NonSeekable(io.RawIOBase):
+    """模拟不可 seek 的上传流"""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._data.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def zip_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in MEMBERS.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def tar_bytes():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for name, data in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def write_file(path, data):
+    path.write_bytes(data)
+    return path
+
+
+def extracted(project):
+    return sorted(os.path.relpath(os.path.join(dirpath, name), project.root).replace(os.sep, '/')
+                  for dirpath, _, filenames in os.walk(project.root) for name in filenames)
+
+
+@pytest.mark.parametrize('source', [
+    lambda tmp: str(write_file(tmp / 'repo.zip', zip_bytes())),
+    lambda tmp: str(write_file(tmp / 'repo.tar.gz', tar_bytes())),
+    lambda tmp: io.BytesIO(zip_bytes()),
+    lambda tmp: _NonSeekable(tar_bytes()),
+], ids=['zip', 'tar.gz', 'zip-stream', 'tar-stream'])
+def test_only_manifests_are_extracted(tmp_path, source):
+    with ArchiveProject(source(tmp_path), name='repo') as project:
+        assert extracted(project) == ['repo/go.mod', 'repo/service/pom.xml']
+        assert project.get_stats()['members_total'] == len(MEMBERS)
+        root = project.root
+    assert not os.path.exists(root)
+
+
+def test_archive_scan_does_not_fill_manifest_cache(tmp_path, monkeypatch):
+    cache = ManifestCache(db_path=str(tmp_path / 'manifest.db'))
+    monkeypatch.setattr(manifest_cache, '_cache_instance', cache)
+    monkeypatch.delenv('MANIFEST_CACHE_ENABLED', raising=False)
+
+    with ArchiveProject(io.BytesIO(zip_bytes())) as project:
+        index = ProjectIndex(project.root, use_manifest_cache=False)
+        assert list_go_dependencies(project.root, index) == ['github.com/pkg/errors v0.9.1']
+        assert list_maven_dependencies(project.root, index) == ['x:y:2']
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_invalid_archive(tmp_path):
+    with pytest.raises(ArchiveError):
+        with ArchiveProject(io.BytesIO(b'not an archive' * 100)):
+            pass
+
+
+def test_total_size_limit(tmp_path, monkeypatch):
+    monkeypatch.setenv('ARCHIVE_MAX_TOTAL_BYTES', '20')
+    with pytest.raises(ArchiveError):
+        with ArchiveProject(io.BytesIO(zip_bytes())):
+            pass
+
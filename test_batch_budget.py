@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+token 预算批处理测试：按预算打包批次、截断时收缩预算、预算作为 max_tokens 发送
+
+    python -m pytest -q test_batch_budget.py
+"""
+
+import json
+import sys
+import time
+import types
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase import pom_parse
+from parase.batch_budget import (BatchBudgetController, estimate_output_tokens, estimate_tokens,
+                                 looks_truncated)
+
+
+def controller(**kwargs):
+    options = dict(input_budget=6000, output_budget=1000, min_output_budget=400,
+                   max_output_budget=3000, max_items=60)
+    options.update(kwargs)
+    return BatchBudgetController(**options)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('abcd') == 1
+    assert estimate_tokens('abcde') == 2
+    assert estimate_tokens('依赖描述') == 4
+
+
+def test_take_batch_stops_at_output_budget():
+    deps = deque(f'g:a{i}:1' for i in range(10))
+    per_item = estimate_output_tokens('g:a0:1')
+    batch = controller().take_batch('m', deps, output_budget=per_item * 3)
+    assert batch == ['g:a0:1', 'g:a1:1', 'g:a2:1']
+    assert len(deps) == 7
+
+
+def test_take_batch_respects_max_items_and_keeps_oversized_item():
+    deps = deque(f'g:a{i}:1' for i in range(10))
+    assert len(controller().take_batch('m', deps, max_items=2)) == 2
+    assert controller().take_batch('m', deque(['x' * 100000])) == ['x' * 100000]
+
+
+def test_truncation_shrinks_budget_and_success_grows_it():
+    budget = controller()
+    budget.record('m', 5, 2.0, truncated=True)
+    assert budget.output_budget('m') == 600
+    budget.record('m', 5, 2.0, truncated=True)
+    assert budget.output_budget('m') == 400
+
+    budget = controller()
+    budget.record('m', 5, 1.0, truncated=False)
+    assert budget.output_budget('m') == 1000 + budget.step
+    stats = budget.get_stats()['models']['m']
+    assert stats['batches'] == 1 and stats['truncated_batches'] == 0
+
+
+def test_looks_truncated():
+    assert not looks_truncated('[{"name": "a"}]')
+    assert not looks_truncated('```json\n[{"name": "a"}]\n```')
+    assert looks_truncated('[{"name": "a", "description": "cut')
+    assert not looks_truncated('')
+
+
+def test_output_budget_is_sent_as_max_tokens(monkeypatch):
+    calls = []
+
+    class FakeClient:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+        def Think(self, prompts, subsystem=None, max_tokens=None):
+            deps = prompts[1]['content'].splitlines()[1:]
+            calls.append((len(deps), max_tokens))
+            time.sleep(0.01)
+            return json.dumps([{'name': dep, 'description': 'd'} for dep in deps])
+
+    per_item = estimate_output_tokens('g:a0:1')
+    budget = controller(output_budget=per_item * 4, min_output_budget=per_item)
+    monkeypatch.setattr(pom_parse, 'get_batch_controller', lambda: budget)
+    monkeypatch.setitem(sys.modules, 'llm.llm', types.SimpleNamespace(QwenClient=FakeClient))
+
+    deps = [f'g:a{i}:1' for i in range(6)]
+    result = json.loads(pom_parse.llm_communicate(deps, pom_parse.system_prompt))
+    assert [item['name'] for item in result] == deps
+    assert calls[0] == (4, per_item * 4)
+    # 第一批完成后预算增加了一个步长，第二批按新的预算发送
+    assert calls[1] == (2, per_item * 4 + budget.step)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+依赖描述缓存测试：名称规范化、缓存粒度、预热，以及 llm_communicate 只请求未命中的依赖
+
+    python -m pytest -q test_description_cache.py
+"""
+
+import json
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase import description_cache, pom_parse
+from parase.description_cache import DescriptionCache, normalize_name, split_dependency
+
+
+def cache(tmp_path, granularity='name'):
+    return DescriptionCache(db_path=str(tmp_path / 'descriptions.db'), granularity=granularity)
+
+
+def test_split_and_normalize():
+    assert split_dependency('org.slf4j:slf4j-api:2.0.9', 'java') == ('org.slf4j:slf4j-api', '2.0.9')
+    assert split_dependency('Flask_Login 0.6.3', 'python') == ('Flask_Login', '0.6.3')
+    assert split_dependency('openssl', 'c') == ('openssl', '')
+    assert normalize_name('Flask_Login', 'python') == 'flask-login'
+    assert normalize_name('React', 'javascript') == 'react'
+    assert normalize_name('github.com/Pkg/errors', 'go') == 'github.com/Pkg/errors'
+
+
+def test_name_granularity_shares_across_versions(tmp_path):
+    store = cache(tmp_path)
+    assert store.put_many('python', [('Flask_Login 0.6.3', 'auth'), ('empty 1.0', '')]) == 2
+    assert store.get_many('python', ['flask-login 0.7.0', 'empty 1.0']) == {'flask-login 0.7.0': 'auth'}
+    stats = store.get_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 2)
+    assert stats['by_ecosystem']['python']['hit_rate'] == 0.5
+
+
+def test_version_granularity_needs_exact_version(tmp_path):
+    cache(tmp_path).put_many('java', [('g:a:1.0', 'desc')])
+    store = cache(tmp_path, 'version')
+    assert store.get_many('java', ['g:a:1.0', 'g:a:2.0']) == {'g:a:1.0': 'desc'}
+
+
+def test_warm_up_does_not_overwrite(tmp_path):
+    labels = tmp_path / 'label_desc.json'
+    labels.write_text(json.dumps([{'name': 'OpenSSL', 'desc': 'tls'}, {'name': 'zlib', 'desc': 'compression'},
+                                  {'name': 'bad'}]), encoding='utf-8')
+    store = cache(tmp_path)
+    store.put_many('c', [('zlib', 'generated')])
+    assert store.warm_up_from_label_desc(str(labels)) == 2
+    assert store.has_source('label_desc')
+    assert store.get_many('c', ['openssl', 'zlib']) == {'openssl': 'tls', 'zlib': 'generated'}
+
+
+def test_only_misses_are_sent_to_llm(tmp_path, monkeypatch):
+    store = cache(tmp_path)
+    store.put_many('java', [('g:cached:1', 'from cache')])
+    monkeypatch.setattr(description_cache, '_cache_instance', store)
+    monkeypatch.delenv('DESC_CACHE_ENABLED', raising=False)
+    requested = []
+
+    class FakeClient:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+        def Think(self, prompts, subsystem=None, max_tokens=None):
+            deps = prompts[1]['content'].splitlines()[1:]
+            requested.extend(deps)
+            return json.dumps([{'name': dep, 'description': 'generated'} for dep in deps])
+
+    monkeypatch.setitem(sys.modules, 'llm.llm', types.SimpleNamespace(QwenClient=FakeClient))
+    result = json.loads(pom_parse.llm_communicate(['g:cached:2', 'g:new:1'], pom_parse.system_prompt,
+                                                  ecosystem='java'))
+    assert requested == ['g:new:1']
+    assert result == [{'name': 'g:cached:2', 'description': 'from cache'},
+                      {'name': 'g:new:1', 'description': 'generated'}]
+    # 新生成的描述写回缓存
+    assert store.get_many('java', ['g:new:5']) == {'g:new:5': 'generated'}
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JavaScript lock 文件按行解析测试：结果与 YAML 加载后的结果一致，异常格式回退到 YAML 加载器
+
+    python -m pytest -q test_javascript_lockfiles.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase.javascript_parse import (_parse_pnpm_lock_data, _parse_pnpm_lock_lines, parse_pnpm_lock_yaml,
+                                     parse_yarn_lock)
+
+PNPM_V5 = """lockfileVersion: 5.4
+
+specifiers:
+  lodash: ^4.17.21
+
+dependencies:
+  lodash: 4.17.21
+
+packages:
+
+  /lodash/4.17.21:
+    resolution: {integrity: sha512-abc==}
+    dev: false
+
+  /@babel/core/7.22.5_react@18.2.0:
+    resolution: {integrity: sha512-def==}
+    dependencies:
+      react: 18.2.0
+    dev: true
+
+  github.com/user/repo/abcdef:
+    resolution: {tarball: https://codeload.github.com/user/repo/tar.gz/abcdef}
+    name: repo
+    version: 1.0.0
+    dev: false
+"""
+
+PNPM_V6 = """lockfileVersion: '6.0'
+
+dependencies:
+  lodash:
+    specifier: ^4.17.21
+    version: 4.17.21
+
+packages:
+
+  /lodash@4.17.21:
+    resolution: {integrity: sha512-abc==}
+    dev: false
+
+  /@babel/core@7.22.5(react@18.2.0):
+    resolution: {integrity: sha512-def==}
+    dev: true
+"""
+
+PNPM_V9 = """lockfileVersion: '9.0'
+
+importers:
+
+  .:
+    dependencies:
+      lodash:
+        specifier: ^4.17.21
+        version: 4.17.21
+
+packages:
+
+  lodash@4.17.21:
+    resolution: {integrity: sha512-abc==}
+
+  '@babel/core@7.22.5':
+    resolution: {integrity: sha512-def==}
+
+snapshots:
+
+  lodash@4.17.21: {}
+
+  '@babel/core@7.22.5(react@18.2.0)':
+    dependencies:
+      react: 18.2.0
+"""
+
+YARN_CLASSIC = """# THIS IS AN AUTOGENERATED FILE. DO NOT EDIT THIS FILE DIRECTLY.
+# yarn lockfile v1
+
+
+"@babel/code-frame@^7.0.0", "@babel/code-frame@^7.10.4":
+  version "7.22.5"
+  resolved "https://registry.yarnpkg.com/@babel/code-frame/-/code-frame-7.22.5.tgz"
+  dependencies:
+    "@babel/highlight" "^7.22.5"
+
+lodash@^4.17.21:
+  version "4.17.21"
+  resolved "https://registry.yarnpkg.com/lodash/-/lodash-4.17.21.tgz"
+
+my-lodash@npm:lodash@^4.17.20:
+  version "4.17.20"
+"""
+
+YARN_BERRY = """# This file is generated by running "yarn install" inside your project.
+
+__metadata:
+  version: 6
+  cacheKey: 8
+
+"@babel/code-frame@npm:^7.0.0, @babel/code-frame@npm:^7.10.4":
+  version: 7.22.5
+  resolution: "@babel/code-frame@npm:7.22.5"
+  dependencies:
+    "@babel/highlight": ^7.22.5
+  checksum: abc
+  languageName: node
+  linkType: hard
+
+"demo@workspace:.":
+  version: 0.0.0-use.local
+  resolution: "demo@workspace:."
+  languageName: unknown
+  linkType: soft
+
+"lodash@npm:^4.17.21":
+  version: 4.17.21
+  resolution: "lodash@npm:4.17.21"
+"""
+
+
+def write(tmp_path, text, name='pnpm-lock.yaml'):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('text, expected', [
+    (PNPM_V5, {'lodash 4.17.21', '@babel/core 7.22.5', 'repo 1.0.0'}),
+    (PNPM_V6, {'lodash 4.17.21', '@babel/core 7.22.5'}),
+    (PNPM_V9, {'lodash 4.17.21', '@babel/core 7.22.5'}),
+], ids=['v5', 'v6', 'v9'])
+def test_pnpm_line_parser_matches_yaml(text, expected):
+    lines = _parse_pnpm_lock_lines(text.splitlines(keepends=True))
+    assert lines == expected
+    assert _parse_pnpm_lock_data(yaml.safe_load(text)) == expected
+
+
+def test_pnpm_whitespace_only_lines(tmp_path):
+    text = PNPM_V6.replace("\n\n  /@babel", "\n \n  /@babel").replace("dev: false\n", "dev: false\n  \n")
+    assert set(parse_pnpm_lock_yaml(write(tmp_path, text))) == {'lodash 4.17.21', '@babel/core 7.22.5'}
+
+
+def test_pnpm_unrecognised_layout_falls_back_to_yaml(tmp_path):
+    # 条目使用四个空格缩进，按行解析无法识别，交给 YAML 加载器
+    text = PNPM_V6.replace("\n  /", "\n    /").replace("\n    resolution", "\n      resolution") \
+        .replace("\n    dev", "\n      dev")
+    assert _parse_pnpm_lock_lines(text.splitlines(keepends=True)) is None
+    assert set(parse_pnpm_lock_yaml(write(tmp_path, text))) == {'lodash 4.17.21', '@babel/core 7.22.5'}
+
+
+def test_pnpm_line_parser_error_falls_back_to_yaml(tmp_path, monkeypatch):
+    from parase import javascript_parse
+
+    def broken(lines):
+        raise IndexError('boom')
+
+    monkeypatch.setattr(javascript_parse, '_parse_pnpm_lock_lines', broken)
+    assert set(parse_pnpm_lock_yaml(write(tmp_path, PNPM_V9))) == {'lodash 4.17.21', '@babel/core 7.22.5'}
+
+
+def test_yarn_classic(tmp_path):
+    # 别名条目取实际包名，同名包保留最后出现的版本
+    assert parse_yarn_lock(write(tmp_path, YARN_CLASSIC, 'yarn.lock')) == [
+        '@babel/code-frame 7.22.5', 'lodash 4.17.20']
+
+
+def test_yarn_berry_skips_metadata_and_workspaces(tmp_path):
+    assert parse_yarn_lock(write(tmp_path, YARN_BERRY, 'yarn.lock')) == [
+        '@babel/code-frame 7.22.5', 'lodash 4.17.21']
+
+
+def test_yarn_crlf_line_endings(tmp_path):
+    path = tmp_path / 'yarn.lock'
+    path.write_bytes(YARN_BERRY.replace('\n', '\r\n').encode('utf-8'))
+    assert parse_yarn_lock(str(path)) == ['@babel/code-frame 7.22.5', 'lodash 4.17.21']
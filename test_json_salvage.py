@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM JSON 响应提取测试：代码块、截断、缺逗号、未转义引号
+
+    python -m pytest -q test_json_salvage.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase.json_salvage import JsonObjectExtractor, extract_description_items
+
+
+def names(items):
+    return [item['name'] for item in items]
+
+
+def test_valid_array_is_complete():
+    items, complete = extract_description_items('[{"name": "a", "description": "x"}, {"name": "b", "description": "y"}]')
+    assert complete
+    assert names(items) == ['a', 'b']
+
+
+def test_code_fenced_array_is_complete():
+    response = '```json\n[{"name": "a", "description": "x"}]\n```'
+    assert extract_description_items(response) == ([{'name': 'a', 'description': 'x'}], True)
+
+
+def test_truncated_response_keeps_closed_objects():
+    items, complete = extract_description_items(
+        '[{"name": "a", "description": "x"}, {"name": "b", "description": "cut off her')
+    assert not complete
+    assert names(items) == ['a']
+
+
+def test_missing_and_trailing_commas():
+    items, complete = extract_description_items(
+        '[{"name": "a", "description": "x",} {"name": "b", "description": "y"}]')
+    assert not complete
+    assert names(items) == ['a', 'b']
+
+
+def test_unescaped_quotes_do_not_join_neighbouring_items():
+    response = ('[{"name": "a", "description": "says "hi" twice"},'
+                ' {"name": "b", "description": "ok"},'
+                ' {"name": "c", "description": "one "odd quote"}]')
+    items, complete = extract_description_items(response)
+    assert not complete
+    assert items == [
+        {'name': 'a', 'description': 'says "hi" twice'},
+        {'name': 'b', 'description': 'ok'},
+        {'name': 'c', 'description': 'one "odd quote'},
+    ]
+
+
+def test_odd_unescaped_quote_before_last_item():
+    response = '[{"name": "a", "description": "5" display"},\n {"name": "b", "description": "ok"}]'
+    items, _ = extract_description_items(response)
+    assert items == [{'name': 'a', 'description': '5" display'}, {'name': 'b', 'description': 'ok'}]
+
+
+def test_items_without_name_are_dropped():
+    items, _ = extract_description_items('[{"description": "x"}, {"name": "b", "description": "y"}, 3]')
+    assert names(items) == ['b']
+
+
+def test_extractor_feeds_across_chunks():
+    response = '[{"name": "a", "description": "brace } in \\"text\\""}, {"name": "b", "description": "y"}]'
+    extractor = JsonObjectExtractor()
+    objects = []
+    for start in range(0, len(response), 7):
+        objects.extend(extractor.feed(response[start:start + 7]))
+    assert objects == [{'name': 'a', 'description': 'brace } in "text"'}, {'name': 'b', 'description': 'y'}]
+    assert not extractor.incomplete
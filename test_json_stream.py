@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式 JSON 读取测试：任意块大小下的结果都与 json.load 一致
+
+    python -m pytest -q test_json_stream.py
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase.json_stream import _Reader, iter_json_sections
+
+DOCUMENT = {
+    "name": "demo",
+    "lockfileVersion": 3,
+    "packages": {
+        "": {"name": "demo", "version": "1.0.0"},
+        "node_modules/a": {"version": "1.2.3", "dev": True, "tags": ["x", "y\"z", "}{"]},
+        "node_modules/@s/b": {"version": "0.0.1", "optional": False, "size": 1.5e10},
+    },
+    "numbers": [1.5e10, -0.25, 12345678901234567890, 0, True, None, "1.", 3.0],
+    "trailer": {"ignored": [{"deep": ["\\u00e9"]}]},
+}
+
+
+@pytest.mark.parametrize('chunk_size', range(1, 41))
+def test_members_at_every_chunk_size(chunk_size):
+    text = json.dumps(DOCUMENT, indent=1)
+    reader = _Reader(io.StringIO(text), chunk_size)
+    assert reader.peek() == '{'
+    assert dict(reader.iter_members()) == DOCUMENT
+
+
+@pytest.mark.parametrize('chunk_size', range(1, 41))
+def test_streamed_section_of_bare_numbers(chunk_size):
+    text = '{"numbers": [1.5e10, 22, -3.25e-7, 4E+2], "n": 1.5e10}'
+    reader = _Reader(io.StringIO(text), chunk_size)
+    reader.expect('{')
+    assert reader.decode() == "numbers"
+    reader.expect(':')
+    assert [value for _, value in reader.iter_members()] == [1.5e10, 22, -3.25e-7, 4E+2]
+
+
+def test_sections_match_json_load(tmp_path):
+    path = tmp_path / 'package-lock.json'
+    path.write_text(json.dumps(DOCUMENT), encoding='utf-8')
+    wanted = {'packages', 'numbers'}
+    streamed = list(iter_json_sections(str(path), wanted, min_stream_bytes=0))
+    loaded = list(iter_json_sections(str(path), wanted, min_stream_bytes=1 << 30))
+    assert streamed == loaded
+    assert [key for section, key, _ in streamed if section == 'packages'] == list(DOCUMENT['packages'])
+    assert [value for section, _, value in streamed if section == 'numbers'] == DOCUMENT['numbers']
+
+
+def test_predicate_can_stop_reading_sections(tmp_path):
+    path = tmp_path / 'composer.lock'
+    path.write_text(json.dumps({"packages": [{"name": "a"}], "packages-dev": [{"name": "b"}]}), encoding='utf-8')
+    seen = []
+
+    def want(section):
+        seen.append(section)
+        return section == 'packages'
+
+    items = [value['name'] for _, _, value in iter_json_sections(str(path), want, min_stream_bytes=0)]
+    assert items == ['a']
+    assert seen == ['packages', 'packages-dev']
+
+
+def test_invalid_json_raises(tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text('{"packages": {"a": {"version": "1"}, "b": ', encoding='utf-8')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_sections(str(path), {'packages'}, min_stream_bytes=0))
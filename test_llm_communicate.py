@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量描述生成测试：LLM 改写名称时仍能对应回输入依赖，只有不完整的响应才重新请求
+
+    python -m pytest -q test_llm_communicate.py
+"""
+
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase import description_cache, pom_parse
+from parase.description_cache import DescriptionCache
+from parase.pom_parse import _match_key, llm_communicate
+
+
+def use_client(monkeypatch, respond):
+    """用 respond(依赖列表) -> 响应文本 代替 QwenClient，返回每次请求的依赖列表"""
+    requests = []
+
+    class FakeClient:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+        def Think(self, prompts, subsystem=None, max_tokens=None):
+            deps = prompts[1]['content'].splitlines()[1:]
+            requests.append(deps)
+            return respond(deps)
+
+    monkeypatch.setitem(sys.modules, 'llm.llm', types.SimpleNamespace(QwenClient=FakeClient))
+    return requests
+
+
+def describe(deps, rename=lambda dep: dep):
+    return json.dumps([{'name': rename(dep), 'description': f'about {dep}'} for dep in deps])
+
+
+def test_match_key_ignores_name_version_separators():
+    assert _match_key('lodash 4.17.21') == _match_key('lodash@4.17.21') == _match_key('Lodash: 4.17.21')
+    assert _match_key('@babel/core 7.22.5') == _match_key('@babel/core@7.22.5')
+    assert _match_key('@babel/core 7.22.5') != _match_key('babel/core 7.22.5')
+    assert _match_key('org.slf4j:slf4j-api:2.0.9') == _match_key('org.slf4j slf4j-api 2.0.9')
+
+
+def test_renamed_items_are_matched_and_cached(tmp_path, monkeypatch):
+    store = DescriptionCache(db_path=str(tmp_path / 'descriptions.db'))
+    monkeypatch.setattr(description_cache, '_cache_instance', store)
+    monkeypatch.delenv('DESC_CACHE_ENABLED', raising=False)
+    requests = use_client(monkeypatch, lambda deps: describe(deps, lambda dep: dep.replace(' ', '@')))
+
+    deps = ['lodash 4.17.21', '@babel/core 7.22.5']
+    result = json.loads(llm_communicate(deps, pom_parse.system_prompt, ecosystem='javascript'))
+    assert result == [{'name': dep, 'description': f'about {dep}'} for dep in deps]
+    assert len(requests) == 1
+
+    # 再次扫描全部命中缓存，不再请求 LLM
+    llm_communicate(deps, pom_parse.system_prompt, ecosystem='javascript')
+    assert len(requests) == 1
+
+
+def test_unrecognisable_names_fall_back_to_position(monkeypatch):
+    use_client(monkeypatch, lambda deps: describe(deps, lambda dep: f'package #{deps.index(dep)}'))
+    deps = ['a 1', 'b 2', 'c 3']
+    result = json.loads(llm_communicate(deps, pom_parse.system_prompt))
+    assert result == [{'name': dep, 'description': f'about {dep}'} for dep in deps]
+
+
+def test_complete_response_missing_items_is_not_requested_again(monkeypatch):
+    requests = use_client(monkeypatch, lambda deps: describe(deps[:1]))
+    result = json.loads(llm_communicate(['a 1', 'b 2'], pom_parse.system_prompt))
+    assert requests == [['a 1', 'b 2']]
+    assert result == [{'name': 'a 1', 'description': 'about a 1'}, {'name': 'b 2', 'description': ''}]
+
+
+def test_truncated_response_requests_only_missing_items(monkeypatch):
+    def respond(deps):
+        text = describe(deps)
+        return text if len(deps) == 1 else text[:text.index('}') + 1] + ', {"name": "b'
+
+    requests = use_client(monkeypatch, respond)
+    result = json.loads(llm_communicate(['a 1', 'b 2'], pom_parse.system_prompt))
+    assert requests == [['a 1', 'b 2'], ['b 2']]
+    assert [item['description'] for item in result] == ['about a 1', 'about b 2']
+
+
+def test_source_failure_is_raised_after_fetched_batches(monkeypatch):
+    requests = use_client(monkeypatch, describe)
+    results = []
+
+    def source():
+        yield 'a 1'
+        yield 'b 2'
+        raise OSError('disk went away')
+
+    with pytest.raises(OSError, match='disk went away'):
+        llm_communicate(source(), pom_parse.system_prompt, on_result=results.extend)
+    assert requests == [['a 1', 'b 2']]
+    assert [item['name'] for item in results] == ['a 1', 'b 2']
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+清单解析结果缓存测试：mtime 命中、内容哈希命中、git blob id 命中、内容变化后重新解析
+
+    python -m pytest -q test_manifest_cache.py
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase import manifest_cache
+from parase.manifest_cache import ManifestCache, parse_with_cache
+
+CALLS = []
+
+
+def parse_lines(manifest):
+    path = manifest if isinstance(manifest, str) else manifest[-1]
+    CALLS.append(path)
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    store = ManifestCache(db_path=str(tmp_path / 'manifest.db'))
+    monkeypatch.setattr(manifest_cache, '_cache_instance', store)
+    monkeypatch.delenv('MANIFEST_CACHE_ENABLED', raising=False)
+    CALLS.clear()
+    return store
+
+
+def manifest(tmp_path, text='a 1\nb 2\n'):
+    path = tmp_path / 'deps.txt'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_unchanged_file_is_parsed_once(tmp_path, cache):
+    path = manifest(tmp_path)
+    assert parse_with_cache(parse_lines, path) == ['a 1', 'b 2']
+    assert parse_with_cache(parse_lines, path) == ['a 1', 'b 2']
+    assert CALLS == [path]
+    stats = cache.get_stats()
+    assert (stats['misses'], stats['hits'], stats['entries']) == (1, 1, 1)
+
+
+def test_touched_file_hits_by_content_hash(tmp_path, cache):
+    path = manifest(tmp_path)
+    parse_with_cache(parse_lines, path)
+    later = time.time() + 10
+    os.utime(path, (later, later))
+    assert parse_with_cache(parse_lines, path) == ['a 1', 'b 2']
+    assert CALLS == [path]
+    assert cache.get_stats()['hash_hits'] == 1
+
+
+def test_changed_file_is_parsed_again(tmp_path, cache):
+    path = manifest(tmp_path)
+    parse_with_cache(parse_lines, path)
+    manifest(tmp_path, 'a 1\nb 3\nc 4\n')
+    assert parse_with_cache(parse_lines, path) == ['a 1', 'b 3', 'c 4']
+    assert CALLS == [path, path]
+
+
+def test_git_blob_id_hits_without_reading_the_file(tmp_path, cache):
+    path = manifest(tmp_path)
+    content_ids = {os.path.normpath(path): 'blob-1'}
+    parse_with_cache(parse_lines, path, content_ids)
+    os.remove(path)
+    assert parse_with_cache(parse_lines, path, content_ids) == ['a 1', 'b 2']
+    assert cache.get_stats()['git_hits'] == 1
+
+
+def test_file_type_is_part_of_the_key(tmp_path, cache):
+    path = manifest(tmp_path)
+    parse_with_cache(parse_lines, ('requirements', path))
+    parse_with_cache(parse_lines, ('pipfile', path))
+    assert CALLS == [path, path]
+    assert cache.get_stats()['entries'] == 2
+
+
+def test_disabled_cache_parses_directly(tmp_path, cache, monkeypatch):
+    monkeypatch.setenv('MANIFEST_CACHE_ENABLED', 'false')
+    path = manifest(tmp_path)
+    parse_with_cache(parse_lines, path)
+    parse_with_cache(parse_lines, path)
+    assert CALLS == [path, path]
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_expired_entries_are_removed_on_open(tmp_path, cache):
+    parse_with_cache(parse_lines, manifest(tmp_path))
+    assert ManifestCache(db_path=cache.db_path, ttl=-1).get_stats()['entries'] == 0
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Maven 多模块模型测试：parent 继承、properties 占位符、dependencyManagement 和 BOM 导入
+
+    python -m pytest -q test_maven_model.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase import manifest_cache
+from parase.manifest_cache import ManifestCache
+from parase.maven_model import MavenReactor, interpolate
+from parase.pom_parse import list_maven_dependencies
+
+ROOT_POM = """<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <groupId>com.acme</groupId>
+  <artifactId>acme-parent</artifactId>
+  <version>1.0</version>
+  <packaging>pom</packaging>
+  <properties>
+    <spring.version>5.3.30</spring.version>
+    <jackson.version>${jackson.major}.15.2</jackson.version>
+    <jackson.major>2</jackson.major>
+  </properties>
+  <dependencyManagement>
+    <dependencies>
+      <dependency>
+        <groupId>org.springframework</groupId>
+        <artifactId>spring-core</artifactId>
+        <version>${spring.version}</version>
+      </dependency>
+      <dependency>
+        <groupId>com.acme</groupId>
+        <artifactId>acme-bom</artifactId>
+        <version>${project.version}</version>
+        <type>pom</type>
+        <scope>import</scope>
+      </dependency>
+    </dependencies>
+  </dependencyManagement>
+  <build>
+    <pluginManagement>
+      <plugins>
+        <plugin>
+          <artifactId>maven-compiler-plugin</artifactId>
+          <version>3.11.0</version>
+        </plugin>
+      </plugins>
+    </pluginManagement>
+  </build>
+</project>
+"""
+
+BOM_POM = """<project>
+  <groupId>com.acme</groupId>
+  <artifactId>acme-bom</artifactId>
+  <version>1.0</version>
+  <packaging>pom</packaging>
+  <properties>
+    <guava.version>32.1.2-jre</guava.version>
+  </properties>
+  <dependencyManagement>
+    <dependencies>
+      <dependency>
+        <groupId>com.google.guava</groupId>
+        <artifactId>guava</artifactId>
+        <version>${guava.version}</version>
+      </dependency>
+    </dependencies>
+  </dependencyManagement>
+</project>
+"""
+
+APP_POM = """<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <parent>
+    <groupId>com.acme</groupId>
+    <artifactId>acme-parent</artifactId>
+    <version>1.0</version>
+  </parent>
+  <artifactId>app</artifactId>
+  <properties>
+    <spring.version>6.0.13</spring.version>
+  </properties>
+  <dependencies>
+    <dependency>
+      <groupId>org.springframework</groupId>
+      <artifactId>spring-core</artifactId>
+    </dependency>
+    <dependency>
+      <groupId>com.google.guava</groupId>
+      <artifactId>guava</artifactId>
+    </dependency>
+    <dependency>
+      <groupId>com.fasterxml.jackson.core</groupId>
+      <artifactId>jackson-databind</artifactId>
+      <version>${jackson.version}</version>
+    </dependency>
+    <dependency>
+      <groupId>${project.groupId}</groupId>
+      <artifactId>lib</artifactId>
+      <version>${project.version}</version>
+    </dependency>
+    <dependency>
+      <groupId>org.unknown</groupId>
+      <artifactId>unversioned</artifactId>
+    </dependency>
+  </dependencies>
+  <build>
+    <plugins>
+      <plugin>
+        <artifactId>maven-compiler-plugin</artifactId>
+      </plugin>
+    </plugins>
+  </build>
+</project>
+"""
+
+EXTERNAL_PARENT_POM = """<project>
+  <parent>
+    <groupId>org.springframework.boot</groupId>
+    <artifactId>spring-boot-starter-parent</artifactId>
+    <version>3.1.5</version>
+    <relativePath/>
+  </parent>
+  <artifactId>service</artifactId>
+  <dependencies>
+    <dependency>
+      <groupId>org.springframework.boot</groupId>
+      <artifactId>spring-boot-starter-web</artifactId>
+    </dependency>
+    <dependency>
+      <groupId>org.projectlombok</groupId>
+      <artifactId>lombok</artifactId>
+      <version>1.18.30</version>
+    </dependency>
+  </dependencies>
+</project>
+"""
+
+
+def make_project(root):
+    files = {
+        'pom.xml': ROOT_POM,
+        'bom/pom.xml': BOM_POM,
+        'app/pom.xml': APP_POM,
+        'service/pom.xml': EXTERNAL_PARENT_POM,
+    }
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+    return {name: os.path.normpath(str(root / name)) for name in files}
+
+
+def dependencies(paths, module):
+    reactor = MavenReactor(cached=False)
+    list(reactor.iter_modules(paths.values()))
+    return reactor.module_dependencies(paths[module])
+
+
+def test_interpolate_nested_and_unknown():
+    properties = {'a': '${b}', 'b': '1.0'}
+    assert interpolate('${a}-x', properties) == '1.0-x'
+    assert interpolate('${missing}', properties) == '${missing}'
+    assert interpolate('${loop}', {'loop': '${loop}'}) == '${loop}'
+
+
+def test_child_inherits_parent_properties_and_management(tmp_path):
+    paths = make_project(tmp_path)
+    assert dependencies(paths, 'app/pom.xml') == [
+        # 子模块覆盖的 property 优先于 parent 中的值
+        'org.springframework:spring-core:6.0.13',
+        # 通过 parent 导入的项目内 BOM，版本在 BOM 自己的上下文中替换
+        'com.google.guava:guava:32.1.2-jre',
+        'com.fasterxml.jackson.core:jackson-databind:2.15.2',
+        'com.acme:lib:1.0',
+        'org.apache.maven.plugins:maven-compiler-plugin:3.11.0',
+    ]
+
+
+def test_parent_found_by_coordinates_without_relative_path(tmp_path):
+    paths = make_project(tmp_path)
+    moved = tmp_path / 'modules' / 'deep' / 'app'
+    moved.mkdir(parents=True)
+    os.replace(paths['app/pom.xml'], moved / 'pom.xml')
+    paths['app/pom.xml'] = os.path.normpath(str(moved / 'pom.xml'))
+    assert 'com.google.guava:guava:32.1.2-jre' in dependencies(paths, 'app/pom.xml')
+
+
+def test_external_parent_keeps_only_versioned_dependencies(tmp_path):
+    paths = make_project(tmp_path)
+    assert dependencies(paths, 'service/pom.xml') == ['org.projectlombok:lombok:1.18.30']
+
+
+def test_parent_cycle_does_not_recurse(tmp_path):
+    (tmp_path / 'pom.xml').write_text(
+        '<project><parent><groupId>g</groupId><artifactId>a</artifactId><version>1</version>'
+        '<relativePath>pom.xml</relativePath></parent><artifactId>a</artifactId>'
+        '<dependencies><dependency><groupId>x</groupId><artifactId>y</artifactId><version>${version}</version>'
+        '</dependency></dependencies></project>', encoding='utf-8')
+    reactor = MavenReactor(cached=False)
+    path, = reactor.iter_modules([str(tmp_path / 'pom.xml')])
+    assert reactor.module_dependencies(path) == ['x:y:1']
+
+
+def test_project_scan_resolves_across_modules(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_cache, '_cache_instance', ManifestCache(db_path=str(tmp_path / 'cache.db')))
+    project = tmp_path / 'project'
+    make_project(project)
+    deps = list_maven_dependencies(str(project))
+    assert 'org.springframework:spring-core:6.0.13' in deps
+    assert 'org.springframework:spring-core:5.3.30' in deps
+    assert 'com.google.guava:guava:32.1.2-jre' in deps
+    assert not any(dep.startswith('org.springframework.boot:spring-boot-starter-web') for dep in deps)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+清单并行解析测试：进程池结果按输入顺序产出，空结果不会在本进程重新解析
+
+    python -m pytest -q test_parallel_parse.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase import parallel_parse
+from parase.parallel_parse import iter_parsed
+
+LOCAL_PID = os.getpid()
+LOCAL_CALLS = []
+
+
+def parse_lines(path):
+    """空文件返回 None；记录在本进程中的调用"""
+    if os.getpid() == LOCAL_PID:
+        LOCAL_CALLS.append(path)
+    with open(path, encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return lines or None
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv('PARSE_POOL_ENABLED', 'true')
+    monkeypatch.setenv('PARSE_POOL_WORKERS', '2')
+    monkeypatch.setenv('PARSE_POOL_MIN_FILES', '1')
+    LOCAL_CALLS.clear()
+    yield
+    parallel_parse._reset_pool()
+
+
+def manifests(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f'deps{i}.txt'
+        path.write_text('' if i % 2 else f'dep{i} 1.0\n', encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+
+def test_pool_results_keep_order_and_empty_results(tmp_path, pool):
+    paths = manifests(tmp_path)
+    results = list(iter_parsed(paths, parse_lines, cached=False))
+    assert [path for path, _ in results] == paths
+    assert [result for _, result in results] == [['dep0 1.0'], [], ['dep2 1.0'], [], ['dep4 1.0'], []]
+    assert LOCAL_CALLS == []
+
+
+def test_unpicklable_parser_falls_back_to_local(tmp_path, pool):
+    paths = manifests(tmp_path)
+    results = list(iter_parsed(paths, lambda path: parse_lines(path), cached=False))
+    assert [result for _, result in results] == [['dep0 1.0'], [], ['dep2 1.0'], [], ['dep4 1.0'], []]
+    assert LOCAL_CALLS == paths
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+项目文件索引测试：git 索引与目录遍历结果一致，未修改的清单文件按 blob id 命中缓存
+
+    python -m pytest -q test_project_index.py
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parase import manifest_cache
+from parase.manifest_cache import ManifestCache
+from parase.project_index import ProjectIndex, walk_manifests
+from parase.go_parse import list_go_dependencies
+from parase.rust_parse import list_rust_dependencies
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git 不可用")
+
+CARGO_LOCK = '''version = 3
+
+[[package]]
+name = "serde"
+version = "{version}"
+source = "registry+https://github.com/rust-lang/crates.io-index"
+
+'''
+
+
+def write(root, relative, text):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def git(root, *args):
+    subprocess.run(['git', '-C', str(root), '-c', 'user.name=t', '-c', 'user.email=t@example.com', *args],
+                   check=True, capture_output=True)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    instance = ManifestCache(db_path=str(tmp_path / "manifest.db"))
+    monkeypatch.setattr(manifest_cache, "_cache_instance", instance)
+    monkeypatch.delenv("MANIFEST_CACHE_ENABLED", raising=False)
+    return instance
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    write(root, "Cargo.toml", '[package]\nname = "demo"\n')
+    write(root, "Cargo.lock", CARGO_LOCK.format(version="1.0.100"))
+    for directory in ("a", "a-b", "a/x", "B/c"):
+        write(root, f"{directory}/go.mod", "module m\n\nrequire github.com/pkg/errors v0.9.1\n")
+    write(root, "web/App.csproj", "<Project/>")
+    write(root, "node_modules/left-pad/package.json", "{}")
+    write(root, ".gitignore", "Cargo.lock\ngenerated/\nnode_modules/\n")
+    git(root, "init", "-q")
+    git(root, "add", "-A")
+    git(root, "commit", "-qm", "init")
+    # 提交之后才出现的文件：被忽略的清单、被忽略目录中的清单、未跟踪的清单
+    write(root, "Cargo.lock", CARGO_LOCK.format(version="1.0.188"))
+    write(root, "generated/package-lock.json", "{}")
+    write(root, "untracked/go.mod", "module u\n")
+    return root
+
+
+def snapshot(index):
+    return ([(dirpath, sorted(names)) for dirpath, names in index.walk()],
+            index.paths("go.mod"), index.paths_with_extension(".csproj"))
+
+
+def test_git_index_matches_walk(repo):
+    walk = ProjectIndex(str(repo), use_git=False)
+    indexed = ProjectIndex(str(repo), use_git=True)
+    assert walk.source == "walk"
+    assert indexed.source == "git"
+    assert snapshot(indexed) == snapshot(walk)
+    assert os.path.join(str(repo), "generated", "package-lock.json") in indexed.paths("package-lock.json")
+
+
+def test_ignored_lock_file_is_parsed(repo, cache):
+    index = ProjectIndex(str(repo), use_git=True)
+    assert list_rust_dependencies(str(repo), index) == ["serde 1.0.188"]
+
+
+def test_unchanged_manifests_hit_by_blob_id(repo, cache):
+    index = ProjectIndex(str(repo), use_git=True)
+    # 被忽略和未跟踪的文件没有 blob id
+    assert os.path.normpath(os.path.join(str(repo), "Cargo.lock")) not in index.content_ids
+    assert os.path.normpath(os.path.join(str(repo), "untracked", "go.mod")) not in index.content_ids
+    expected = list_go_dependencies(str(repo), index)
+
+    # 重新 checkout 之后所有文件的 mtime 都变了，内容未变的已跟踪清单直接按 blob id 命中
+    later = time.time() + 100
+    for dirpath, dirnames, filenames in os.walk(repo):
+        dirnames[:] = [name for name in dirnames if name != ".git"]
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (later, later))
+    before = cache.get_stats()
+    assert list_go_dependencies(str(repo), ProjectIndex(str(repo), use_git=True)) == expected
+    after = cache.get_stats()
+    assert after["git_hits"] - before["git_hits"] == 4
+    # 未跟踪的 go.mod 没有 blob id，内容未变按哈希命中
+    assert after["hash_hits"] - before["hash_hits"] == 1
+    assert after["misses"] == before["misses"]
+
+
+def test_modified_manifest_has_no_blob_id(repo):
+    write(repo, "a/go.mod", "module changed\n")
+    index = ProjectIndex(str(repo), use_git=True)
+    assert os.path.normpath(os.path.join(str(repo), "a", "go.mod")) not in index.content_ids
+    assert os.path.normpath(os.path.join(str(repo), "a-b", "go.mod")) in index.content_ids
+
+
+def test_subdirectory_of_repository_uses_walk(repo):
+    assert ProjectIndex(str(repo / "a"), use_git=True).source == "walk"
+
+
+def test_walk_manifests_without_index_does_not_use_git(repo, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("walk_manifests 不应启动 git 进程")
+
+    monkeypatch.setattr(subprocess, "run", fail)
+    assert [dirpath for dirpath, _ in walk_manifests(str(repo))]
+
+
+def test_single_manifest_parsers_use_name_lookup(repo):
+    from parase.c_parse import iter_kulin_files
+    from parase.go_parse import find_go_mod_files
+    from parase.pom_parse import find_pom_files
+
+    write(repo, "lib/kulin.txt", "zlib 1.2.13\n")
+    write(repo, "svc/pom.xml", "<project/>")
+    write(repo, "node_modules/dep/pom.xml", "<project/>")
+    index = ProjectIndex(str(repo), use_git=True)
+    assert find_go_mod_files(str(repo), index) == index.paths("go.mod")
+    assert find_go_mod_files(str(repo)) == ProjectIndex(str(repo), use_git=False).paths("go.mod")
+    assert find_pom_files(str(repo), index) == [os.path.join(str(repo), "svc", "pom.xml")]
+    assert list(iter_kulin_files(str(repo), index)) == [os.path.join(str(repo), "lib", "kulin.txt")]
+
+
+def test_detector_recognises_extension_signatures(repo):
+    from parase.project_detector import ProjectDetector
+
+    detector = ProjectDetector(str(repo), index=ProjectIndex(str(repo), use_git=True))
+    detected = detector.detect()
+    assert detected["csharp"]["files"] == [os.path.join(str(repo), "web", "App.csproj")]
+    assert "go" in detected and "rust" in detected
+
+
+def test_standalone_detector_walks_the_directory(repo):
+    from parase.project_detector import ProjectDetector
+
+    detector = ProjectDetector(str(repo))
+    assert "go" in detector.detect()
+    assert detector.index.source == 'walk'
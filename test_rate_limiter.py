@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨进程令牌桶测试：数据库被锁时不阻塞，429 惩罚在锁释放后写入共享桶
+
+    python -m pytest -q test_rate_limiter.py
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llm.rate_limiter import LOCKED_RETRY_SECONDS, SqliteTokenBucket
+
+
+def locked(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("BEGIN IMMEDIATE")
+    return conn
+
+
+def test_tokens_are_shared_between_instances(tmp_path):
+    db_path = str(tmp_path / 'rate.db')
+    first = SqliteTokenBucket(db_path=db_path, rate=10, burst=2)
+    second = SqliteTokenBucket(db_path=db_path, rate=10, burst=2)
+    assert first.try_acquire('p') == 0
+    assert second.try_acquire('p') == 0
+    assert first.try_acquire('p') > 0
+
+
+def test_locked_database_does_not_block(tmp_path):
+    db_path = str(tmp_path / 'rate.db')
+    bucket = SqliteTokenBucket(db_path=db_path)
+    other = locked(db_path)
+    start = time.perf_counter()
+    assert bucket.try_acquire('p') == LOCKED_RETRY_SECONDS
+    assert time.perf_counter() - start < 0.05
+    other.execute("COMMIT")
+
+
+def test_penalty_survives_a_locked_database(tmp_path):
+    db_path = str(tmp_path / 'rate.db')
+    bucket = SqliteTokenBucket(db_path=db_path, rate=10, burst=10)
+    other = locked(db_path)
+    bucket.penalize('p', 2.0)
+    assert bucket.try_acquire('p') == LOCKED_RETRY_SECONDS
+    other.execute("COMMIT")
+
+    assert bucket.try_acquire('p') > 1.5
+    # 惩罚已写入共享桶，其他进程同样需要等待
+    assert SqliteTokenBucket(db_path=db_path, rate=10, burst=10).try_acquire('p') > 1.5
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 调度器测试：令牌不足时的重试定时器按最早的等待时间设定
+
+    python -m pytest -q test_scheduler.py
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llm.scheduler import LLMScheduler
+
+
+class ScriptedBucket:
+    """按提供方依次返回预设的等待秒数，用完后放行"""
+
+    def __init__(self, waits):
+        self.waits = {provider: list(values) for provider, values in waits.items()}
+
+    def try_acquire(self, provider):
+        values = self.waits[provider]
+        return values.pop(0) if values else 0.0
+
+    def penalize(self, provider, seconds):
+        pass
+
+
+def test_shorter_retry_rearms_pending_timer():
+    async def scenario():
+        scheduler = LLMScheduler(ScriptedBucket({'slow': [30.0] * 100, 'fast': [0.05]}),
+                                 limits={'interactive': 4, 'bulk': 4})
+        slow = asyncio.ensure_future(scheduler._acquire('slow', 'interactive'))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        async with scheduler.slot('fast', 'query'):
+            waited = time.perf_counter() - start
+        slow.cancel()
+        scheduler._timer.cancel()
+        return waited
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 5)) < 1.0